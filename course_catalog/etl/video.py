@@ -2,7 +2,16 @@
 from django.conf import settings
 
 from course_catalog.models import Video
-from search.api import get_similar_topics
+from open_discussions.utils import chunks
+from search.api import get_many_similar_topics, get_similar_topics
+
+# The number of videos whose topics are looked up together
+TOPICS_CHUNK_SIZE = 1000
+
+
+def _text_doc(video):
+    """The fields of a video which its topics are found with"""
+    return {"title": video.title, "short_description": video.short_description}
 
 
 def extract_topics(video):
@@ -17,10 +26,8 @@ def extract_topics(video):
             list of topic data for the video
 
     """
-    text_doc = {"title": video.title, "short_description": video.short_description}
-
     topic_names = get_similar_topics(
-        text_doc,
+        _text_doc(video),
         settings.OPEN_VIDEO_MAX_TOPICS,
         settings.OPEN_VIDEO_MIN_TERM_FREQ,
         settings.OPEN_VIDEO_MIN_DOC_FREQ,
@@ -49,9 +56,16 @@ def extract_videos_topics(*, video_ids=None):
     if video_ids:
         videos = videos.filter(id__in=video_ids)
 
-    for video in videos.iterator():
-        yield {
-            "video_id": video.video_id,
-            "platform": video.platform,
-            "topics": extract_topics(video),
-        }
+    for videos_chunk in chunks(videos.iterator(), chunk_size=TOPICS_CHUNK_SIZE):
+        topics = get_many_similar_topics(
+            [_text_doc(video) for video in videos_chunk],
+            settings.OPEN_VIDEO_MAX_TOPICS,
+            settings.OPEN_VIDEO_MIN_TERM_FREQ,
+            settings.OPEN_VIDEO_MIN_DOC_FREQ,
+        )
+        for video, topic_names in zip(videos_chunk, topics):
+            yield {
+                "video_id": video.video_id,
+                "platform": video.platform,
+                "topics": [{"name": topic_name} for topic_name in topic_names],
+            }
@@ -26,8 +26,8 @@ def test_extract_topics(settings, mocker):
 
 
 @pytest.mark.parametrize("use_video_ids", [True, False])
-def test_extract_videos_topics(mocker, use_video_ids):
-    """Tests that extract_videos_topics yields objects for each video with topics"""
+def test_extract_videos_topics(settings, mocker, use_video_ids):
+    """Tests that extract_videos_topics yields objects for each video with topics, looked up together"""
     published_videos = VideoFactory.create_batch(3, published=True)
     # shouldn't be extracted
     VideoFactory.create_batch(3, published=False)
@@ -36,8 +36,9 @@ def test_extract_videos_topics(mocker, use_video_ids):
         [f"topic-{idx}-a", f"topic-{idx}-b"] for idx in range(len(published_videos))
     ]
 
-    mock_get_similar_topics = mocker.patch(
-        "course_catalog.etl.video.get_similar_topics", side_effect=topic_results
+    mock_get_many_similar_topics = mocker.patch(
+        "course_catalog.etl.video.get_many_similar_topics",
+        side_effect=lambda value_docs, *args: topic_results[: len(value_docs)],
     )
 
     if use_video_ids:
@@ -49,15 +50,21 @@ def test_extract_videos_topics(mocker, use_video_ids):
         )
     )
 
-    assert len(result) == len(published_videos)
-
-    for video, topics in zip(published_videos, topic_results):
-        assert {
+    assert result == [
+        {
             "video_id": video.video_id,
             "platform": video.platform,
             "topics": [{"name": topic} for topic in topics],
-        } in result
+        }
+        for video, topics in zip(published_videos, topic_results)
+    ]
 
-    assert mock_get_similar_topics.call_count == (
-        1 if use_video_ids else len(published_videos)
+    mock_get_many_similar_topics.assert_called_once_with(
+        [
+            {"title": video.title, "short_description": video.short_description}
+            for video in published_videos
+        ],
+        settings.OPEN_VIDEO_MAX_TOPICS,
+        settings.OPEN_VIDEO_MIN_TERM_FREQ,
+        settings.OPEN_VIDEO_MIN_DOC_FREQ,
     )
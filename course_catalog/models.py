@@ -338,7 +338,7 @@ class Course(AbstractCourse, LearningResourceGenericRelationsMixin):
             self.platform == PlatformType.mitx.value
             and any(
                 availability != AvailabilityType.archived.value
-                for availability in self.runs.values_list("availability", flat=True)
+                for availability in (run.availability for run in self.runs.all())
             )
         ):
             return [CERTIFICATE]
@@ -503,9 +503,9 @@ class Program(List, LearningResourceGenericRelationsMixin):
     @property
     def audience(self):
         """Returns the audience for the program"""
-        if OfferedBy.micromasters.value in self.offered_by.values_list(
-            "name", flat=True
-        ):
+        if OfferedBy.micromasters.value in [
+            offeror.name for offeror in self.offered_by.all()
+        ]:
             return [OPEN, PROFESSIONAL]
         return [PROFESSIONAL]
 
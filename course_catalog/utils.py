@@ -175,28 +175,36 @@ def semester_year_to_date(semester, year, ending=False):
     return datetime.strptime(f"{year}-{month_day}", "%Y-%m-%d").replace(tzinfo=pytz.UTC)
 
 
-def get_list_items_by_resource(user, object_type, object_id):
-    """Get serialized list items for a particular user and resource
+def get_list_items_by_resources(user, resources):
+    """Get serialized list items for a particular user and a group of resources
 
     Args:
         user (User): the User to filter list items by
-        object_type (string): The object type of the resource
-        object_id (int): the id of the resource
+        resources (iterable of tuple(str, int)): (object_type, object_id) pairs for the resources
 
     Returns:
-        list of dicts: serialized UserListItem data
+        dict: serialized UserListItem data lists keyed by (object_type, object_id)
 
     """
     from course_catalog.models import UserListItem
     from course_catalog.serializers import MicroUserListItemSerializer
 
-    return [
-        MicroUserListItemSerializer(item).data
-        for item in UserListItem.objects.filter(user_list__author=user)
+    resources = set(resources)
+    items_by_resource = {resource: [] for resource in resources}
+    if not resources:
+        return items_by_resource
+
+    for item in (
+        UserListItem.objects.filter(user_list__author=user)
         .select_related("content_type")
-        .filter(content_type__model=object_type)
-        .filter(object_id=object_id)
-    ]
+        .filter(content_type__model__in={object_type for object_type, _ in resources})
+        .filter(object_id__in={object_id for _, object_id in resources})
+        .order_by("id")
+    ):
+        resource = (item.content_type.model, item.object_id)
+        if resource in items_by_resource:
+            items_by_resource[resource].append(MicroUserListItemSerializer(item).data)
+    return items_by_resource
 
 
 def load_course_blocklist():
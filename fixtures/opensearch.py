@@ -3,7 +3,7 @@ from types import SimpleNamespace
 
 import pytest
 
-from search.connection import configure_connections
+from search.connection import configure_connections, reset_alias_registry
 
 
 @pytest.fixture(autouse=True)
@@ -14,4 +14,5 @@ def opensearch(mocker, settings):
         "opensearch_dsl.search.get_connection", autospec=True
     )
     configure_connections()
+    reset_alias_registry()
     return SimpleNamespace(conn=mock_get_connection.return_value)
@@ -0,0 +1,15 @@
+"""ASGI config for ui app.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+This serves the async search views without holding a worker per in-flight search.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "open_discussions.settings")
+
+application = get_asgi_application()  # pylint: disable=invalid-name
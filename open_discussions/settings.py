@@ -633,9 +633,81 @@ OPENSEARCH_DOCUMENT_INDEXING_CHUNK_SIZE = get_int(
 OPENSEARCH_MIN_QUERY_SIZE = get_int("OPENSEARCH_MIN_QUERY_SIZE", 2)
 OPENSEARCH_MAX_SUGGEST_HITS = get_int("OPENSEARCH_MAX_SUGGEST_HITS", 1)
 OPENSEARCH_MAX_SUGGEST_RESULTS = get_int("OPENSEARCH_MAX_SUGGEST_RESULTS", 1)
+OPENSEARCH_MAX_MULTI_SEARCH_QUERIES = get_int("OPENSEARCH_MAX_MULTI_SEARCH_QUERIES", 10)
 OPENSEARCH_SHARD_COUNT = get_int("OPENSEARCH_SHARD_COUNT", 2)
 OPENSEARCH_REPLICA_COUNT = get_int("OPENSEARCH_REPLICA_COUNT", 2)
 OPENSEARCH_MAX_REQUEST_SIZE = get_int("OPENSEARCH_MAX_REQUEST_SIZE", 10485760)
+OPENSEARCH_ALIAS_CACHE_TIMEOUT = get_int("OPENSEARCH_ALIAS_CACHE_TIMEOUT", 10)
+OPENSEARCH_BULK_CONCURRENCY = get_int("OPENSEARCH_BULK_CONCURRENCY", 1)
+OPENSEARCH_BULK_MAX_RETRIES = get_int("OPENSEARCH_BULK_MAX_RETRIES", 3)
+OPENSEARCH_BULK_RETRY_BACKOFF = get_int("OPENSEARCH_BULK_RETRY_BACKOFF", 2)
+OPENSEARCH_REINDEX_BULK_LOAD = get_bool("OPENSEARCH_REINDEX_BULK_LOAD", True)
+OPENSEARCH_REINDEX_ASYNC_TRANSLOG = get_bool("OPENSEARCH_REINDEX_ASYNC_TRANSLOG", False)
+OPENSEARCH_REINDEX_FORCE_MERGE_SEGMENTS = get_int(
+    "OPENSEARCH_REINDEX_FORCE_MERGE_SEGMENTS", 1
+)
+OPENSEARCH_REINDEX_FINISH_TIMEOUT = get_int("OPENSEARCH_REINDEX_FINISH_TIMEOUT", 3600)
+OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT = get_int(
+    "OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT", 60 * 60 * 24 * 7
+)
+OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = get_string(
+    "OPENSEARCH_INDEXING_STATE_CACHE_ALIAS", "redis"
+)
+OPENSEARCH_INCREMENTAL_UPDATE_ENABLED = get_bool(
+    "OPENSEARCH_INCREMENTAL_UPDATE_ENABLED", False
+)
+OPENSEARCH_UPDATE_INDEX_WATERMARK_OVERLAP = get_int(
+    "OPENSEARCH_UPDATE_INDEX_WATERMARK_OVERLAP", 15 * 60
+)
+OPENSEARCH_FINGERPRINTS_ENABLED = get_bool("OPENSEARCH_FINGERPRINTS_ENABLED", False)
+OPENSEARCH_FINGERPRINT_TIMEOUT = get_int(
+    "OPENSEARCH_FINGERPRINT_TIMEOUT", 60 * 60 * 24 * 30
+)
+OPENSEARCH_UPDATE_QUEUE_ENABLED = get_bool("OPENSEARCH_UPDATE_QUEUE_ENABLED", False)
+OPENSEARCH_TASK_POLL_SECONDS = get_int("OPENSEARCH_TASK_POLL_SECONDS", 10)
+OPENSEARCH_CUTOVER_VALIDATION_ENABLED = get_bool(
+    "OPENSEARCH_CUTOVER_VALIDATION_ENABLED", True
+)
+OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE = get_int(
+    "OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE", 100
+)
+OPENSEARCH_CUTOVER_QUERY_SAMPLE_SIZE = get_int(
+    "OPENSEARCH_CUTOVER_QUERY_SAMPLE_SIZE", 500
+)
+OPENSEARCH_CUTOVER_WARMUP_QUERIES = get_int("OPENSEARCH_CUTOVER_WARMUP_QUERIES", 200)
+OPENSEARCH_CUTOVER_MAX_COUNT_DROP_PERCENT = get_int(
+    "OPENSEARCH_CUTOVER_MAX_COUNT_DROP_PERCENT", 5
+)
+OPENSEARCH_CUTOVER_MIN_OVERLAP_PERCENT = get_int(
+    "OPENSEARCH_CUTOVER_MIN_OVERLAP_PERCENT", 50
+)
+OPENSEARCH_CUTOVER_RETENTION_SECONDS = get_int(
+    "OPENSEARCH_CUTOVER_RETENTION_SECONDS", 60 * 60 * 24
+)
+OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT = get_int("OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT", 20)
+OPENSEARCH_INDEX_JOB_POLL_SECONDS = get_int("OPENSEARCH_INDEX_JOB_POLL_SECONDS", 5)
+OPENSEARCH_INDEX_JOB_STALL_TIMEOUT = get_int(
+    "OPENSEARCH_INDEX_JOB_STALL_TIMEOUT", 60 * 60
+)
+OPENSEARCH_SCROLL_PAGE_SIZE = get_int("OPENSEARCH_SCROLL_PAGE_SIZE", 1000)
+OPENSEARCH_SCROLL_SLICES = get_int("OPENSEARCH_SCROLL_SLICES", 1)
+OPENSEARCH_SCROLL_KEEP_ALIVE = get_string("OPENSEARCH_SCROLL_KEEP_ALIVE", "5m")
+OPENSEARCH_TASK_POLL_MAX_RETRIES = get_int("OPENSEARCH_TASK_POLL_MAX_RETRIES", 360)
+OPENSEARCH_RESPONSE_CACHE_ENABLED = get_bool("OPENSEARCH_RESPONSE_CACHE_ENABLED", False)
+OPENSEARCH_RESPONSE_CACHE_ALIAS = get_string("OPENSEARCH_RESPONSE_CACHE_ALIAS", "redis")
+OPENSEARCH_RESPONSE_CACHE_TIMEOUT = get_int(
+    "OPENSEARCH_RESPONSE_CACHE_TIMEOUT", 60 * 60
+)
+# Should be at least the refresh_interval of the indexes, so writes are searchable before caching resumes
+OPENSEARCH_RESPONSE_CACHE_REFRESH_DELAY = get_int(
+    "OPENSEARCH_RESPONSE_CACHE_REFRESH_DELAY", 60
+)
+OPENSEARCH_SINGLE_FLIGHT_ENABLED = get_bool("OPENSEARCH_SINGLE_FLIGHT_ENABLED", False)
+OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT = get_int(
+    "OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT", OPENSEARCH_DEFAULT_TIMEOUT
+)
+OPENSEARCH_SINGLE_FLIGHT_RESULT_MS = get_int("OPENSEARCH_SINGLE_FLIGHT_RESULT_MS", 1000)
+OPENSEARCH_SINGLE_FLIGHT_POLL_MS = get_int("OPENSEARCH_SINGLE_FLIGHT_POLL_MS", 20)
 INDEXING_API_USERNAME = get_string("INDEXING_API_USERNAME", None)
 if not INDEXING_API_USERNAME:
     raise ImproperlyConfigured("Missing setting INDEXING_API_USERNAME")
@@ -689,8 +761,20 @@ OPEN_DISCUSSIONS_RELATED_POST_COUNT = get_int("OPEN_DISCUSSIONS_RELATED_POST_COU
 OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = get_int(
     "OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT", 3
 )
+OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = get_bool(
+    "OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED", False
+)
 OPEN_RESOURCES_MIN_DOC_FREQ = get_int("OPEN_RESOURCES_MIN_DOC_FREQ", 1)
 OPEN_RESOURCES_MIN_TERM_FREQ = get_int("OPEN_RESOURCES_MIN_TERM_FREQ", 1)
+OPENSEARCH_LOCAL_SIMILARITY_ENABLED = get_bool(
+    "OPENSEARCH_LOCAL_SIMILARITY_ENABLED", False
+)
+OPENSEARCH_LOCAL_SIMILARITY_PATH = get_string(
+    "OPENSEARCH_LOCAL_SIMILARITY_PATH", "/tmp/search_similarity"
+)
+OPENSEARCH_LOCAL_SIMILARITY_FEATURES = get_int(
+    "OPENSEARCH_LOCAL_SIMILARITY_FEATURES", 2**18
+)
 
 # Only repair the first page worth of posts
 OPEN_DISCUSSIONS_HOT_POST_REPAIR_LIMIT = get_int(
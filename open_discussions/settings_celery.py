@@ -21,6 +21,40 @@ CELERY_BEAT_SCHEDULE = {
         ),  # default is every 2 hours
     },
 }
+CELERY_BEAT_SCHEDULE["delete-retired-search-indexes"] = {
+    "task": "search.tasks.delete_retired_indexes",
+    "schedule": get_int(
+        "OPENSEARCH_CUTOVER_RETENTION_SCHEDULE_SECONDS", 60 * 60
+    ),  # default is every hour
+}
+if get_bool("OPENSEARCH_INCREMENTAL_UPDATE_ENABLED", False):
+    CELERY_BEAT_SCHEDULE["update-search-index"] = {
+        "task": "search.tasks.start_incremental_update_index",
+        "schedule": get_int(
+            "OPENSEARCH_INCREMENTAL_UPDATE_SCHEDULE_SECONDS", 60 * 60
+        ),  # default is every hour
+    }
+if get_bool("OPENSEARCH_UPDATE_QUEUE_ENABLED", False):
+    CELERY_BEAT_SCHEDULE["flush-search-index-update-queue"] = {
+        "task": "search.tasks.flush_index_update_queue",
+        "schedule": get_int(
+            "OPENSEARCH_UPDATE_QUEUE_FLUSH_SECONDS", 30
+        ),  # default is every 30 seconds
+    }
+if get_bool("OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED", False):
+    CELERY_BEAT_SCHEDULE["update-similar-resources"] = {
+        "task": "search.tasks.start_update_similar_resources",
+        "schedule": get_int(
+            "OPENSEARCH_SIMILAR_RESOURCES_SCHEDULE_SECONDS", 60 * 60 * 24
+        ),  # default is every day
+    }
+if get_bool("OPENSEARCH_LOCAL_SIMILARITY_ENABLED", False):
+    CELERY_BEAT_SCHEDULE["rebuild-similarity-indexes"] = {
+        "task": "search.tasks.rebuild_similarity_indexes",
+        "schedule": get_int(
+            "OPENSEARCH_LOCAL_SIMILARITY_SCHEDULE_SECONDS", 60 * 60 * 24
+        ),  # default is every day
+    }
 
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
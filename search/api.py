@@ -3,17 +3,27 @@ from base64 import urlsafe_b64encode
 from collections import Counter, defaultdict
 from operator import itemgetter
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from nested_lookup import nested_lookup
-from opensearch_dsl import Q, Search
+from opensearch_dsl import MultiSearch, Q, Search
 from opensearch_dsl.query import MoreLikeThis
 
 from course_catalog.constants import PrivacyLevel
 from course_catalog.models import FavoriteItem
-from course_catalog.utils import get_list_items_by_resource
+from course_catalog.utils import get_list_items_by_resources
 from open_discussions import features
 from open_discussions.utils import extract_values
-from search.connection import get_default_alias_name
+from search.cache import (
+    async_cached_search_response,
+    cached_search_response,
+    is_response_cacheable,
+    lookup_cached_search_response,
+    make_response_cache_key,
+    store_search_response,
+)
+from search.connection import get_async_conn, get_default_alias_name
 from search.constants import (
     ALIAS_ALL_INDICES,
     COURSE_TYPE,
@@ -21,12 +31,28 @@ from search.constants import (
     PODCAST_EPISODE_TYPE,
     PODCAST_TYPE,
     RESOURCE_FILE_TYPE,
+    SIMILAR_RESOURCE_RELEVANT_FIELDS,
+    SIMILAR_TOPIC_RELEVANT_FIELDS,
     USER_LIST_TYPE,
     USER_PATH_TYPE,
     VALID_OBJECT_TYPES,
 )
+from search.cutover import record_query_sample
+from search.local_similarity import (
+    RESOURCES_CORPUS,
+    TOPICS_CORPUS,
+    get_local_similar_resources,
+    get_similarity_index,
+)
+from search.similar import (
+    get_precomputed_similar_resources,
+    get_similar_doc,
+    save_similar_resources,
+)
+from search.single_flight import async_single_flight, single_flight
 
-SIMILAR_RESOURCE_RELEVANT_FIELDS = ["title", "short_description"]
+# The fields of a learning resource which the frontend sends to find its similar resources
+SIMILAR_RESOURCE_VALUE_FIELDS = ["title", "short_description", "id", "object_type"]
 
 
 def gen_profile_id(profile_id):
@@ -213,14 +239,14 @@ def is_learning_query(query):
     return len(object_types.intersection(set(LEARNING_RESOURCE_TYPES))) > 0
 
 
-def relevant_indexes(query):
-    """Return True if the query includes learning resource types, False otherwise
+def relevant_object_types(query):
+    """Return the object types of the indexes that a query needs to search
 
     Args:
         query (dict): The query sent to opensearch
 
     Returns:
-        Array(string): array of index names
+        set of str: The object types, or an empty set if all indexes should be searched
 
     """
     object_types = set(extract_values(query, "object_type"))
@@ -230,45 +256,183 @@ def relevant_indexes(query):
 
     object_types = object_types.intersection(valid_index_types)
 
-    if not object_types:
-        return [get_default_alias_name(ALIAS_ALL_INDICES)]
-
     if RESOURCE_FILE_TYPE in object_types:
         object_types.add(COURSE_TYPE)
         object_types.remove(RESOURCE_FILE_TYPE)
 
+    return object_types
+
+
+def relevant_indexes(query):
+    """Return True if the query includes learning resource types, False otherwise
+
+    Args:
+        query (dict): The query sent to opensearch
+
+    Returns:
+        Array(string): array of index names
+
+    """
+    object_types = relevant_object_types(query)
+
+    if not object_types:
+        return [get_default_alias_name(ALIAS_ALL_INDICES)]
+
     return map(get_default_alias_name, object_types)
 
 
-def execute_search(*, user, query):
-    """Execute a search based on the query
+def _execute_cacheable_search(*, user, query, indexes, search, transform):
+    """Execute a search, sharing responses for identical anonymous searches through the response cache
+
+    Args:
+        user (User): The user executing the search
+        query (dict): The opensearch query constructed in the frontend
+        indexes (str): Comma separated list of the aliases being searched
+        search (opensearch_dsl.Search): Search object with all filters applied
+        transform (callable): Function which transforms the raw opensearch response dict
+
+    Returns:
+        dict: The transformed opensearch response dict
+
+    """
+
+    def _execute():
+        return transform(_execute_search(search))
+
+    object_types = relevant_object_types(query) or VALID_OBJECT_TYPES
+    record_query_sample(object_types, search)
+
+    if not is_response_cacheable(user):
+        return _execute()
+
+    return cached_search_response(
+        index=indexes,
+        body=search.to_dict(),
+        object_types=object_types,
+        execute=_execute,
+    )
+
+
+def _make_flight_key(search):
+    """Make the key used to coalesce concurrent executions of identical searches
+
+    Args:
+        search (opensearch_dsl.Search): Search object with all filters applied
+
+    Returns:
+        str: The key
+
+    """
+    # pylint: disable=protected-access
+    return make_response_cache_key(
+        ",".join(search._index or []),
+        {"body": search.to_dict(), "params": search._params},
+    )
+
+
+def _execute_search(search):
+    """Execute a search, sharing the response with identical searches running at the same time
+
+    Args:
+        search (opensearch_dsl.Search): Search object with all filters applied
+
+    Returns:
+        dict: The raw opensearch response dict
+
+    """
+    return single_flight(_make_flight_key(search), lambda: search.execute().to_dict())
+
+
+async def _async_execute_search(search):
+    """Execute a search with the async client, sharing the response like _execute_search
+
+    Args:
+        search (opensearch_dsl.Search): Search object with all filters applied
+
+    Returns:
+        dict: The raw opensearch response dict
+
+    """
+
+    async def _execute():
+        conn = await get_async_conn()
+        return await conn.search(
+            index=search._index,  # pylint: disable=protected-access
+            body=search.to_dict(),
+            **search._params,  # pylint: disable=protected-access
+        )
+
+    return await async_single_flight(_make_flight_key(search), _execute)
+
+
+async def _async_execute_cacheable_search(*, user, query, indexes, search, transform):
+    """Like _execute_cacheable_search, but executes the search with the async client
+
+    The transform runs in a thread, since it may look up the user's favorites and lists in the database.
+
+    Args:
+        user (User): The user executing the search
+        query (dict): The opensearch query constructed in the frontend
+        indexes (str): Comma separated list of the aliases being searched
+        search (opensearch_dsl.Search): Search object with all filters applied
+        transform (callable): Function which transforms the raw opensearch response dict
+
+    Returns:
+        dict: The transformed opensearch response dict
+
+    """
+
+    async def _execute():
+        return await sync_to_async(transform)(await _async_execute_search(search))
+
+    object_types = relevant_object_types(query) or VALID_OBJECT_TYPES
+    await sync_to_async(record_query_sample)(object_types, search)
+
+    if not is_response_cacheable(user):
+        return await _execute()
+
+    return await async_cached_search_response(
+        index=indexes,
+        body=search.to_dict(),
+        object_types=object_types,
+        execute=_execute,
+    )
+
+
+def _build_search(*, user, query):
+    """Build a search of posts, comments or profiles
 
     Args:
         user (User): The user executing the search. Used to determine filters to enforce permissions.
         query (dict): The opensearch query constructed in the frontend
 
     Returns:
-        dict: The opensearch response dict
+        dict: Keyword arguments for _execute_cacheable_search
 
     """
     indexes = ",".join(relevant_indexes(query))
     search = Search(index=indexes)
     search.update_from_dict(query)
     search = _apply_general_query_filters(search, user)
-    return _transform_search_results_suggest_with_compatability(
-        search.execute().to_dict()
-    )
+    return {
+        "user": user,
+        "query": query,
+        "indexes": indexes,
+        "search": search,
+        "transform": _transform_search_results_suggest_with_compatability,
+    }
 
 
-def execute_learn_search(*, user, query):
-    """Execute a learning resources search based on the query
+def _build_learn_search(*, user, query, decorate=True):
+    """Build a search of learning resources
 
     Args:
         user (User): The user executing the search. Used to determine filters to enforce permissions.
         query (dict): The opensearch query constructed in the frontend
+        decorate (bool): If False, the transform doesn't add the user's favorites and lists
 
     Returns:
-        dict: The opensearch response dict
+        dict: Keyword arguments for _execute_cacheable_search
 
     """
     indexes = ",".join(relevant_indexes(query))
@@ -276,7 +440,137 @@ def execute_learn_search(*, user, query):
     search.update_from_dict(query)
     department_filters = nested_lookup("department_name", query.get("post_filter", {}))
     search = _apply_learning_query_filters(search, user)
-    return transform_results(search.execute().to_dict(), user, department_filters)
+    return {
+        "user": user,
+        "query": query,
+        "indexes": indexes,
+        "search": search,
+        "transform": lambda result: transform_results(
+            result, user, department_filters, decorate=decorate
+        ),
+    }
+
+
+def execute_search(*, user, query):
+    """Execute a search based on the query
+
+    Args:
+        user (User): The user executing the search. Used to determine filters to enforce permissions.
+        query (dict): The opensearch query constructed in the frontend
+
+    Returns:
+        dict: The opensearch response dict
+
+    """
+    return _execute_cacheable_search(**_build_search(user=user, query=query))
+
+
+def execute_learn_search(*, user, query):
+    """Execute a learning resources search based on the query
+
+    Args:
+        user (User): The user executing the search. Used to determine filters to enforce permissions.
+        query (dict): The opensearch query constructed in the frontend
+
+    Returns:
+        dict: The opensearch response dict
+
+    """
+    return _execute_cacheable_search(**_build_learn_search(user=user, query=query))
+
+
+def execute_multi_search(*, user, queries):
+    """Execute several searches with a single msearch request
+
+    Each query is built, filtered and transformed as if it was sent to execute_search or
+    execute_learn_search, but the user's favorites and lists are looked up once for the
+    learning resources of every response.
+
+    Args:
+        user (User): The user executing the searches. Used to determine filters to enforce permissions.
+        queries (list of dict): The opensearch queries constructed in the frontend
+
+    Returns:
+        list of dict: The opensearch response dict of each query
+
+    """
+    responses = [None] * len(queries)
+    cacheable = is_response_cacheable(user)
+    multi_search = MultiSearch()
+    pending = []
+    for num, query in enumerate(queries):
+        is_learning = is_learning_query(query)
+        build = (
+            _build_learn_search(user=user, query=query, decorate=False)
+            if is_learning
+            else _build_search(user=user, query=query)
+        )
+        object_types = relevant_object_types(query) or VALID_OBJECT_TYPES
+        record_query_sample(object_types, build["search"])
+        lookup = None
+        if cacheable:
+            lookup = lookup_cached_search_response(
+                index=build["indexes"],
+                body=build["search"].to_dict(),
+                object_types=object_types,
+            )
+            if lookup.response is not None:
+                responses[num] = lookup.response
+                continue
+        multi_search = multi_search.add(build["search"])
+        pending.append((num, build["transform"], is_learning, lookup))
+
+    if not pending:
+        return responses
+
+    for (num, transform, _, _), response in zip(pending, multi_search.execute()):
+        responses[num] = transform(response.to_dict())
+    if not user.is_anonymous:
+        decorate_user_resources(
+            user,
+            [
+                hit["_source"]
+                for num, _, is_learning, _ in pending
+                if is_learning
+                for hit in responses[num].get("hits", {}).get("hits", [])
+            ],
+        )
+    for num, _, _, lookup in pending:
+        if lookup is not None:
+            store_search_response(lookup, responses[num])
+    return responses
+
+
+async def async_execute_search(*, user, query):
+    """Execute a search based on the query with the async client
+
+    Args:
+        user (User): The user executing the search. Used to determine filters to enforce permissions.
+        query (dict): The opensearch query constructed in the frontend
+
+    Returns:
+        dict: The opensearch response dict
+
+    """
+    return await _async_execute_cacheable_search(
+        **_build_search(user=user, query=query)
+    )
+
+
+async def async_execute_learn_search(*, user, query):
+    """Execute a learning resources search based on the query with the async client
+
+    Args:
+        user (User): The user executing the search. Used to determine filters to enforce permissions.
+        query (dict): The opensearch query constructed in the frontend
+
+    Returns:
+        dict: The opensearch response dict
+
+    """
+    return await _async_execute_cacheable_search(
+        **_build_learn_search(user=user, query=query)
+    )
 
 
 def _transform_search_results_suggest_with_compatability(search_result):
@@ -317,14 +611,64 @@ def _transform_search_results_suggest_with_compatability(search_result):
     return search_result
 
 
+def _get_user_resource_key(source):
+    """Get the (object_type, object_id) pair used to look up favorites and list items for a document
+
+    Args:
+        source (dict): The source of a learning resource document
+
+    Returns:
+        tuple(str, int): The content type model name and id of the resource
+
+    """
+    object_type = source["object_type"]
+    if object_type == USER_PATH_TYPE:
+        object_type = USER_LIST_TYPE
+    return object_type, source["id"]
+
+
+def decorate_user_resources(user, sources):
+    """Add 'is_favorite' and 'lists' fields to learning resource documents for a user.
+    Favorites and list items for all of the documents are fetched in bulk, so the number
+    of queries does not depend on the number of documents.
+
+    Args:
+        user (User): the user who performed the search
+        sources (list of dict): learning resource documents, which are modified in place
+
+    """
+    resource_sources = [
+        source for source in sources if source["object_type"] in LEARNING_RESOURCE_TYPES
+    ]
+    if not resource_sources:
+        return
+
+    resources = {_get_user_resource_key(source) for source in resource_sources}
+    favorites = set(
+        FavoriteItem.objects.filter(
+            user=user,
+            content_type__model__in={object_type for object_type, _ in resources},
+            object_id__in={object_id for _, object_id in resources},
+        ).values_list("content_type__model", "object_id")
+    )
+    list_items = get_list_items_by_resources(user, resources)
+
+    for source in resource_sources:
+        resource = _get_user_resource_key(source)
+        source["is_favorite"] = resource in favorites
+        source["lists"] = list_items[resource]
+
+
 # pylint: disable=too-many-branches, too-many-locals
-def transform_results(search_result, user, department_filters):
+def transform_results(search_result, user, department_filters, *, decorate=True):
     """Transform podcast and podcast episode, and userlist and learning path in aggregations
     Add 'is_favorite' and 'lists' fields to the '_source' attributes for learning resources.
 
     Args:
         search_result (dict): The results from OpenSearch
         user (User): the user who performed the search
+        department_filters (list(string)): list of filtered departments
+        decorate (bool): If False, don't add the 'is_favorite' and 'lists' fields
 
     Returns:
         dict: The OpenSearch response dict with transformed aggregates and source values
@@ -400,22 +744,11 @@ def transform_results(search_result, user, department_filters):
             key=lambda bucket: bucket["doc_count"], reverse=True
         )
 
-    if not user.is_anonymous:
-        favorites = (
-            FavoriteItem.objects.select_related("content_type")
-            .filter(user=user)
-            .values_list("content_type__model", "object_id")
+    if decorate and not user.is_anonymous:
+        decorate_user_resources(
+            user,
+            [hit["_source"] for hit in search_result.get("hits", {}).get("hits", [])],
         )
-        for hit in search_result.get("hits", {}).get("hits", []):
-            object_type = hit["_source"]["object_type"]
-            if object_type in LEARNING_RESOURCE_TYPES:
-                if object_type == USER_PATH_TYPE:
-                    object_type = USER_LIST_TYPE
-                object_id = hit["_source"]["id"]
-                hit["_source"]["is_favorite"] = (object_type, object_id) in favorites
-                hit["_source"]["lists"] = get_list_items_by_resource(
-                    user, object_type, object_id
-                )
 
     search_result = _transform_search_results_suggest_with_compatability(search_result)
 
@@ -465,8 +798,8 @@ def _transform_search_results_coursenum(search_result, department_filters):
                 ]
 
 
-def find_similar_resources(*, user, value_doc):
-    """Execute a "more like this" query to find learning resources that are similar to the one provided.
+def _build_similar_resources_search(user, value_doc):
+    """Build a "more like this" query for learning resources that are similar to the one provided
 
     Args:
         user (User): The user executing the search
@@ -474,14 +807,14 @@ def find_similar_resources(*, user, value_doc):
             a document representing the data fields we want to search with
 
     Returns:
-        dict: The OpenSearch response dict
+        opensearch_dsl.Search: The search
 
     """
     index = get_default_alias_name(ALIAS_ALL_INDICES)
     search = Search(index=index)
     search = _apply_general_query_filters(search, user)
     search = search.filter(Q("terms", object_type=LEARNING_RESOURCE_TYPES))
-    search = search.query(
+    return search.query(
         MoreLikeThis(
             like={"doc": value_doc, "fields": list(value_doc.keys())},
             fields=SIMILAR_RESOURCE_RELEVANT_FIELDS,
@@ -489,41 +822,208 @@ def find_similar_resources(*, user, value_doc):
             min_doc_freq=settings.OPEN_RESOURCES_MIN_DOC_FREQ,
         )
     )
-    response = search.execute()
 
-    if not user.is_anonymous:
-        favorites = (
-            FavoriteItem.objects.select_related("content_type")
-            .filter(user=user)
-            .values_list("content_type__model", "object_id")
+
+def _filter_similar_hits(hits, value_doc):
+    """Drop the resource the similar ones were found for, and any beyond the number to show
+
+    Args:
+        hits (list of dict): The hits of the similar resources search
+        value_doc (dict):
+            a document representing the data fields we searched with
+
+    Returns:
+        list of dict: The hits of the similar resources
+
+    """
+    return [
+        hit
+        for hit in hits
+        if hit["_source"].get("id", False)
+        and (
+            hit["_source"]["id"] != value_doc.get("id", None)
+            or hit["_source"]["object_type"] != value_doc.get("object_type", None)
         )
+    ][0 : settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT]
 
-    objects = []
 
-    for hit in response.hits:
-        if getattr(hit, "id", False) and (
-            hit["id"] != value_doc.get("id", None)
-            or hit["object_type"] != value_doc.get("object_type", None)
-        ):
-            if user.is_anonymous:
-                hit["is_favorite"] = False
-                hit["lists"] = []
-            else:
-                object_type = hit["object_type"]
-                if object_type in LEARNING_RESOURCE_TYPES:
-                    if object_type == USER_PATH_TYPE:
-                        object_type = USER_LIST_TYPE
-                    object_id = hit["id"]
-                    hit["is_favorite"] = (object_type, object_id) in favorites
-                    hit["lists"] = get_list_items_by_resource(
-                        user, object_type, object_id
-                    )
-            objects.append(hit.to_dict())
-    return objects[0 : settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT]
+def _decorate_similar_resources(sources, user):
+    """Add the 'is_favorite' and 'lists' fields of the user to similar resources
 
+    Args:
+        sources (list of dict): The sources of the similar resources
+        user (User): The user executing the search
 
-def get_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq):
-    """Get a list of similar topics based on text values
+    Returns:
+        list of dict: The similar resources
+
+    """
+    if user.is_anonymous:
+        for source in sources:
+            source["is_favorite"] = False
+            source["lists"] = []
+    else:
+        decorate_user_resources(user, sources)
+
+    return sources
+
+
+def _lookup_similar_resources(value_doc):
+    """Get the similar resources of a learning resource without a "more like this" query
+
+    Args:
+        value_doc (dict):
+            a document representing the data fields we want to search with
+
+    Returns:
+        list of dict:
+            The sources of the similar resources, or None if they were neither computed ahead of
+            time nor can be found with the local similarity matrix
+    """
+    sources = get_precomputed_similar_resources(value_doc)
+    if sources is None:
+        sources = get_local_similar_resources(value_doc)
+    return sources
+
+
+def query_similar_resources(user, value_doc):
+    """Execute a "more like this" query to find learning resources that are similar to the one provided
+
+    Args:
+        user (User): The user executing the search
+        value_doc (dict):
+            a document representing the data fields we want to search with
+
+    Returns:
+        list of dict: The sources of the similar resources
+
+    """
+    response = _execute_search(_build_similar_resources_search(user, value_doc))
+    return [
+        hit["_source"]
+        for hit in _filter_similar_hits(response["hits"]["hits"], value_doc)
+    ]
+
+
+def find_similar_resources(*, user, value_doc):
+    """Find learning resources that are similar to the one provided.
+
+    If the similar resources were computed ahead of time by compute_similar_resources they are
+    looked up, otherwise they are found with the local similarity matrix if it is built, or a
+    "more like this" query.
+
+    Args:
+        user (User): The user executing the search
+        value_doc (dict):
+            a document representing the data fields we want to search with
+
+    Returns:
+        dict: The OpenSearch response dict
+
+    """
+    sources = _lookup_similar_resources(value_doc)
+    if sources is None:
+        sources = query_similar_resources(user, value_doc)
+    return _decorate_similar_resources(sources, user)
+
+
+async def async_find_similar_resources(*, user, value_doc):
+    """Find similar learning resources like find_similar_resources, with the async client
+
+    Args:
+        user (User): The user executing the search
+        value_doc (dict):
+            a document representing the data fields we want to search with
+
+    Returns:
+        dict: The OpenSearch response dict
+
+    """
+    sources = await sync_to_async(_lookup_similar_resources, thread_sensitive=False)(
+        value_doc
+    )
+    if sources is None:
+        response = await _async_execute_search(
+            _build_similar_resources_search(user, value_doc)
+        )
+        sources = [
+            hit["_source"]
+            for hit in _filter_similar_hits(response["hits"]["hits"], value_doc)
+        ]
+    return await sync_to_async(_decorate_similar_resources)(sources, user)
+
+
+def compute_similar_resources(object_type, ids):
+    """Find and store the similar resources of some learning resources
+
+    The resources are searched with the same fields as the similar resources view sends, so
+    find_similar_resources returns what its "more like this" query would have. They are found
+    with the local similarity matrix if it is built, otherwise with one msearch request.
+
+    Args:
+        object_type (str): The object type of the learning resources
+        ids (list of int): The ids of the learning resources
+
+    Returns:
+        int: The number of learning resources whose similar resources were stored
+
+    """
+    search = (
+        Search(index=get_default_alias_name(object_type))
+        .filter(Q("terms", id=ids))
+        .filter(Q("term", object_type=object_type))
+        .source(SIMILAR_RESOURCE_VALUE_FIELDS)
+        .extra(size=len(ids))
+    )
+    value_docs = [
+        {field: hit["_source"].get(field) for field in SIMILAR_RESOURCE_VALUE_FIELDS}
+        for hit in search.execute().to_dict()["hits"]["hits"]
+    ]
+    if not value_docs:
+        return 0
+
+    index = get_similarity_index(RESOURCES_CORPUS)
+    if index is not None:
+        similar_rows = index.similar_resources(
+            value_docs,
+            settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT,
+            min_term_freq=settings.OPEN_RESOURCES_MIN_TERM_FREQ,
+            min_doc_freq=settings.OPEN_RESOURCES_MIN_DOC_FREQ,
+        )
+        save_similar_resources(
+            {
+                (object_type, value_doc["id"]): [
+                    get_similar_doc(row["object_type"], row["doc_id"], row["routing"])
+                    for row in rows
+                ]
+                for value_doc, rows in zip(value_docs, similar_rows)
+            }
+        )
+        return len(value_docs)
+
+    multi_search = MultiSearch()
+    for value_doc in value_docs:
+        multi_search = multi_search.add(
+            _build_similar_resources_search(AnonymousUser(), value_doc)
+        )
+    save_similar_resources(
+        {
+            (object_type, value_doc["id"]): [
+                get_similar_doc(
+                    hit["_source"]["object_type"], hit["_id"], hit.get("_routing")
+                )
+                for hit in _filter_similar_hits(
+                    response.to_dict()["hits"]["hits"], value_doc
+                )
+            ]
+            for value_doc, response in zip(value_docs, multi_search.execute())
+        }
+    )
+    return len(value_docs)
+
+
+def query_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq):
+    """Get a list of similar topics based on text values, with a "more like this" query
 
     Args:
         value_doc (dict):
@@ -546,7 +1046,7 @@ def get_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq):
     search = search.query(
         MoreLikeThis(
             like=[{"doc": value_doc, "fields": list(value_doc.keys())}],
-            fields=["course_id", "title", "short_description", "full_description"],
+            fields=SIMILAR_TOPIC_RELEVANT_FIELDS,
             min_term_freq=min_term_freq,
             min_doc_freq=min_doc_freq,
         )
@@ -560,3 +1060,61 @@ def get_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq):
     counter = Counter(topics)
 
     return list(dict(counter.most_common(num_topics)).keys())
+
+
+def get_many_similar_topics(value_docs, num_topics, min_term_freq, min_doc_freq):
+    """Get lists of similar topics for some documents
+
+    The topics are voted for with the local similarity matrix in one batch if it is built,
+    otherwise with a "more like this" query for each document.
+
+    Args:
+        value_docs (list of dict):
+            documents representing the data fields we want to search with
+        num_topics (int):
+            number of topics to return for each document
+        min_term_freq (int):
+            minimum times a term needs to show up in input
+        min_doc_freq (int):
+            minimum times a term needs to show up in docs
+
+    Returns:
+        list of list of str:
+            list of topic values for each document
+
+    """
+    index = get_similarity_index(TOPICS_CORPUS)
+    if index is not None:
+        return index.similar_topics(
+            value_docs,
+            num_topics,
+            min_term_freq=min_term_freq,
+            min_doc_freq=min_doc_freq,
+        )
+    return [
+        query_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq)
+        for value_doc in value_docs
+    ]
+
+
+def get_similar_topics(value_doc, num_topics, min_term_freq, min_doc_freq):
+    """Get a list of similar topics based on text values
+
+    Args:
+        value_doc (dict):
+            a document representing the data fields we want to search with
+        num_topics (int):
+            number of topics to return
+        min_term_freq (int):
+            minimum times a term needs to show up in input
+        min_doc_freq (int):
+            minimum times a term needs to show up in docs
+
+    Returns:
+        list of str:
+            list of topic values
+
+    """
+    return get_many_similar_topics(
+        [value_doc], num_topics, min_term_freq, min_doc_freq
+    )[0]
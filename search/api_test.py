@@ -2,8 +2,10 @@
 """Search API function tests"""
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 
 from course_catalog.constants import PlatformType, PrivacyLevel
 from course_catalog.factories import (
@@ -20,21 +22,31 @@ from open_discussions.factories import UserFactory
 from open_discussions.utils import extract_values
 from search.api import (
     SIMILAR_RESOURCE_RELEVANT_FIELDS,
+    async_execute_learn_search,
+    async_execute_search,
+    async_find_similar_resources,
+    compute_similar_resources,
     execute_learn_search,
+    execute_multi_search,
     execute_search,
     find_similar_resources,
     gen_video_id,
+    get_many_similar_topics,
     get_similar_topics,
     transform_results,
 )
+from search import api as search_api
+from search.cache import bump_index_generation
 from search.connection import get_default_alias_name
 from search.constants import (
     ALIAS_ALL_INDICES,
     COURSE_TYPE,
     PODCAST_EPISODE_TYPE,
     PODCAST_TYPE,
+    RESOURCE_FILE_TYPE,
     USER_LIST_TYPE,
     USER_PATH_TYPE,
+    VIDEO_TYPE,
 )
 from search.serializers import (
     OSContentFileSerializer,
@@ -304,6 +316,114 @@ def test_execute_learn_search_anonymous(settings, opensearch, list_search_enable
     )
 
 
+@pytest.mark.parametrize("is_anonymous", [True, False])
+def test_execute_learn_search_cached(settings, user, opensearch, is_anonymous):
+    """execute_learn_search should only reuse cached responses for anonymous users"""
+    settings.OPENSEARCH_RESPONSE_CACHE_ENABLED = True
+    settings.OPENSEARCH_RESPONSE_CACHE_ALIAS = "default"
+    caches["default"].clear()
+    opensearch.conn.search.return_value = {
+        "hits": {"hits": [], "total": {"value": 0, "relation": "eq"}}
+    }
+    search_user = AnonymousUser() if is_anonymous else user
+    query = {"query": {"term": {"object_type": COURSE_TYPE}}}
+
+    for _ in range(2):
+        execute_learn_search(user=search_user, query=query)
+    assert opensearch.conn.search.call_count == (1 if is_anonymous else 2)
+
+    bump_index_generation([COURSE_TYPE])
+    execute_learn_search(user=search_user, query=query)
+    assert opensearch.conn.search.call_count == (2 if is_anonymous else 3)
+    caches["default"].clear()
+
+
+@pytest.mark.django_db
+def test_execute_multi_search(mocker, user, opensearch):
+    """execute_multi_search should send every query in one msearch and decorate the results once"""
+    courses = CourseFactory.create_batch(2)
+    FavoriteItem.objects.create(
+        user=user,
+        content_type=ContentType.objects.get(model=COURSE_TYPE),
+        object_id=courses[1].id,
+    )
+    decorate_spy = mocker.spy(search_api, "decorate_user_resources")
+    learn_query = {"query": {"term": {"object_type": COURSE_TYPE}}}
+    queries = [learn_query, {"a": "query"}, learn_query]
+    course_responses = [
+        {
+            "hits": {
+                "total": {"value": 1, "relation": "eq"},
+                "hits": [{"_source": OSCourseSerializer(course).data}],
+            }
+        }
+        for course in courses
+    ]
+    empty_response = {"hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}}
+    opensearch.conn.msearch.return_value = {
+        "responses": [course_responses[0], empty_response, course_responses[1]]
+    }
+
+    responses = execute_multi_search(user=user, queries=queries)
+    opensearch.conn.msearch.assert_called_once()
+    body = opensearch.conn.msearch.call_args[1]["body"]
+    assert len(body) == 6
+    assert body[1]["query"]["bool"]["filter"]
+    assert [
+        [hit["_source"]["is_favorite"] for hit in response["hits"]["hits"]]
+        for response in responses
+    ] == [[False], [], [True]]
+    assert responses[1] == {"hits": {"total": 0, "hits": []}, "suggest": []}
+    decorate_spy.assert_called_once()
+    assert len(decorate_spy.call_args[0][1]) == 2
+
+
+def test_execute_multi_search_cached(settings, opensearch):
+    """execute_multi_search should only send the queries whose responses aren't cached"""
+    settings.OPENSEARCH_RESPONSE_CACHE_ENABLED = True
+    settings.OPENSEARCH_RESPONSE_CACHE_ALIAS = "default"
+    caches["default"].clear()
+    empty_response = {"hits": {"hits": [], "total": {"value": 0, "relation": "eq"}}}
+    opensearch.conn.search.return_value = empty_response
+    opensearch.conn.msearch.return_value = {"responses": [empty_response]}
+    cached_query = {"query": {"term": {"object_type": COURSE_TYPE}}}
+    other_query = {"query": {"term": {"object_type": VIDEO_TYPE}}}
+    cached_response = execute_learn_search(user=AnonymousUser(), query=cached_query)
+
+    responses = execute_multi_search(
+        user=AnonymousUser(), queries=[cached_query, other_query]
+    )
+    assert responses[0] == cached_response
+    assert len(opensearch.conn.msearch.call_args[1]["body"]) == 2
+
+    assert (
+        execute_multi_search(user=AnonymousUser(), queries=[cached_query, other_query])
+        == responses
+    )
+    assert opensearch.conn.msearch.call_count == 1
+    caches["default"].clear()
+
+
+def test_execute_search_single_flight(mocker, settings, user, opensearch):
+    """Identical searches running at the same time should share one OpenSearch request"""
+    settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED = True
+    shared = {}
+    mocker.patch(
+        "search.api.single_flight",
+        side_effect=lambda key, execute: shared[key]
+        if key in shared
+        else shared.setdefault(key, execute()),
+    )
+    opensearch.conn.search.return_value = {"hits": {"total": 10}}
+    query = {"query": {"match": {"title": "engineering"}}}
+
+    execute_search(user=user, query=query)
+    execute_search(user=AnonymousUser(), query=query)
+    execute_search(user=user, query={"query": {"match": {"title": "math"}}})
+    assert opensearch.conn.search.call_count == 2
+    assert len(shared) == 2
+
+
 def test_execute_learn_search_podcasts(settings, user, opensearch):
     """execute_learn_search should execute an OpenSearch search"""
     settings.FEATURES[features.PODCAST_SEARCH] = False
@@ -404,6 +524,84 @@ def test_find_similar_resources(settings, is_anonymous, opensearch, user):
     ]
 
 
+@pytest.fixture
+def async_conn(mocker):
+    """Mock the async OpenSearch client"""
+    conn = mocker.Mock(search=mocker.AsyncMock())
+    mocker.patch("search.api.get_async_conn", return_value=conn)
+    return conn
+
+
+def test_async_execute_search(opensearch, async_conn):
+    """async_execute_search should execute the same search as execute_search with the async client"""
+    query = {"a": "query"}
+    opensearch.conn.search.return_value = async_conn.search.return_value = {
+        "hits": {"total": {"value": 3, "relation": "eq"}},
+        "suggest": RAW_SUGGESTIONS,
+    }
+
+    assert async_to_sync(async_execute_search)(
+        user=AnonymousUser(), query=query
+    ) == execute_search(user=AnonymousUser(), query=query)
+    assert async_conn.search.call_args == opensearch.conn.search.call_args
+
+
+@pytest.mark.django_db
+def test_async_execute_learn_search(user, opensearch, async_conn):
+    """async_execute_learn_search should decorate the results for the user like execute_learn_search"""
+    course = CourseFactory.create()
+    FavoriteItem.objects.create(
+        user=user,
+        content_type=ContentType.objects.get(model=COURSE_TYPE),
+        object_id=course.id,
+    )
+    query = {"query": {"match": {"object_type": COURSE_TYPE}}}
+    async_conn.search.return_value = {
+        "hits": {
+            "total": {"value": 1, "relation": "eq"},
+            "hits": [{"_source": OSCourseSerializer(course).data}],
+        }
+    }
+    opensearch.conn.search.return_value = async_conn.search.return_value
+
+    response = async_to_sync(async_execute_learn_search)(user=user, query=query)
+    assert response["hits"]["hits"][0]["_source"]["is_favorite"] is True
+    assert response == execute_learn_search(user=user, query=query)
+    assert async_conn.search.call_args == opensearch.conn.search.call_args
+
+
+@pytest.mark.django_db
+def test_async_find_similar_resources(settings, user, opensearch, async_conn):
+    """async_find_similar_resources should return the same resources as find_similar_resources"""
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 2
+    course, favorited_course, other_course = CourseFactory.create_batch(3)
+    FavoriteItem.objects.create(
+        user=user,
+        content_type=ContentType.objects.get(model=COURSE_TYPE),
+        object_id=favorited_course.id,
+    )
+    value_doc = {"title": course.title, "id": course.id, "object_type": COURSE_TYPE}
+    opensearch.conn.search.return_value = async_conn.search.return_value = {
+        "hits": {
+            "hits": [
+                {"_source": OSCourseSerializer(resource).data}
+                for resource in (course, favorited_course, other_course)
+            ]
+        }
+    }
+
+    similar_resources = async_to_sync(async_find_similar_resources)(
+        user=user, value_doc=value_doc
+    )
+    assert [resource["id"] for resource in similar_resources] == [
+        favorited_course.id,
+        other_course.id,
+    ]
+    assert [resource["is_favorite"] for resource in similar_resources] == [True, False]
+    assert similar_resources == find_similar_resources(user=user, value_doc=value_doc)
+    assert async_conn.search.call_args == opensearch.conn.search.call_args
+
+
 @pytest.mark.parametrize("max_suggestions", [1, 3])
 @pytest.mark.parametrize("suggest_min_hits", [2, 4])
 @pytest.mark.parametrize("is_anonymous", [True, False])
@@ -544,6 +742,42 @@ def test_transform_results(
     )
 
 
+@pytest.mark.parametrize("num_courses", [1, 10])
+@pytest.mark.django_db
+def test_transform_results_user_queries(user, num_courses, django_assert_num_queries):
+    """transform_results should look up favorites and list items for all hits at once"""
+    courses = CourseFactory.create_batch(num_courses)
+    user_list = UserListFactory.create(author=user)
+    for course in courses:
+        FavoriteItem.objects.create(
+            user=user,
+            content_type=ContentType.objects.get(model=COURSE_TYPE),
+            object_id=course.id,
+        )
+        UserListItemFactory.create(
+            user_list=user_list,
+            content_type=ContentType.objects.get(model=COURSE_TYPE),
+            object_id=course.id,
+        )
+    results = {
+        "hits": {
+            "hits": [
+                {"_source": OSCourseSerializer(course).data} for course in courses
+            ],
+            "total": {"value": num_courses, "relation": "eq"},
+        }
+    }
+
+    with django_assert_num_queries(2):
+        transformed = transform_results(results, user, [])
+
+    for hit in transformed["hits"]["hits"]:
+        assert hit["_source"]["is_favorite"] is True
+        assert [item["object_id"] for item in hit["_source"]["lists"]] == [
+            hit["_source"]["id"]
+        ]
+
+
 @pytest.mark.parametrize("department_fitler", [["Chemistry", "Biology"], [], ["Math"]])
 @pytest.mark.django_db
 def test_transform_department_filter(department_fitler):
@@ -842,3 +1076,202 @@ def test_get_similar_topics(settings, opensearch):
         },
         index=[f"{settings.OPENSEARCH_INDEX}_all_default"],
     )
+
+
+def test_compute_similar_resources(mocker, settings, opensearch):
+    """compute_similar_resources should store the similar resources of each resource found,
+    with the object type of their index and their routing"""
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 3
+    mock_save = mocker.patch("search.api.save_similar_resources")
+    opensearch.conn.search.return_value = {
+        "hits": {
+            "hits": [
+                {"_id": "course_1", "_source": {"id": 1, "object_type": COURSE_TYPE}},
+                {"_id": "course_2", "_source": {"id": 2, "object_type": COURSE_TYPE}},
+            ]
+        }
+    }
+    opensearch.conn.msearch.return_value = {
+        "responses": [
+            {
+                "hits": {
+                    "hits": [
+                        {
+                            "_id": "course_1",
+                            "_source": {"id": 1, "object_type": COURSE_TYPE},
+                        },
+                        {
+                            "_id": "video_5",
+                            "_source": {"id": 5, "object_type": VIDEO_TYPE},
+                        },
+                        {
+                            "_id": "user_list_6",
+                            "_source": {"id": 6, "object_type": USER_PATH_TYPE},
+                        },
+                        {
+                            "_id": "cf_7",
+                            "_routing": "course_2",
+                            "_source": {"id": 7, "object_type": RESOURCE_FILE_TYPE},
+                        },
+                    ]
+                }
+            },
+            {"hits": {"hits": []}},
+        ]
+    }
+
+    assert compute_similar_resources(COURSE_TYPE, [1, 2, 3]) == 2
+    mock_save.assert_called_once_with(
+        {
+            (COURSE_TYPE, 1): [
+                (VIDEO_TYPE, "video_5", None),
+                (USER_LIST_TYPE, "user_list_6", None),
+                (COURSE_TYPE, "cf_7", "course_2"),
+            ],
+            (COURSE_TYPE, 2): [],
+        }
+    )
+    search_body = opensearch.conn.search.call_args[1]["body"]
+    assert search_body["size"] == 3
+    assert search_body["_source"] == ["title", "short_description", "id", "object_type"]
+    msearch_body = opensearch.conn.msearch.call_args[1]["body"]
+    assert len(msearch_body) == 4
+    assert extract_values(msearch_body[1], "more_like_this")[0]["like"]["doc"] == {
+        "title": None,
+        "short_description": None,
+        "id": 1,
+        "object_type": COURSE_TYPE,
+    }
+
+
+def test_compute_similar_resources_none_found(mocker, opensearch):
+    """compute_similar_resources shouldn't send an msearch if none of the resources are indexed"""
+    mock_save = mocker.patch("search.api.save_similar_resources")
+    opensearch.conn.search.return_value = {"hits": {"hits": []}}
+    assert compute_similar_resources(COURSE_TYPE, [1]) == 0
+    opensearch.conn.msearch.assert_not_called()
+    mock_save.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_find_similar_resources_precomputed(mocker, settings, user, opensearch):
+    """find_similar_resources should use the precomputed similar resources instead of searching"""
+    course = CourseFactory.create()
+    FavoriteItem.objects.create(
+        user=user,
+        content_type=ContentType.objects.get(model=COURSE_TYPE),
+        object_id=course.id,
+    )
+    mock_get_precomputed = mocker.patch(
+        "search.api.get_precomputed_similar_resources",
+        return_value=[OSCourseSerializer(course).data],
+    )
+    value_doc = {"id": 1, "object_type": COURSE_TYPE}
+
+    similar_resources = find_similar_resources(user=user, value_doc=value_doc)
+    assert [resource["id"] for resource in similar_resources] == [course.id]
+    assert similar_resources[0]["is_favorite"] is True
+    assert (
+        async_to_sync(async_find_similar_resources)(user=user, value_doc=value_doc)
+        == similar_resources
+    )
+    mock_get_precomputed.assert_called_with(value_doc)
+    opensearch.conn.search.assert_not_called()
+
+
+def test_get_many_similar_topics_local(mocker, opensearch):
+    """get_many_similar_topics should vote for topics with the local similarity matrix if it is built"""
+    mock_index = mocker.Mock()
+    mock_index.similar_topics.return_value = [["topic a"], ["topic b"]]
+    mock_get_index = mocker.patch(
+        "search.api.get_similarity_index", return_value=mock_index
+    )
+    value_docs = [{"title": "title a"}, {"title": "title b"}]
+
+    assert get_many_similar_topics(value_docs, 3, 1, 15) == [["topic a"], ["topic b"]]
+    mock_index.similar_topics.assert_called_once_with(
+        value_docs, 3, min_term_freq=1, min_doc_freq=15
+    )
+    assert mock_get_index.call_args[0][0].name == "topics"
+    opensearch.conn.search.assert_not_called()
+
+
+def test_get_many_similar_topics_fallback(opensearch):
+    """get_many_similar_topics should send a query for each document without the local matrix"""
+    opensearch.conn.search.return_value = {
+        "hits": {"hits": [{"_source": {"topics": ["topic a"]}}]}
+    }
+    assert get_many_similar_topics([{"title": "a"}, {"title": "b"}], 3, 1, 1) == [
+        ["topic a"],
+        ["topic a"],
+    ]
+    assert opensearch.conn.search.call_count == 2
+
+
+@pytest.mark.django_db
+def test_find_similar_resources_local(mocker, opensearch):
+    """find_similar_resources should use the local similarity matrix if nothing was precomputed"""
+    mocker.patch("search.api.get_precomputed_similar_resources", return_value=None)
+    course = CourseFactory.create()
+    mock_get_local = mocker.patch(
+        "search.api.get_local_similar_resources",
+        return_value=[OSCourseSerializer(course).data],
+    )
+    value_doc = {"id": 1, "object_type": COURSE_TYPE, "title": "title"}
+
+    similar_resources = find_similar_resources(
+        user=AnonymousUser(), value_doc=value_doc
+    )
+    assert [resource["id"] for resource in similar_resources] == [course.id]
+    assert similar_resources[0]["is_favorite"] is False
+    mock_get_local.assert_called_once_with(value_doc)
+    opensearch.conn.search.assert_not_called()
+
+
+def test_compute_similar_resources_local(mocker, settings, opensearch):
+    """compute_similar_resources should use the local similarity matrix instead of an msearch"""
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 2
+    mock_save = mocker.patch("search.api.save_similar_resources")
+    mock_index = mocker.patch("search.api.get_similarity_index").return_value
+    mock_index.similar_resources.return_value = [
+        [
+            {"object_type": VIDEO_TYPE, "doc_id": "video_5", "routing": None, "id": 5},
+            {
+                "object_type": USER_PATH_TYPE,
+                "doc_id": "user_list_6",
+                "routing": None,
+                "id": 6,
+            },
+        ]
+    ]
+    opensearch.conn.search.return_value = {
+        "hits": {
+            "hits": [
+                {"_id": "course_1", "_source": {"id": 1, "object_type": COURSE_TYPE}}
+            ]
+        }
+    }
+
+    assert compute_similar_resources(COURSE_TYPE, [1]) == 1
+    mock_save.assert_called_once_with(
+        {
+            (COURSE_TYPE, 1): [
+                (VIDEO_TYPE, "video_5", None),
+                (USER_LIST_TYPE, "user_list_6", None),
+            ]
+        }
+    )
+    mock_index.similar_resources.assert_called_once_with(
+        [
+            {
+                "title": None,
+                "short_description": None,
+                "id": 1,
+                "object_type": COURSE_TYPE,
+            }
+        ],
+        2,
+        min_term_freq=settings.OPEN_RESOURCES_MIN_TERM_FREQ,
+        min_doc_freq=settings.OPEN_RESOURCES_MIN_DOC_FREQ,
+    )
+    opensearch.conn.msearch.assert_not_called()
@@ -9,6 +9,7 @@ class SearchAppConfig(AppConfig):
 
     def ready(self):
         """Application is ready"""
-        from search import connection
+        from search import connection, signals
 
         connection.configure_connections()
+        signals.connect_signals()
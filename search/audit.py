@@ -0,0 +1,448 @@
+"""Consistency audit of OpenSearch indexes against the database"""
+import hashlib
+import logging
+from collections import namedtuple
+
+import rapidjson
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models.functions import Collate
+
+from course_catalog.constants import RESOURCE_FILE_PLATFORMS, PrivacyLevel
+from course_catalog.models import (
+    ContentFile,
+    Course,
+    Podcast,
+    PodcastEpisode,
+    Program,
+    StaffList,
+    UserList,
+    Video,
+)
+from course_catalog.utils import load_course_blocklist
+from profiles.models import Profile
+from search import indexing_api as api
+from search.api import (
+    gen_content_file_id,
+    gen_course_id,
+    gen_podcast_episode_id,
+    gen_podcast_id,
+    gen_profile_id,
+    gen_program_id,
+    gen_staff_list_id,
+    gen_user_list_id,
+    gen_video_id,
+)
+from search.bulk import encode_json
+from search.connection import get_default_alias_name
+from search.constants import (
+    COURSE_TYPE,
+    PODCAST_EPISODE_TYPE,
+    PODCAST_TYPE,
+    PROFILE_TYPE,
+    PROGRAM_TYPE,
+    RESOURCE_FILE_TYPE,
+    STAFF_LIST_TYPE,
+    USER_LIST_TYPE,
+    VIDEO_TYPE,
+)
+from search.fingerprints import invalidate_fingerprints
+from search.serializers import (
+    serialize_bulk_content_files,
+    serialize_bulk_courses,
+    serialize_bulk_podcast_episodes,
+    serialize_bulk_podcasts,
+    serialize_bulk_profiles,
+    serialize_bulk_programs,
+    serialize_bulk_staff_lists,
+    serialize_bulk_user_lists,
+    serialize_bulk_videos,
+)
+
+log = logging.getLogger(__name__)
+
+MISSING = "missing"
+ORPHANED = "orphaned"
+STALE = "stale"
+
+# Keys of a serialized document which aren't part of the indexed source
+DOCUMENT_META_KEYS = ("_id", "_routing", "_op_type")
+
+# How to compare the documents of one type in an index with the database.
+#   queryset: indexable objects annotated with an audit_key, ordered by it
+#   index_key: the document field holding the same value as audit_key
+#   gen_doc_id: function from an object of the queryset to its document id
+#   serialize: function from database ids to serialized documents
+#   index: function indexing objects by database id
+AuditTarget = namedtuple(
+    "AuditTarget",
+    [
+        "object_type",
+        "doc_type",
+        "queryset",
+        "index_key",
+        "query",
+        "gen_doc_id",
+        "serialize",
+        "index",
+    ],
+)
+AuditResult = namedtuple(
+    "AuditResult",
+    ["object_type", "doc_type", "checked", MISSING, ORPHANED, STALE],
+)
+
+
+def _by_id(queryset, *columns):
+    """Order a queryset by id, loading only some columns"""
+    return (
+        queryset.annotate(audit_key=F("id")).only("id", *columns).order_by("audit_key")
+    )
+
+
+def get_audit_targets(object_types):
+    """Get what to compare for each object type
+
+    Args:
+        object_types (list of str): The object types to audit
+
+    Returns:
+        list of AuditTarget: The document types to compare
+
+    """
+    targets = []
+    if PROFILE_TYPE in object_types:
+        targets.append(
+            AuditTarget(
+                object_type=PROFILE_TYPE,
+                doc_type=PROFILE_TYPE,
+                # The "C" collation sorts by bytes, like keyword fields in OpenSearch
+                queryset=Profile.objects.filter(user__is_active=True)
+                .exclude(user__username=settings.INDEXING_API_USERNAME)
+                .annotate(audit_key=Collate("user__username", "C"))
+                .only("id")
+                .order_by("audit_key"),
+                index_key="author_id",
+                query={"match_all": {}},
+                gen_doc_id=lambda profile: gen_profile_id(profile.audit_key),
+                serialize=serialize_bulk_profiles,
+                index=api.index_profiles,
+            )
+        )
+    if COURSE_TYPE in object_types:
+        courses = Course.objects.filter(published=True).exclude(
+            course_id__in=load_course_blocklist()
+        )
+        targets.append(
+            AuditTarget(
+                object_type=COURSE_TYPE,
+                doc_type=COURSE_TYPE,
+                queryset=_by_id(courses, "platform", "course_id"),
+                index_key="id",
+                query={"term": {"object_type": COURSE_TYPE}},
+                gen_doc_id=lambda course: gen_course_id(
+                    course.platform, course.course_id
+                ),
+                serialize=serialize_bulk_courses,
+                index=api.index_courses,
+            )
+        )
+        content_files = ContentFile.objects.filter(
+            published=True,
+            run__published=True,
+            run__content_type=ContentType.objects.get_for_model(Course),
+            run__object_id__in=courses.filter(
+                platform__in=RESOURCE_FILE_PLATFORMS
+            ).values("id"),
+        )
+        targets.append(
+            AuditTarget(
+                object_type=COURSE_TYPE,
+                doc_type=RESOURCE_FILE_TYPE,
+                # Content file documents have no database id, and keys may be repeated across runs
+                queryset=content_files.annotate(audit_key=Collate("key", "C"))
+                .only("id", "key")
+                .order_by("audit_key", "id"),
+                index_key="key",
+                query={"term": {"object_type": RESOURCE_FILE_TYPE}},
+                gen_doc_id=lambda content_file: gen_content_file_id(content_file.key),
+                serialize=serialize_bulk_content_files,
+                index=api.index_content_files,
+            )
+        )
+    for object_type, queryset, gen_doc_id, serialize, index, columns in (
+        (
+            PROGRAM_TYPE,
+            Program.objects.filter(published=True),
+            gen_program_id,
+            serialize_bulk_programs,
+            api.index_programs,
+            (),
+        ),
+        (
+            USER_LIST_TYPE,
+            UserList.objects.exclude(items=None),
+            gen_user_list_id,
+            serialize_bulk_user_lists,
+            api.index_user_lists,
+            (),
+        ),
+        (
+            STAFF_LIST_TYPE,
+            StaffList.objects.filter(privacy_level=PrivacyLevel.public.value).exclude(
+                items=None
+            ),
+            gen_staff_list_id,
+            serialize_bulk_staff_lists,
+            api.index_staff_lists,
+            (),
+        ),
+        (
+            VIDEO_TYPE,
+            Video.objects.filter(published=True),
+            gen_video_id,
+            serialize_bulk_videos,
+            api.index_videos,
+            ("platform", "video_id"),
+        ),
+        (
+            PODCAST_TYPE,
+            Podcast.objects.filter(published=True),
+            gen_podcast_id,
+            serialize_bulk_podcasts,
+            api.index_podcasts,
+            (),
+        ),
+        (
+            PODCAST_EPISODE_TYPE,
+            PodcastEpisode.objects.filter(published=True),
+            gen_podcast_episode_id,
+            serialize_bulk_podcast_episodes,
+            api.index_podcast_episodes,
+            (),
+        ),
+    ):
+        if object_type in object_types:
+            targets.append(
+                AuditTarget(
+                    object_type=object_type,
+                    doc_type=object_type,
+                    queryset=_by_id(queryset, *columns),
+                    index_key="id",
+                    query={"match_all": {}},
+                    gen_doc_id=gen_doc_id,
+                    serialize=serialize,
+                    index=index,
+                )
+            )
+    return targets
+
+
+def hash_source(source):
+    """Hash the indexed source of a document, ignoring key order and number formatting
+
+    Args:
+        source (dict): A serialized document or the _source of a hit
+
+    Returns:
+        str: The hex digest of the source
+
+    """
+    normalized = rapidjson.loads(
+        encode_json(
+            {
+                key: value
+                for key, value in source.items()
+                if key not in DOCUMENT_META_KEYS
+            }
+        )
+    )
+    return hashlib.blake2b(
+        rapidjson.dumps(normalized, sort_keys=True, ensure_ascii=False).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def merge_join(objects, hits, *, index_key, gen_doc_id):
+    """Pair database objects and index hits which are both sorted by the same key
+
+    A hit with the key of an object but a different document id is treated as orphaned,
+    and objects for a document which was already paired are skipped.
+
+    Args:
+        objects (iterable of Model): Database objects with an audit_key, sorted by it
+        hits (iterable of dict): Hits sorted by their index_key field
+        index_key (str): The field of the hits to compare with audit_key
+        gen_doc_id (callable): Function from an object to its document id
+
+    Yields:
+        tuple of (Model, dict): An object and its hit, with None for a missing hit or object
+
+    """
+    objects = iter(objects)
+    hits = iter(hits)
+    obj = next(objects, None)
+    hit = next(hits, None)
+    paired_doc_id = None
+    while obj is not None or hit is not None:
+        if obj is not None and gen_doc_id(obj) == paired_doc_id:
+            # Another object for a document which was already paired
+            obj = next(objects, None)
+            continue
+        hit_key = hit["_source"].get(index_key) if hit is not None else None
+        if hit is None or (
+            obj is not None and hit_key is not None and obj.audit_key < hit_key
+        ):
+            yield obj, None
+            obj = next(objects, None)
+        elif obj is None or hit_key is None or hit_key < obj.audit_key:
+            yield None, hit
+            hit = next(hits, None)
+        elif hit["_id"] != gen_doc_id(obj):
+            yield None, hit
+            hit = next(hits, None)
+        else:
+            yield obj, hit
+            paired_doc_id = hit["_id"]
+            obj = next(objects, None)
+            hit = next(hits, None)
+
+
+class IndexAuditor:
+    """Compares one document type of an index with the database, reporting and optionally
+    repairing the differences
+
+    Objects and hits are streamed in key order and differences are handled in chunks of
+    OPENSEARCH_INDEXING_CHUNK_SIZE, so memory use doesn't grow with the size of the index.
+
+    Args:
+        target (AuditTarget): What to compare
+        hashes (bool): Also compare the content of documents present on both sides
+        repair (bool): Index missing and stale documents and delete orphaned ones
+        report (callable): Called with a dict describing each difference
+
+    """
+
+    def __init__(self, target, *, hashes=False, repair=False, report=None):
+        self.target = target
+        self.hashes = hashes
+        self.repair = repair
+        self.report = report
+        self.counts = {"checked": 0, MISSING: 0, ORPHANED: 0, STALE: 0}
+        self._to_compare = []
+        self._to_index = []
+        self._to_delete = []
+
+    def _record(self, status, doc_id, key):
+        """Count and report a difference"""
+        self.counts[status] += 1
+        if self.report:
+            self.report(
+                {
+                    "object_type": self.target.object_type,
+                    "doc_type": self.target.doc_type,
+                    "status": status,
+                    "doc_id": doc_id,
+                    "key": key,
+                }
+            )
+
+    def _compare(self):
+        """Compare the content of documents present on both sides"""
+        hits = dict(self._to_compare)
+        self._to_compare = []
+        documents = {
+            document["_id"]: document for document in self.target.serialize(list(hits))
+        }
+        for pk, hit in hits.items():
+            document = documents.get(hit["_id"])
+            if document is not None and hash_source(document) != hash_source(
+                hit["_source"]
+            ):
+                self._record(
+                    STALE, hit["_id"], hit["_source"].get(self.target.index_key)
+                )
+                self._to_index.append((pk, hit["_id"]))
+
+    def _flush(self, force=False):
+        """Apply pending comparisons and repairs once there are enough of them"""
+        chunk_size = settings.OPENSEARCH_INDEXING_CHUNK_SIZE
+        if self._to_compare and (force or len(self._to_compare) >= chunk_size):
+            self._compare()
+        if self._to_index and (force or len(self._to_index) >= chunk_size):
+            if self.repair:
+                pks, doc_ids = zip(*self._to_index)
+                # The stored fingerprints match what was last written, not what is in the index,
+                # so they would make the writes be skipped
+                invalidate_fingerprints(self.target.object_type, list(doc_ids))
+                self.target.index(list(pks), update_only=True)
+            self._to_index = []
+        if self._to_delete and (force or len(self._to_delete) >= chunk_size):
+            if self.repair:
+                api.deindex_items(self._to_delete, self.target.object_type, True)
+            self._to_delete = []
+
+    def run(self):
+        """Compare the index with the database
+
+        Returns:
+            AuditResult: The number of documents checked and of each kind of difference
+
+        """
+        target = self.target
+        objects = target.queryset.iterator(
+            chunk_size=settings.OPENSEARCH_DOCUMENT_INDEXING_CHUNK_SIZE
+        )
+        hits = api.iterate_documents(
+            get_default_alias_name(target.object_type),
+            target.query,
+            source_fields=None if self.hashes else [target.index_key],
+            sort=[{target.index_key: "asc"}],
+            slices=1,
+        )
+        for obj, hit in merge_join(
+            objects, hits, index_key=target.index_key, gen_doc_id=target.gen_doc_id
+        ):
+            self.counts["checked"] += 1
+            if hit is None:
+                self._record(MISSING, target.gen_doc_id(obj), obj.audit_key)
+                self._to_index.append((obj.id, target.gen_doc_id(obj)))
+            elif obj is None:
+                self._record(ORPHANED, hit["_id"], hit["_source"].get(target.index_key))
+                self._to_delete.append(
+                    {
+                        "_id": hit["_id"],
+                        "_op_type": "delete",
+                        **({"_routing": hit["_routing"]} if "_routing" in hit else {}),
+                    }
+                )
+            elif self.hashes:
+                self._to_compare.append((obj.id, hit))
+            self._flush()
+        self._flush(force=True)
+
+        result = AuditResult(
+            object_type=target.object_type, doc_type=target.doc_type, **self.counts
+        )
+        log.info("Audited %s documents: %s", target.doc_type, result)
+        return result
+
+
+def audit_indexes(object_types, *, hashes=False, repair=False, report=None):
+    """Compare the default indexes of some object types with the database
+
+    Args:
+        object_types (list of str): The object types to audit
+        hashes (bool): Also compare the content of documents present on both sides
+        repair (bool): Index missing and stale documents and delete orphaned ones
+        report (callable): Called with a dict describing each difference
+
+    Returns:
+        list of AuditResult: The results for each document type
+
+    """
+    return [
+        IndexAuditor(target, hashes=hashes, repair=repair, report=report).run()
+        for target in get_audit_targets(object_types)
+    ]
@@ -0,0 +1,232 @@
+"""Tests for the index consistency audit"""
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import caches
+
+from course_catalog.factories import ContentFileFactory, CourseFactory, VideoFactory
+from search.api import gen_content_file_id, gen_course_id, gen_video_id
+from search.audit import (
+    MISSING,
+    ORPHANED,
+    STALE,
+    audit_indexes,
+    hash_source,
+    merge_join,
+)
+from search.constants import COURSE_TYPE, RESOURCE_FILE_TYPE, VIDEO_TYPE
+from search.fingerprints import DocumentFingerprints
+from search.serializers import serialize_bulk_content_files, serialize_bulk_videos
+
+
+def _hit(doc_id, key, **source):
+    """Make a hit"""
+    return {"_id": doc_id, "_source": {"id": key, **source}}
+
+
+def test_merge_join():
+    """merge_join should pair objects and hits with the same key and document id"""
+    objects = [SimpleNamespace(audit_key=key) for key in (1, 2, 2, 4, 6)]
+    hits = [
+        _hit("doc2", 2),
+        _hit("doc3", 3),
+        _hit("wrong", 4),
+        _hit("doc4", 4),
+        _hit("doc7", 7),
+        {"_id": "nokey", "_source": {}},
+    ]
+    pairs = list(
+        merge_join(
+            objects,
+            hits,
+            index_key="id",
+            gen_doc_id=lambda obj: f"doc{obj.audit_key}",
+        )
+    )
+    assert [
+        (obj.audit_key if obj else None, hit["_id"] if hit else None)
+        for obj, hit in pairs
+    ] == [
+        (1, None),
+        (2, "doc2"),
+        (None, "doc3"),
+        (None, "wrong"),
+        (4, "doc4"),
+        (6, None),
+        (None, "doc7"),
+        (None, "nokey"),
+    ]
+
+
+def test_hash_source():
+    """hash_source should ignore key order, metadata and how numbers are represented"""
+    assert hash_source(
+        {"_id": "a", "_routing": "b", "price": Decimal("10.00"), "title": "x"}
+    ) == hash_source({"title": "x", "price": 10.0})
+    assert hash_source({"title": "x"}) != hash_source({"title": "y"})
+
+
+@pytest.fixture
+def mock_documents(mocker):
+    """Mock the hits of each document type"""
+    hits = {}
+    mocker.patch(
+        "search.audit.api.iterate_documents",
+        side_effect=lambda index, query, **kwargs: iter(
+            hits[query.get("term", {}).get("object_type", VIDEO_TYPE)]
+        ),
+    )
+    mocker.patch("search.audit.load_course_blocklist", return_value=[])
+    return hits
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("repair", [True, False])
+def test_audit_indexes(mocker, settings, mock_documents, repair):
+    """Missing and orphaned documents should be reported, and repaired in chunks"""
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    mock_index_courses = mocker.patch("search.audit.api.index_courses")
+    mock_index_content_files = mocker.patch("search.audit.api.index_content_files")
+    mock_deindex = mocker.patch("search.audit.api.deindex_items")
+    courses = sorted(
+        CourseFactory.create_batch(4, platform="ocw"), key=lambda course: course.id
+    )
+    CourseFactory.create(published=False)
+    content_file = ContentFileFactory.create(run=courses[0].runs.first())
+    mock_documents[COURSE_TYPE] = [
+        _hit(gen_course_id(course.platform, course.course_id), course.id)
+        for course in courses[:1]
+    ] + [_hit("co_ocw_deleted", courses[-1].id + 100)]
+    ContentFileFactory.create(run=courses[1].runs.first(), key=content_file.key)
+    mock_documents[RESOURCE_FILE_TYPE] = [
+        {
+            "_id": gen_content_file_id(content_file.key),
+            "_source": {"key": content_file.key},
+            "_routing": "parent",
+        },
+        {"_id": "cf_deleted", "_source": {"key": "~deleted"}, "_routing": "parent"},
+    ]
+    differences = []
+
+    results = audit_indexes([COURSE_TYPE], repair=repair, report=differences.append)
+
+    assert [tuple(result) for result in results] == [
+        (COURSE_TYPE, COURSE_TYPE, 5, 3, 1, 0),
+        (COURSE_TYPE, RESOURCE_FILE_TYPE, 2, 0, 1, 0),
+    ]
+    assert sorted(
+        (difference["doc_type"], difference["status"], difference["doc_id"])
+        for difference in differences
+    ) == sorted(
+        [
+            *[
+                (COURSE_TYPE, MISSING, gen_course_id(course.platform, course.course_id))
+                for course in courses[1:]
+            ],
+            (COURSE_TYPE, ORPHANED, "co_ocw_deleted"),
+            (RESOURCE_FILE_TYPE, ORPHANED, "cf_deleted"),
+        ]
+    )
+    if repair:
+        assert [call[0][0] for call in mock_index_courses.call_args_list] == [
+            [course.id for course in courses[1:3]],
+            [courses[3].id],
+        ]
+        assert [call[0][0] for call in mock_deindex.call_args_list] == [
+            [{"_id": "co_ocw_deleted", "_op_type": "delete"}],
+            [{"_id": "cf_deleted", "_op_type": "delete", "_routing": "parent"}],
+        ]
+    else:
+        mock_index_courses.assert_not_called()
+        mock_deindex.assert_not_called()
+    mock_index_content_files.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_audit_indexes_hashes(mocker, mock_documents):
+    """Documents whose content differs from the database should be reported as stale"""
+    mock_index_videos = mocker.patch("search.audit.api.index_videos")
+    videos = sorted(VideoFactory.create_batch(3), key=lambda video: video.id)
+    documents = list(serialize_bulk_videos([video.id for video in videos]))
+    documents = sorted(documents, key=lambda document: document["id"])
+    documents[1]["title"] = "outdated"
+    mock_documents[VIDEO_TYPE] = [
+        {"_id": document.pop("_id"), "_source": document} for document in documents
+    ]
+    differences = []
+
+    results = audit_indexes(
+        [VIDEO_TYPE], hashes=True, repair=True, report=differences.append
+    )
+
+    assert [tuple(result) for result in results] == [
+        (VIDEO_TYPE, VIDEO_TYPE, 3, 0, 0, 1)
+    ]
+    assert [
+        (difference["status"], difference["doc_id"]) for difference in differences
+    ] == [(STALE, gen_video_id(videos[1]))]
+    mock_index_videos.assert_called_once_with([videos[1].id], update_only=True)
+
+
+@pytest.mark.django_db
+def test_audit_indexes_repair_payloads(mocker, settings, mock_documents):
+    """Repairs should write documents with stored fingerprints, with their routing"""
+    settings.OPENSEARCH_FINGERPRINTS_ENABLED = True
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    caches["default"].clear()
+    course = CourseFactory.create(platform="ocw")
+    content_file = ContentFileFactory.create(run=course.runs.first())
+    course_doc_id = gen_course_id(course.platform, course.course_id)
+    mock_documents[COURSE_TYPE] = [_hit(course_doc_id, course.id)]
+    mock_documents[RESOURCE_FILE_TYPE] = [
+        {"_id": "cf_deleted", "_source": {"key": "~deleted"}, "_routing": "parent"}
+    ]
+    # The missing content file was written before, so its fingerprint is stored
+    fingerprints = DocumentFingerprints(COURSE_TYPE)
+    assert (
+        len(
+            list(
+                fingerprints.filter_changed(
+                    serialize_bulk_content_files([content_file.id])
+                )
+            )
+        )
+        == 1
+    )
+    fingerprints.save()
+
+    lines = []
+    mocker.patch("search.indexing_api.get_conn")
+    mocker.patch("search.indexing_api.get_active_aliases", return_value=["default"])
+    mocker.patch("search.indexing_api.is_reindexing", return_value=False)
+    mocker.patch("search.indexing_api.bump_index_generation")
+    mocker.patch(
+        "search.indexing_api.send_bulk_payloads",
+        side_effect=lambda conn, payloads, **kwargs: lines.extend(
+            json.loads(line)
+            for payload in payloads
+            for line in b"".join(payload.actions).decode("utf-8").splitlines()
+        )
+        or [],
+    )
+
+    results = audit_indexes([COURSE_TYPE], repair=True)
+
+    assert [tuple(result) for result in results] == [
+        (COURSE_TYPE, COURSE_TYPE, 1, 0, 0, 0),
+        (COURSE_TYPE, RESOURCE_FILE_TYPE, 2, 1, 1, 0),
+    ]
+    actions = [line for line in lines if "index" in line or "delete" in line]
+    assert actions == [
+        {
+            "index": {
+                "_index": "default",
+                "_id": gen_content_file_id(content_file.key),
+                "routing": course_doc_id,
+            }
+        },
+        {"delete": {"_index": "default", "_id": "cf_deleted", "routing": "parent"}},
+    ]
+    caches["default"].clear()
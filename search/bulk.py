@@ -0,0 +1,227 @@
+"""Encoding and sending of OpenSearch bulk requests"""
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import rapidjson
+from django.conf import settings
+from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers import BulkIndexError
+
+log = logging.getLogger(__name__)
+
+# Keys of a serialized document which belong in the bulk action line instead of the source,
+# and their names in the action line. Like opensearch-py's expand_action, _routing loses its
+# underscore since OpenSearch rejects bulk actions with an "unknown parameter [_routing]".
+ACTION_META_KEYS = {"_id": "_id", "_routing": "routing"}
+
+# The encoded actions of a bulk request, and their total size in bytes
+BulkPayload = namedtuple("BulkPayload", ["actions", "size"])
+# How long a bulk request took, in milliseconds spent in OpenSearch and in seconds overall
+BulkStats = namedtuple("BulkStats", ["actions", "size", "took", "seconds", "retries"])
+
+# Statuses for bulk requests or actions rejected by an overloaded cluster, which can be retried
+RETRY_STATUSES = (429, 503)
+
+
+def encode_json(obj):
+    """Encode an object as UTF-8 JSON, handling the same types as the opensearch-py serializer
+
+    Args:
+        obj (object): The object to encode
+
+    Returns:
+        bytes: The encoded object
+
+    """
+    return rapidjson.dumps(
+        obj,
+        ensure_ascii=False,
+        datetime_mode=rapidjson.DM_ISO8601,
+        uuid_mode=rapidjson.UM_CANONICAL,
+        number_mode=rapidjson.NM_DECIMAL | rapidjson.NM_NATIVE,
+        default=str,
+    ).encode("utf-8")
+
+
+def encode_bulk_actions(document, indexes):
+    """Encode a serialized document as the NDJSON lines of a bulk action for each index
+
+    The document source is only encoded once and shared by the actions.
+
+    Args:
+        document (dict): A serialized document, optionally with an _op_type of "index" (the default) or "delete"
+        indexes (list of str): The aliases to write the document to
+
+    Returns:
+        list of bytes: For each index, the action line followed by the source line for anything except deletions
+
+    """
+    source = dict(document)
+    op_type = source.pop("_op_type", "index")
+    meta = {
+        action_key: source.pop(key)
+        for key, action_key in ACTION_META_KEYS.items()
+        if key in source
+    }
+    source_line = b"" if op_type == "delete" else encode_json(source) + b"\n"
+    return [
+        encode_json({op_type: {"_index": index, **meta}}) + b"\n" + source_line
+        for index in indexes
+    ]
+
+
+def iter_bulk_payloads(documents, indexes, *, max_size, max_count, object_type=None):
+    """Encode documents once and pack them into bulk request bodies which write to every index
+
+    Args:
+        documents (iterable of dict): Serialized documents
+        indexes (list of str): The aliases to write the documents to
+        max_size (int): The maximum size in bytes of a request body
+        max_count (int): The maximum number of documents in a request body
+        object_type (str): The object type of the documents, for logging
+
+    Yields:
+        BulkPayload: request bodies of at most max_size bytes and max_count documents per index
+
+    """
+    max_actions = max_count * len(indexes)
+    actions = []
+    size = 0
+    for document in documents:
+        for action in encode_bulk_actions(document, indexes):
+            if len(action) > max_size:
+                log.error(
+                    "Document id %s for object_type %s exceeds max size %d: %d",
+                    document.get("_id"),
+                    object_type,
+                    max_size,
+                    len(action),
+                )
+                break
+            if actions and (
+                size + len(action) > max_size or len(actions) >= max_actions
+            ):
+                yield BulkPayload(actions, size)
+                actions = []
+                size = 0
+            actions.append(action)
+            size += len(action)
+    if actions:
+        yield BulkPayload(actions, size)
+
+
+def _get_item_status(item):
+    """Get the status of an item in a bulk response"""
+    return next(iter(item.values())).get("status", 500)
+
+
+def send_bulk_payload(conn, payload, **kwargs):  # pylint: disable=too-many-locals
+    """Send a pre-encoded bulk request body
+
+    Actions rejected with a 429 or 503 status, or whole requests rejected that way, are
+    retried with exponential backoff up to OPENSEARCH_BULK_MAX_RETRIES times.
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        payload (BulkPayload): The encoded bulk actions
+        kwargs: Extra query parameters for the bulk request, like routing
+
+    Returns:
+        BulkStats: Statistics about the request
+
+    Raises:
+        BulkIndexError: If any action in the payload failed
+
+    """
+    max_retries = settings.OPENSEARCH_BULK_MAX_RETRIES
+    actions = payload.actions
+    errors = []
+    took = 0
+    retries = 0
+    start = time.monotonic()
+    for attempt in range(max_retries + 1):
+        retries = attempt
+        if attempt:
+            time.sleep(settings.OPENSEARCH_BULK_RETRY_BACKOFF * 2 ** (attempt - 1))
+        can_retry = attempt < max_retries
+        try:
+            response = conn.bulk(b"".join(actions), require_alias=True, **kwargs)
+        except TransportError as exc:
+            if can_retry and exc.status_code in RETRY_STATUSES:
+                log.warning(
+                    "Bulk request rejected with status %s, retrying", exc.status_code
+                )
+                continue
+            raise
+        took += response.get("took", 0)
+        retry_actions = []
+        if response.get("errors"):
+            for action, item in zip(actions, response["items"]):
+                status = _get_item_status(item)
+                if 200 <= status < 300:
+                    continue
+                if can_retry and status in RETRY_STATUSES:
+                    retry_actions.append(action)
+                else:
+                    errors.append(item)
+        if not retry_actions:
+            break
+        log.warning("Retrying %d rejected bulk actions", len(retry_actions))
+        actions = retry_actions
+
+    stats = BulkStats(
+        actions=len(payload.actions),
+        size=payload.size,
+        took=took,
+        seconds=time.monotonic() - start,
+        retries=retries,
+    )
+    log.info(
+        "Sent %d bulk actions (%d bytes) in %.2fs, %dms in OpenSearch, %d retries: %.1f actions/s",
+        stats.actions,
+        stats.size,
+        stats.seconds,
+        stats.took,
+        stats.retries,
+        stats.actions / stats.seconds if stats.seconds else 0,
+    )
+    if errors:
+        raise BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+    return stats
+
+
+def send_bulk_payloads(conn, payloads, **kwargs):
+    """Send bulk request bodies using up to OPENSEARCH_BULK_CONCURRENCY threads
+
+    At most OPENSEARCH_BULK_CONCURRENCY requests are in flight at a time, so payloads are
+    only taken from the iterable, and serialized, as fast as OpenSearch accepts them.
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        payloads (iterable of BulkPayload): The encoded bulk requests
+        kwargs: Extra query parameters for the bulk requests, like routing
+
+    Returns:
+        list of BulkStats: Statistics about each request
+
+    Raises:
+        BulkIndexError: If any action failed. Requests which are already in flight are
+            completed, but no more are sent.
+
+    """
+    concurrency = settings.OPENSEARCH_BULK_CONCURRENCY
+    if concurrency <= 1:
+        return [send_bulk_payload(conn, payload, **kwargs) for payload in payloads]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for payload in payloads:
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+            pending.add(executor.submit(send_bulk_payload, conn, payload, **kwargs))
+        results.extend(future.result() for future in wait(pending).done)
+    return results
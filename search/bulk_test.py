@@ -0,0 +1,234 @@
+"""Tests for OpenSearch bulk request encoding"""
+import json
+
+import pytest
+from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers import BulkIndexError
+
+from search.bulk import (
+    encode_bulk_actions,
+    iter_bulk_payloads,
+    send_bulk_payload,
+    send_bulk_payloads,
+)
+
+
+@pytest.fixture(autouse=True)
+def bulk_settings(settings, mocker):
+    """Don't wait between retries"""
+    settings.OPENSEARCH_BULK_CONCURRENCY = 1
+    settings.OPENSEARCH_BULK_MAX_RETRIES = 2
+    settings.OPENSEARCH_BULK_RETRY_BACKOFF = 1
+    return mocker.patch("search.bulk.time.sleep")
+
+
+def _make_payload(ids):
+    """Make a bulk payload indexing empty documents"""
+    return next(
+        iter_bulk_payloads(
+            [{"_id": _id} for _id in ids], ["default"], max_size=10000, max_count=100
+        )
+    )
+
+
+def _decode_payload(payload):
+    """Decode the NDJSON lines of a bulk payload"""
+    return [
+        json.loads(line)
+        for line in b"".join(payload.actions).decode("utf-8").splitlines()
+    ]
+
+
+def test_encode_bulk_actions():
+    """Index actions should include the source, deletions should not"""
+    assert encode_bulk_actions(
+        {"_id": "doc1", "title": "Ünïcode"}, ["default", "reindexing"]
+    ) == [
+        '{"index":{"_index":"default","_id":"doc1"}}\n{"title":"Ünïcode"}\n'.encode(
+            "utf-8"
+        ),
+        '{"index":{"_index":"reindexing","_id":"doc1"}}\n{"title":"Ünïcode"}\n'.encode(
+            "utf-8"
+        ),
+    ]
+    assert encode_bulk_actions({"_id": "doc1", "_op_type": "delete"}, ["default"]) == [
+        b'{"delete":{"_index":"default","_id":"doc1"}}\n'
+    ]
+
+
+def test_encode_bulk_actions_routing():
+    """The routing of a document should be in the action line without an underscore"""
+    assert encode_bulk_actions(
+        {"_id": "doc1", "_routing": "parent", "title": "x"},
+        ["default"],
+    ) == [
+        b'{"index":{"_index":"default","_id":"doc1","routing":"parent"}}\n'
+        b'{"title":"x"}\n'
+    ]
+    assert encode_bulk_actions(
+        {"_id": "doc1", "_routing": "parent", "_op_type": "delete"}, ["default"]
+    ) == [b'{"delete":{"_index":"default","_id":"doc1","routing":"parent"}}\n']
+
+
+def test_encode_bulk_actions_source_encoded_once(mocker):
+    """The source should be encoded once no matter how many indexes it's written to"""
+    mock_encode = mocker.patch("search.bulk.encode_json", return_value=b"{}")
+    encode_bulk_actions({"_id": "doc1", "title": "title"}, ["a", "b", "c"])
+    assert [call.args[0] for call in mock_encode.call_args_list].count(
+        {"title": "title"}
+    ) == 1
+
+
+@pytest.mark.parametrize("indexes", [["default"], ["default", "reindexing"]])
+def test_iter_bulk_payloads(indexes):
+    """Documents should be packed into payloads limited by size and count"""
+    documents = [{"_id": f"doc{num}", "text": "a" * 30} for num in range(5)]
+    action_size = len(encode_bulk_actions(documents[0], ["default"])[0])
+
+    payloads = list(
+        iter_bulk_payloads(
+            documents, ["default"], max_size=action_size * 2, max_count=10
+        )
+    )
+    assert [len(payload.actions) for payload in payloads] == [2, 2, 1]
+
+    payloads = list(iter_bulk_payloads(documents, indexes, max_size=10000, max_count=3))
+    assert [len(payload.actions) for payload in payloads] == [
+        3 * len(indexes),
+        2 * len(indexes),
+    ]
+    assert [
+        (line["index"]["_index"], line["index"]["_id"])
+        for payload in payloads
+        for line in _decode_payload(payload)
+        if "index" in line
+    ] == [(index, document["_id"]) for document in documents for index in indexes]
+
+
+def test_iter_bulk_payloads_too_large(mocker):
+    """Documents larger than the max size should be skipped"""
+    mock_log = mocker.patch("search.bulk.log.error")
+    documents = [{"_id": "small"}, {"_id": "large", "text": "a" * 100}]
+    payloads = list(
+        iter_bulk_payloads(documents, ["default"], max_size=60, max_count=10)
+    )
+    assert [len(payload.actions) for payload in payloads] == [1]
+    assert _decode_payload(payloads[0]) == [
+        {"index": {"_index": "default", "_id": "small"}},
+        {},
+    ]
+    mock_log.assert_called_once()
+
+
+def test_send_bulk_payload(mocker):
+    """send_bulk_payload should send the encoded body"""
+    conn = mocker.Mock()
+    conn.bulk.return_value = {"errors": False, "items": []}
+    payload = next(
+        iter_bulk_payloads([{"_id": "doc1"}], ["default"], max_size=100, max_count=1)
+    )
+    stats = send_bulk_payload(conn, payload, routing="abc")
+    assert stats.actions == 1
+    assert stats.size == payload.size
+    assert stats.retries == 0
+    conn.bulk.assert_called_once_with(
+        b'{"index":{"_index":"default","_id":"doc1"}}\n{}\n',
+        require_alias=True,
+        routing="abc",
+    )
+
+
+def test_send_bulk_payload_errors(mocker):
+    """send_bulk_payload should raise a BulkIndexError for failed actions"""
+    failed = {"delete": {"_id": "doc2", "status": 404, "result": "not_found"}}
+    conn = mocker.Mock()
+    conn.bulk.return_value = {
+        "errors": True,
+        "items": [{"delete": {"_id": "doc1", "status": 200}}, failed],
+    }
+    payload = next(
+        iter_bulk_payloads(
+            [
+                {"_id": "doc1", "_op_type": "delete"},
+                {"_id": "doc2", "_op_type": "delete"},
+            ],
+            ["default"],
+            max_size=100,
+            max_count=2,
+        )
+    )
+    with pytest.raises(BulkIndexError) as exc:
+        send_bulk_payload(conn, payload)
+    assert exc.value.args[1] == [failed]
+
+
+def test_send_bulk_payload_retry(mocker, bulk_settings):
+    """Actions rejected with a 429 should be retried on their own with backoff"""
+    conn = mocker.Mock()
+    conn.bulk.side_effect = [
+        {
+            "errors": True,
+            "items": [
+                {"index": {"_id": "doc1", "status": 201}},
+                {"index": {"_id": "doc2", "status": 429}},
+            ],
+        },
+        TransportError(503, "unavailable"),
+        {"errors": False, "items": [{"index": {"_id": "doc2", "status": 201}}]},
+    ]
+    payload = _make_payload(["doc1", "doc2"])
+    stats = send_bulk_payload(conn, payload)
+    assert stats.retries == 2
+    assert conn.bulk.call_count == 3
+    assert conn.bulk.call_args[0][0] == payload.actions[1]
+    assert [call.args[0] for call in bulk_settings.call_args_list] == [1, 2]
+
+
+def test_send_bulk_payload_retries_exhausted(mocker):
+    """Actions should fail once they've been rejected too many times"""
+    rejected = {"index": {"_id": "doc1", "status": 429}}
+    conn = mocker.Mock()
+    conn.bulk.return_value = {"errors": True, "items": [rejected]}
+    with pytest.raises(BulkIndexError) as exc:
+        send_bulk_payload(conn, _make_payload(["doc1"]))
+    assert exc.value.args[1] == [rejected]
+    assert conn.bulk.call_count == 3
+
+
+def test_send_bulk_payload_transport_error(mocker):
+    """Errors for whole requests which aren't caused by load should not be retried"""
+    conn = mocker.Mock()
+    conn.bulk.side_effect = TransportError(400, "bad request")
+    with pytest.raises(TransportError):
+        send_bulk_payload(conn, _make_payload(["doc1"]))
+    assert conn.bulk.call_count == 1
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_send_bulk_payloads(mocker, settings, concurrency):
+    """send_bulk_payloads should send every payload"""
+    settings.OPENSEARCH_BULK_CONCURRENCY = concurrency
+    conn = mocker.Mock()
+    conn.bulk.return_value = {"errors": False, "items": []}
+    payloads = [_make_payload([f"doc{num}"]) for num in range(10)]
+    stats = send_bulk_payloads(conn, iter(payloads), routing="abc")
+    assert len(stats) == len(payloads)
+    assert sorted(call.args[0] for call in conn.bulk.call_args_list) == sorted(
+        b"".join(payload.actions) for payload in payloads
+    )
+    for call in conn.bulk.call_args_list:
+        assert call.kwargs == {"require_alias": True, "routing": "abc"}
+
+
+def test_send_bulk_payloads_error(mocker, settings):
+    """send_bulk_payloads should stop sending payloads after an error"""
+    settings.OPENSEARCH_BULK_CONCURRENCY = 2
+    failed = {"index": {"_id": "doc0", "status": 400}}
+    conn = mocker.Mock()
+    conn.bulk.side_effect = [{"errors": True, "items": [failed]}] + [
+        {"errors": False, "items": []}
+    ] * 9
+    payloads = (_make_payload([f"doc{num}"]) for num in range(10))
+    with pytest.raises(BulkIndexError):
+        send_bulk_payloads(conn, payloads)
+    assert conn.bulk.call_count < 10
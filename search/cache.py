@@ -0,0 +1,205 @@
+"""Caching of OpenSearch responses for search queries"""
+import hashlib
+import json
+import logging
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+log = logging.getLogger(__name__)
+
+RESPONSE_KEY_PREFIX = "search:response"
+GENERATION_KEY_PREFIX = "search:generation"
+DIRTY_KEY_PREFIX = "search:dirty"
+
+
+def get_response_cache():
+    """Get the django cache used for search responses
+
+    Returns:
+        django.core.cache.backends.base.BaseCache: The cache
+
+    """
+    return caches[settings.OPENSEARCH_RESPONSE_CACHE_ALIAS]
+
+
+def is_response_cacheable(user):
+    """Return True if search responses for the user can be shared with other users
+
+    Args:
+        user (User): The user executing the search
+
+    Returns:
+        bool: True if the response can be cached
+
+    """
+    return settings.OPENSEARCH_RESPONSE_CACHE_ENABLED and user.is_anonymous
+
+
+def make_response_cache_key(index, body):
+    """Make the cache key for a search request
+
+    Args:
+        index (str): Comma separated list of aliases being searched
+        body (dict): The query body sent to OpenSearch
+
+    Returns:
+        str: The cache key for the response
+
+    """
+    canonical = json.dumps(
+        {"index": sorted(index.split(",")), "body": body},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{RESPONSE_KEY_PREFIX}:{digest}"
+
+
+def _generation_key(object_type):
+    """Cache key for the index generation counter of an object type"""
+    return f"{GENERATION_KEY_PREFIX}:{object_type}"
+
+
+def _dirty_key(object_type):
+    """Cache key for the flag marking an object type as having writes not yet visible to searches"""
+    return f"{DIRTY_KEY_PREFIX}:{object_type}"
+
+
+def bump_index_generation(object_types):
+    """Invalidate cached search responses for object types whose indexes changed
+
+    Cached responses are tagged with the generation of each index they searched, so
+    incrementing the generation makes them stale. The object types are also marked dirty
+    until the next index refresh, so responses computed before the new documents are
+    searchable don't get cached under the new generation.
+
+    Args:
+        object_types (iterable of str): The object types that were written to
+
+    """
+    if not settings.OPENSEARCH_RESPONSE_CACHE_ENABLED:
+        return
+    object_types = set(object_types)
+    cache = get_response_cache()
+    try:
+        for object_type in object_types:
+            key = _generation_key(object_type)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        cache.set_many(
+            {_dirty_key(object_type): True for object_type in object_types},
+            timeout=settings.OPENSEARCH_RESPONSE_CACHE_REFRESH_DELAY,
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to bump search index generation for %s", object_types)
+
+
+# The cached response of a search if there was a fresh one, and where to cache a new response
+CachedSearchLookup = namedtuple(
+    "CachedSearchLookup", ["response", "response_key", "generations"]
+)
+
+
+def lookup_cached_search_response(*, index, body, object_types):
+    """Look up the cached response for a search
+
+    Args:
+        index (str): Comma separated list of aliases being searched
+        body (dict): The query body sent to OpenSearch
+        object_types (iterable of str): The object types of the indexes being searched
+
+    Returns:
+        CachedSearchLookup:
+            The cached response or None. response_key is None if a new response shouldn't be cached.
+
+    """
+    cache = get_response_cache()
+    object_types = sorted(set(object_types))
+    generation_keys = [_generation_key(object_type) for object_type in object_types]
+    dirty_keys = [_dirty_key(object_type) for object_type in object_types]
+    response_key = make_response_cache_key(index, body)
+
+    try:
+        values = cache.get_many([*generation_keys, *dirty_keys, response_key])
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to read cached search response")
+        return CachedSearchLookup(None, None, None)
+
+    if any(values.get(key) for key in dirty_keys):
+        return CachedSearchLookup(None, None, None)
+
+    generations = [values.get(key, 0) for key in generation_keys]
+    entry = values.get(response_key)
+    if entry is not None and entry["generations"] == generations:
+        return CachedSearchLookup(entry["response"], response_key, generations)
+    return CachedSearchLookup(None, response_key, generations)
+
+
+def store_search_response(lookup, response):
+    """Cache the response of a search which wasn't found by lookup_cached_search_response
+
+    Args:
+        lookup (CachedSearchLookup): The result of the lookup
+        response (dict): The search response
+
+    """
+    if lookup.response_key is None:
+        return
+    try:
+        get_response_cache().set(
+            lookup.response_key,
+            {"generations": lookup.generations, "response": response},
+            timeout=settings.OPENSEARCH_RESPONSE_CACHE_TIMEOUT,
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to cache search response")
+
+
+def cached_search_response(*, index, body, object_types, execute):
+    """Return the cached response for a search, or run the search and cache its response
+
+    Args:
+        index (str): Comma separated list of aliases being searched
+        body (dict): The query body sent to OpenSearch
+        object_types (iterable of str): The object types of the indexes being searched
+        execute (callable): Function which runs the search and returns the response
+
+    Returns:
+        dict: The search response
+
+    """
+    lookup = lookup_cached_search_response(
+        index=index, body=body, object_types=object_types
+    )
+    if lookup.response is not None:
+        return lookup.response
+    response = execute()
+    store_search_response(lookup, response)
+    return response
+
+
+async def async_cached_search_response(*, index, body, object_types, execute):
+    """Like cached_search_response, for a search run by a coroutine function
+
+    Args:
+        index (str): Comma separated list of aliases being searched
+        body (dict): The query body sent to OpenSearch
+        object_types (iterable of str): The object types of the indexes being searched
+        execute (callable): Coroutine function which runs the search and returns the response
+
+    Returns:
+        dict: The search response
+
+    """
+    lookup = await sync_to_async(lookup_cached_search_response)(
+        index=index, body=body, object_types=object_types
+    )
+    if lookup.response is not None:
+        return lookup.response
+    response = await execute()
+    await sync_to_async(store_search_response)(lookup, response)
+    return response
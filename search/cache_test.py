@@ -0,0 +1,119 @@
+"""Tests for search response caching"""
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+
+from search.cache import (
+    async_cached_search_response,
+    bump_index_generation,
+    cached_search_response,
+    make_response_cache_key,
+)
+from search.constants import COURSE_TYPE, VIDEO_TYPE
+
+
+@pytest.fixture(autouse=True)
+def response_cache(settings):
+    """Use the local memory cache for search responses"""
+    settings.OPENSEARCH_RESPONSE_CACHE_ENABLED = True
+    settings.OPENSEARCH_RESPONSE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_make_response_cache_key():
+    """The cache key should not depend on key or alias ordering"""
+    assert make_response_cache_key(
+        "b,a", {"query": {"match_all": {}}, "size": 10}
+    ) == make_response_cache_key("a,b", {"size": 10, "query": {"match_all": {}}})
+    assert make_response_cache_key("a", {"size": 10}) != make_response_cache_key(
+        "a", {"size": 20}
+    )
+    assert make_response_cache_key("a", {"size": 10}) != make_response_cache_key(
+        "b", {"size": 10}
+    )
+
+
+def test_cached_search_response(mocker):
+    """The response should be reused until an index generation changes"""
+    execute = mocker.Mock(side_effect=[{"hits": 1}, {"hits": 2}, {"hits": 3}])
+
+    def _search():
+        return cached_search_response(
+            index="testindex_course_default",
+            body={"size": 10},
+            object_types=[COURSE_TYPE],
+            execute=execute,
+        )
+
+    assert _search() == {"hits": 1}
+    assert _search() == {"hits": 1}
+    assert execute.call_count == 1
+
+    bump_index_generation([VIDEO_TYPE])
+    assert _search() == {"hits": 1}
+    assert execute.call_count == 1
+
+    bump_index_generation([COURSE_TYPE])
+    assert _search() == {"hits": 2}
+    assert _search() == {"hits": 3}
+    assert execute.call_count == 3
+
+
+def test_cached_search_response_after_refresh_delay(mocker, response_cache):
+    """Responses should be cached again once the dirty flag expires"""
+    execute = mocker.Mock(side_effect=[{"hits": 1}, {"hits": 2}])
+    bump_index_generation([COURSE_TYPE])
+    response_cache.delete(f"search:dirty:{COURSE_TYPE}")
+
+    for _ in range(2):
+        assert cached_search_response(
+            index="testindex_course_default",
+            body={"size": 10},
+            object_types=[COURSE_TYPE],
+            execute=execute,
+        ) == {"hits": 1}
+    assert execute.call_count == 1
+
+
+def test_bump_index_generation_disabled(settings, response_cache):
+    """bump_index_generation should be a no-op if the response cache is disabled"""
+    settings.OPENSEARCH_RESPONSE_CACHE_ENABLED = False
+    bump_index_generation([COURSE_TYPE])
+    assert response_cache.get(f"search:generation:{COURSE_TYPE}") is None
+
+
+def test_cached_search_response_cache_error(mocker):
+    """The search should still execute if the cache is unavailable"""
+    mocker.patch(
+        "search.cache.get_response_cache",
+        return_value=mocker.Mock(get_many=mocker.Mock(side_effect=ConnectionError)),
+    )
+    execute = mocker.Mock(return_value={"hits": 1})
+    assert cached_search_response(
+        index="testindex_course_default",
+        body={},
+        object_types=[COURSE_TYPE],
+        execute=execute,
+    ) == {"hits": 1}
+
+
+def test_async_cached_search_response(mocker):
+    """Responses of async searches should be cached like the others"""
+    execute = mocker.AsyncMock(side_effect=[{"hits": 1}, {"hits": 2}])
+
+    def _search():
+        return async_to_sync(async_cached_search_response)(
+            index="testindex_course_default",
+            body={"size": 10},
+            object_types=[COURSE_TYPE],
+            execute=execute,
+        )
+
+    assert _search() == {"hits": 1}
+    assert _search() == {"hits": 1}
+    bump_index_generation([COURSE_TYPE])
+    assert _search() == {"hits": 2}
+    assert execute.await_count == 2
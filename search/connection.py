@@ -1,12 +1,55 @@
 """OpenSearch connection functionality
 """
+import asyncio
+import logging
+import threading
+import time
 import uuid
+import weakref
 from functools import partial
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from opensearch_dsl.connections import connections
 
+try:
+    from opensearchpy import AsyncOpenSearch
+except ImportError:  # opensearch-py only provides it if aiohttp is installed
+    AsyncOpenSearch = None
+
 from search.constants import VALID_OBJECT_TYPES
+from search.indexing_state import get_indexing_state_cache
+
+log = logging.getLogger(__name__)
+
+ALIAS_GENERATION_KEY = "search:alias_generation"
+# How often a process reads the shared alias generation, rather than on every alias lookup
+ALIAS_GENERATION_CHECK_SECONDS = 1
+
+_alias_registry_lock = threading.Lock()
+_alias_registry = {
+    "aliases": None,
+    "expires_at": 0,
+    "generation": None,
+    "generation_checked_at": None,
+}
+# One async client per event loop, since its aiohttp session can only be used in the loop it was created in,
+# with the async generator which closes it when the loop shuts down
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_connection_options():
+    """Get the options of the clients for the OpenSearch cluster"""
+    http_auth = settings.OPENSEARCH_HTTP_AUTH
+    use_ssl = http_auth is not None
+    return {
+        "hosts": [settings.OPENSEARCH_URL],
+        "http_auth": http_auth,
+        "use_ssl": use_ssl,
+        "timeout": settings.OPENSEARCH_DEFAULT_TIMEOUT,
+        # make sure we verify SSL certificates (off by default)
+        "verify_certs": use_ssl,
+    }
 
 
 def configure_connections():
@@ -15,18 +58,11 @@ def configure_connections():
     This should only be called once
     """
     # this is the default connection
-    http_auth = settings.OPENSEARCH_HTTP_AUTH
-    use_ssl = http_auth is not None
     # configure() lazily creates connections when get_connection() is called
     connections.configure(
         default={
-            "hosts": [settings.OPENSEARCH_URL],
-            "http_auth": http_auth,
-            "use_ssl": use_ssl,
-            "timeout": settings.OPENSEARCH_DEFAULT_TIMEOUT,
+            **_get_connection_options(),
             "connections_per_node": settings.OPENSEARCH_CONNECTIONS_PER_NODE,
-            # make sure we verify SSL certificates (off by default)
-            "verify_certs": use_ssl,
         }
     )
 
@@ -41,6 +77,55 @@ def get_conn():
     return connections.get_connection()
 
 
+async def _close_with_loop(loop, client):
+    """Async generator which closes an async client when its event loop shuts down
+
+    asyncio.run and asgiref's async_to_sync close the async generators of a loop before
+    closing the loop, so a client isn't leaked for each loop when async views are served by
+    WSGI, where every request runs in a new loop.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The event loop of the client
+        client (opensearchpy.AsyncOpenSearch): The client to close
+
+    """
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.close()
+
+
+async def get_async_conn():
+    """Get the async client shared by the searches running in the current event loop
+
+    Requests from every coroutine in the loop share its pool of at most
+    OPENSEARCH_CONNECTIONS_PER_NODE connections per node. The client is closed when the
+    loop shuts down.
+
+    Returns:
+        opensearchpy.AsyncOpenSearch: An async OpenSearch client
+
+    """
+    if AsyncOpenSearch is None:
+        raise ImproperlyConfigured(
+            "The async search views need aiohttp, install opensearch-py[async]"
+        )
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        client = AsyncOpenSearch(
+            **_get_connection_options(),
+            maxsize=settings.OPENSEARCH_CONNECTIONS_PER_NODE,
+        )
+        closer = _close_with_loop(loop, client)
+        # The loop only keeps a weak reference to its async generators
+        entry = _async_clients[loop] = (client, closer)
+        # Starting the generator registers it with the loop
+        await closer.__anext__()
+    return entry[0]
+
+
 def make_backing_index_name(object_type):
     """Make a unique name for use for a backing index
 
@@ -76,6 +161,100 @@ get_default_alias_name = partial(make_alias_name, False)
 get_reindexing_alias_name = partial(make_alias_name, True)
 
 
+def get_retired_alias_name(object_type):
+    """Make the name of the alias of backing indexes which were replaced but are kept for a rollback
+
+    Args:
+        object_type(str): The object type of the index (post, comment, etc)
+
+    Returns:
+        str: The name of the alias
+
+    """
+    return f"{settings.OPENSEARCH_INDEX}_{object_type}_retired"
+
+
+def reset_alias_registry():
+    """Clear the cached set of existing aliases in this process only"""
+    with _alias_registry_lock:
+        _alias_registry["aliases"] = None
+        _alias_registry["expires_at"] = 0
+        _alias_registry["generation"] = None
+        _alias_registry["generation_checked_at"] = None
+
+
+def invalidate_alias_registry():
+    """Clear the cached set of existing aliases in every process, after aliases were changed
+
+    The registry of this process is cleared, and the shared alias generation is incremented
+    so other processes load the aliases again on their next lookup.
+    """
+    reset_alias_registry()
+    try:
+        cache = get_indexing_state_cache()
+        cache.add(ALIAS_GENERATION_KEY, 0, timeout=None)
+        cache.incr(ALIAS_GENERATION_KEY)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to bump the alias generation")
+
+
+def _get_alias_generation():
+    """Get the shared alias generation, or None if it can't be read"""
+    try:
+        return get_indexing_state_cache().get(ALIAS_GENERATION_KEY, 0)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to read the alias generation")
+        return None
+
+
+def get_existing_aliases(conn):
+    """Returns the names of all aliases for this application's indexes
+
+    The aliases are loaded with a single request and kept for OPENSEARCH_ALIAS_CACHE_TIMEOUT
+    seconds, so that indexing a document doesn't need a round trip per alias. The shared alias
+    generation is read at most every ALIAS_GENERATION_CHECK_SECONDS, and the aliases are loaded
+    again sooner if another process changed them and bumped it.
+
+    Args:
+        conn(opensearch.client.Opensearch): An Opensearch client
+
+    Returns:
+        frozenset of str: Aliases which exist
+
+    """
+    with _alias_registry_lock:
+        now = time.monotonic()
+        checked_at = _alias_registry["generation_checked_at"]
+        if (
+            _alias_registry["aliases"] is not None
+            and now < _alias_registry["expires_at"]
+            and checked_at is not None
+            and now < checked_at + ALIAS_GENERATION_CHECK_SECONDS
+        ):
+            return _alias_registry["aliases"]
+
+    generation = _get_alias_generation()
+    with _alias_registry_lock:
+        now = time.monotonic()
+        if (
+            _alias_registry["aliases"] is None
+            or now >= _alias_registry["expires_at"]
+            or generation != _alias_registry["generation"]
+        ):
+            indices = conn.indices.get_alias(index=f"{settings.OPENSEARCH_INDEX}_*")
+            _alias_registry["aliases"] = frozenset(
+                alias
+                for index_info in indices.values()
+                for alias in index_info.get("aliases", {})
+            )
+            _alias_registry["expires_at"] = (
+                now + settings.OPENSEARCH_ALIAS_CACHE_TIMEOUT
+            )
+            _alias_registry["generation"] = generation
+        _alias_registry["generation_checked_at"] = now
+        return _alias_registry["aliases"]
+
+
 def get_active_aliases(conn, *, object_types=None, include_reindexing=True):
     """Returns aliases which exist for specified object types
 
@@ -92,10 +271,11 @@ def get_active_aliases(conn, *, object_types=None, include_reindexing=True):
         object_types = VALID_OBJECT_TYPES
     if include_reindexing:
         return active_aliases_with_reindexing(conn, object_types)
+    existing_aliases = get_existing_aliases(conn)
     return [
         alias
         for alias in [get_default_alias_name(obj) for obj in object_types]
-        if conn.indices.exists(alias)
+        if alias in existing_aliases
     ]
 
 
@@ -107,6 +287,7 @@ def active_aliases_with_reindexing(conn, object_types):
         object_types(list of str): list of object types (post, comment, etc)
 
     """
+    existing_aliases = get_existing_aliases(conn)
     return [
         alias
         for alias_tuple in [
@@ -114,7 +295,7 @@ def active_aliases_with_reindexing(conn, object_types):
             for obj in object_types
         ]
         for alias in alias_tuple
-        if conn.indices.exists(alias)
+        if alias in existing_aliases
     ]
 
 
@@ -1,9 +1,25 @@
 """Tests for the indexing API
 """
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
 
-from search.connection import get_active_aliases
-from search.constants import COURSE_TYPE
+from search.connection import (
+    ALIAS_GENERATION_KEY,
+    _async_clients,
+    _get_alias_generation,
+    get_active_aliases,
+    get_async_conn,
+    get_existing_aliases,
+    invalidate_alias_registry,
+)
+from search.constants import COURSE_TYPE, VALID_OBJECT_TYPES
+
+
+def _mock_get_alias(aliases):
+    """Return value for conn.indices.get_alias with one backing index per alias"""
+    return {f"{alias}_backing": {"aliases": {alias: {}}} for alias in aliases}
 
 
 @pytest.mark.parametrize("include_reindexing", [True, False])
@@ -12,7 +28,15 @@ from search.constants import COURSE_TYPE
 def test_get_active_aliases(mocker, include_reindexing, indexes_exist, object_types):
     """Test for get_active_aliases"""
     conn = mocker.Mock()
-    conn.indices.exists.return_value = indexes_exist
+    conn.indices.get_alias.return_value = _mock_get_alias(
+        [
+            f"testindex_{object_type}_{suffix}"
+            for object_type in VALID_OBJECT_TYPES
+            for suffix in ("default", "reindexing")
+        ]
+        if indexes_exist
+        else []
+    )
 
     active_aliases = get_active_aliases(
         conn, object_types=object_types, include_reindexing=include_reindexing
@@ -59,3 +83,113 @@ def test_get_active_aliases(mocker, include_reindexing, indexes_exist, object_ty
             ]
     else:
         assert active_aliases == []
+
+
+@pytest.fixture
+def state_cache(settings):
+    """Use the local memory cache for indexing state"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.mark.usefixtures("state_cache")
+def test_get_existing_aliases_cached(mocker, settings):
+    """get_existing_aliases should load aliases once until the timeout passes or the registry is invalidated"""
+    settings.OPENSEARCH_ALIAS_CACHE_TIMEOUT = 10
+    mock_time = mocker.patch("search.connection.time.monotonic", return_value=100)
+    conn = mocker.Mock()
+    conn.indices.get_alias.return_value = _mock_get_alias(["testindex_course_default"])
+
+    assert get_existing_aliases(conn) == {"testindex_course_default"}
+    assert get_existing_aliases(conn) == {"testindex_course_default"}
+    conn.indices.get_alias.assert_called_once_with(index="testindex_*")
+
+    mock_time.return_value = 111
+    get_existing_aliases(conn)
+    assert conn.indices.get_alias.call_count == 2
+
+    invalidate_alias_registry()
+    get_existing_aliases(conn)
+    assert conn.indices.get_alias.call_count == 3
+
+
+def test_get_existing_aliases_shared_generation(mocker, settings, state_cache):
+    """Aliases should be loaded again once another process changed them and bumped the alias generation"""
+    settings.OPENSEARCH_ALIAS_CACHE_TIMEOUT = 10
+    mock_time = mocker.patch("search.connection.time.monotonic", return_value=100)
+    conn = mocker.Mock()
+    conn.indices.get_alias.return_value = _mock_get_alias(["testindex_course_default"])
+    assert get_existing_aliases(conn) == {"testindex_course_default"}
+
+    conn.indices.get_alias.return_value = _mock_get_alias(
+        ["testindex_course_default", "testindex_course_reindexing"]
+    )
+    state_cache.add(ALIAS_GENERATION_KEY, 0)
+    state_cache.incr(ALIAS_GENERATION_KEY)
+    mock_get_generation = mocker.patch(
+        "search.connection._get_alias_generation",
+        wraps=_get_alias_generation,
+    )
+    # The shared generation isn't read again until the check interval passed
+    assert get_existing_aliases(conn) == {"testindex_course_default"}
+    mock_get_generation.assert_not_called()
+
+    mock_time.return_value = 101
+    assert get_existing_aliases(conn) == {
+        "testindex_course_default",
+        "testindex_course_reindexing",
+    }
+    get_existing_aliases(conn)
+    assert conn.indices.get_alias.call_count == 2
+    mock_get_generation.assert_called_once_with()
+
+
+def test_get_existing_aliases_generation_error(mocker, settings):
+    """The aliases should be kept until the timeout passes if the alias generation can't be read"""
+    settings.OPENSEARCH_ALIAS_CACHE_TIMEOUT = 10
+    mocker.patch("search.connection.time.monotonic", return_value=100)
+    mocker.patch(
+        "search.connection.get_indexing_state_cache", side_effect=ConnectionError
+    )
+    conn = mocker.Mock()
+    conn.indices.get_alias.return_value = _mock_get_alias(["testindex_course_default"])
+    get_existing_aliases(conn)
+    get_existing_aliases(conn)
+    conn.indices.get_alias.assert_called_once()
+    invalidate_alias_registry()
+    get_existing_aliases(conn)
+    assert conn.indices.get_alias.call_count == 2
+
+
+def test_get_async_conn(mocker, settings):
+    """One async client should be shared in each event loop, and closed when the loop ends"""
+    settings.OPENSEARCH_CONNECTIONS_PER_NODE = 7
+    mock_client = mocker.patch("search.connection.AsyncOpenSearch")
+    mock_client.return_value.close = mocker.AsyncMock()
+
+    async def _get_twice():
+        return await get_async_conn(), await get_async_conn()
+
+    first, second = async_to_sync(_get_twice)()
+    assert first is second is mock_client.return_value
+    assert mock_client.call_count == 1
+    assert mock_client.call_args[1]["maxsize"] == 7
+    mock_client.return_value.close.assert_awaited_once()
+    async_to_sync(_get_twice)()
+    assert mock_client.call_count == 2
+    assert mock_client.return_value.close.await_count == 2
+    assert len(_async_clients) == 0
+
+
+def test_get_async_conn_not_installed(mocker):
+    """get_async_conn should explain that aiohttp is needed if it isn't installed"""
+    mocker.patch("search.connection.AsyncOpenSearch", None)
+
+    async def _get():
+        return await get_async_conn()
+
+    with pytest.raises(ImproperlyConfigured):
+        async_to_sync(_get)()
@@ -27,6 +27,16 @@ LEARNING_RESOURCE_TYPES = (
     RESOURCE_FILE_TYPE,
 )
 
+# The fields searched for learning resources similar to another one
+SIMILAR_RESOURCE_RELEVANT_FIELDS = ["title", "short_description"]
+# The fields of courses searched for the topics of text similar to theirs
+SIMILAR_TOPIC_RELEVANT_FIELDS = [
+    "course_id",
+    "title",
+    "short_description",
+    "full_description",
+]
+
 VALID_OBJECT_TYPES = (
     PROFILE_TYPE,
     COURSE_TYPE,
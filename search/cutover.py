@@ -0,0 +1,327 @@
+"""Warming up and validating a new backing index before the default alias is switched to it"""
+import json
+import logging
+import random
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from opensearchpy.exceptions import TransportError
+
+from open_discussions.utils import now_in_utc
+from search.cache import bump_index_generation
+from search.connection import (
+    get_conn,
+    get_default_alias_name,
+    get_retired_alias_name,
+    invalidate_alias_registry,
+)
+from search.constants import ALIAS_ALL_INDICES
+from search.exceptions import ReindexException
+from search.fingerprints import invalidate_all_fingerprints
+from search.indexing_state import get_indexing_state_cache
+
+log = logging.getLogger(__name__)
+
+QUERY_SAMPLES_KEY_PREFIX = "search:cutover:queries"
+RETIRED_ON_KEY_PREFIX = "search:cutover:retired_on"
+
+# The outcome of comparing a new backing index with the one it replaces
+CutoverReport = namedtuple(
+    "CutoverReport",
+    [
+        "object_type",
+        "new_index",
+        "old_index",
+        "new_count",
+        "old_count",
+        "queries",
+        "failed_queries",
+        "overlap",
+        "problems",
+    ],
+)
+
+
+def _query_samples_key(object_type):
+    """Redis key for the list of sampled queries of an object type"""
+    return f"{QUERY_SAMPLES_KEY_PREFIX}:{object_type}"
+
+
+def get_samples_connection():
+    """Get the redis client used for the sampled queries
+
+    Returns:
+        redis.Redis: The redis client
+
+    """
+    return get_redis_connection(settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS)
+
+
+def record_query_sample(object_types, search):
+    """Record one in OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE searches, to replay against new indexes
+
+    Only the latest OPENSEARCH_CUTOVER_QUERY_SAMPLE_SIZE queries are kept for each object type.
+
+    Args:
+        object_types (iterable of str): The object types of the indexes being searched
+        search (opensearch_dsl.Search): The search being executed
+
+    """
+    rate = settings.OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE
+    if not rate or random.randrange(rate):
+        return
+    try:
+        encoded = json.dumps(search.to_dict(), default=str)
+        pipe = get_samples_connection().pipeline()
+        for object_type in object_types:
+            key = _query_samples_key(object_type)
+            pipe.lpush(key, encoded)
+            pipe.ltrim(key, 0, settings.OPENSEARCH_CUTOVER_QUERY_SAMPLE_SIZE - 1)
+        pipe.execute()
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to record a sample of a search query")
+
+
+def get_query_samples(object_type):
+    """Get the sampled queries for an object type, latest first
+
+    Args:
+        object_type (str): The object type
+
+    Returns:
+        list of dict: The query bodies
+
+    """
+    try:
+        encoded = get_samples_connection().lrange(
+            _query_samples_key(object_type), 0, -1
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to read the sampled search queries for %s", object_type)
+        return []
+    return [json.loads(body) for body in encoded]
+
+
+def _hit_ids(conn, index, body):
+    """Run a query and return the ids of its hits"""
+    response = conn.search(index=index, body={**body, "_source": False})
+    return {hit["_id"] for hit in response["hits"]["hits"]}
+
+
+def _overlap(ids, other_ids):
+    """The fraction of the larger result set which is in both result sets"""
+    if not ids and not other_ids:
+        return 1
+    return len(ids & other_ids) / max(len(ids), len(other_ids))
+
+
+def validate_cutover(object_type, new_index, old_index):
+    """Replay sampled queries against a new backing index to warm it, and compare it with the old one
+
+    The new index fails validation if it has more than OPENSEARCH_CUTOVER_MAX_COUNT_DROP_PERCENT
+    fewer documents than the old one, if the top hits of the sampled queries overlap less than
+    OPENSEARCH_CUTOVER_MIN_OVERLAP_PERCENT on average, or if any query which works on the old
+    index fails on the new one.
+
+    Args:
+        object_type (str): The object type of the indexes
+        new_index (str): The new backing index
+        old_index (str): The backing index the default alias points to, if any
+
+    Returns:
+        CutoverReport: The comparison, which passed if it has no problems
+
+    """
+    conn = get_conn()
+    queries = get_query_samples(object_type)[
+        : settings.OPENSEARCH_CUTOVER_WARMUP_QUERIES
+    ]
+    overlaps = []
+    failed_queries = 0
+    for body in queries:
+        old_ids = None
+        if old_index:
+            try:
+                old_ids = _hit_ids(conn, old_index, body)
+            except TransportError:
+                # The query is broken regardless of the index, so it can only warm it
+                pass
+        try:
+            new_ids = _hit_ids(conn, new_index, body)
+        except TransportError as exc:
+            if old_ids is not None:
+                log.warning("Sampled query failed on %s: %s", new_index, exc)
+                failed_queries += 1
+            continue
+        if old_ids is not None:
+            overlaps.append(_overlap(new_ids, old_ids))
+
+    new_count = conn.count(index=new_index)["count"]
+    old_count = conn.count(index=old_index)["count"] if old_index else None
+    overlap = sum(overlaps) / len(overlaps) if overlaps else None
+    problems = []
+    if old_count is not None:
+        max_drop = settings.OPENSEARCH_CUTOVER_MAX_COUNT_DROP_PERCENT
+        if new_count < old_count * (100 - max_drop) / 100:
+            problems.append(
+                f"{new_count} documents is more than {max_drop}% fewer than {old_count}"
+            )
+    min_overlap = settings.OPENSEARCH_CUTOVER_MIN_OVERLAP_PERCENT
+    if overlap is not None and overlap * 100 < min_overlap:
+        problems.append(
+            f"the top hits of sampled queries overlap {overlap:.0%}, less than {min_overlap}%"
+        )
+    if failed_queries:
+        problems.append(f"{failed_queries} sampled queries failed")
+
+    report = CutoverReport(
+        object_type=object_type,
+        new_index=new_index,
+        old_index=old_index,
+        new_count=new_count,
+        old_count=old_count,
+        queries=len(queries),
+        failed_queries=failed_queries,
+        overlap=overlap,
+        problems=problems,
+    )
+    log.info("Validated cutover: %s", report)
+    return report
+
+
+def _retired_on_key(index):
+    """Cache key for the time a backing index was retired"""
+    return f"{RETIRED_ON_KEY_PREFIX}:{index}"
+
+
+def mark_retired(indexes):
+    """Record that some backing indexes were just replaced, starting their retention period
+
+    Args:
+        indexes (list of str): The backing indexes
+
+    """
+    retired_on = now_in_utc().isoformat()
+    get_indexing_state_cache().set_many(
+        {_retired_on_key(index): retired_on for index in indexes}, timeout=None
+    )
+
+
+def get_retired_indexes(object_type):
+    """Get the backing indexes of an object type which are kept in case of a rollback
+
+    Args:
+        object_type (str): The object type
+
+    Returns:
+        list of (str, datetime): The retired indexes and when they were retired, latest first
+
+    """
+    conn = get_conn()
+    retired_alias = get_retired_alias_name(object_type)
+    if not conn.indices.exists_alias(name=retired_alias):
+        return []
+    indexes = list(conn.indices.get_alias(name=retired_alias))
+    cache = get_indexing_state_cache()
+    values = cache.get_many([_retired_on_key(index) for index in indexes])
+    missing = [index for index in indexes if _retired_on_key(index) not in values]
+    if missing:
+        # Without a record of when they were retired, the retention period starts now
+        mark_retired(missing)
+    now = now_in_utc()
+    retired = [
+        (
+            index,
+            datetime.fromisoformat(values[_retired_on_key(index)])
+            if _retired_on_key(index) in values
+            else now,
+        )
+        for index in indexes
+    ]
+    return sorted(retired, key=lambda item: item[1], reverse=True)
+
+
+def delete_expired_retired_indexes(object_type):
+    """Delete the retired backing indexes which were kept for OPENSEARCH_CUTOVER_RETENTION_SECONDS
+
+    Args:
+        object_type (str): The object type
+
+    Returns:
+        list of str: The deleted indexes
+
+    """
+    conn = get_conn()
+    now = now_in_utc()
+    deleted = []
+    for index, retired_on in get_retired_indexes(object_type):
+        if (
+            now - retired_on
+        ).total_seconds() >= settings.OPENSEARCH_CUTOVER_RETENTION_SECONDS:
+            log.info("Deleting retired index %s", index)
+            conn.indices.delete(index)
+            deleted.append(index)
+    if deleted:
+        get_indexing_state_cache().delete_many(
+            [_retired_on_key(index) for index in deleted]
+        )
+        invalidate_alias_registry()
+    return deleted
+
+
+def rollback_cutover(object_type):
+    """Point the default alias back at the latest retired backing index, retiring the current one
+
+    The retired index didn't receive updates while it was retired, so an update_index should
+    be run afterwards.
+
+    Args:
+        object_type (str): The object type
+
+    Returns:
+        str: The backing index the default alias points to now
+
+    """
+    retired = get_retired_indexes(object_type)
+    if not retired:
+        raise ReindexException(
+            f"There is no retired {object_type} index to roll back to"
+        )
+    target = retired[0][0]
+    conn = get_conn()
+    default_alias = get_default_alias_name(object_type)
+    global_alias = get_default_alias_name(ALIAS_ALL_INDICES)
+    retired_alias = get_retired_alias_name(object_type)
+    current = (
+        list(conn.indices.get_alias(name=default_alias))
+        if conn.indices.exists_alias(name=default_alias)
+        else []
+    )
+    actions = []
+    for index in current:
+        actions.extend(
+            [
+                {"remove": {"index": index, "alias": default_alias}},
+                {"remove": {"index": index, "alias": global_alias}},
+                {"add": {"index": index, "alias": retired_alias}},
+            ]
+        )
+    actions.extend(
+        [
+            {"remove": {"index": target, "alias": retired_alias}},
+            {"add": {"index": target, "alias": default_alias}},
+            {"add": {"index": target, "alias": global_alias}},
+        ]
+    )
+    conn.indices.update_aliases({"actions": actions})
+    mark_retired(current)
+    get_indexing_state_cache().delete(_retired_on_key(target))
+    # The fingerprints are of documents written to the index which was just retired, and
+    # the retired index is missing any changes made since the cutover
+    invalidate_all_fingerprints([object_type])
+    bump_index_generation([object_type])
+    invalidate_alias_registry()
+    log.info("Rolled back the %s index from %s to %s", object_type, current, target)
+    return target
@@ -0,0 +1,215 @@
+"""Tests for warming up, validating and rolling back recreated indexes"""
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from opensearchpy.exceptions import RequestError
+
+from open_discussions.utils import now_in_utc
+from search.constants import COURSE_TYPE
+from search.cutover import (
+    delete_expired_retired_indexes,
+    get_query_samples,
+    get_retired_indexes,
+    mark_retired,
+    record_query_sample,
+    rollback_cutover,
+    validate_cutover,
+)
+from search.exceptions import ReindexException
+from search.fingerprints import DocumentFingerprints
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for indexing state"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+class FakeIndices:
+    """Just enough of the indices client for aliases"""
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self.deleted = []
+
+    def exists_alias(self, name):
+        """Return whether an alias points to any index"""
+        return bool(self.aliases.get(name))
+
+    def get_alias(self, name):
+        """Get the indexes of an alias"""
+        return {index: {} for index in self.aliases[name]}
+
+    def update_aliases(self, body):
+        """Apply alias actions"""
+        for action in body["actions"]:
+            ((op_type, params),) = action.items()
+            indexes = self.aliases.setdefault(params["alias"], [])
+            if op_type == "add":
+                indexes.append(params["index"])
+            else:
+                indexes.remove(params["index"])
+
+    def delete(self, index):
+        """Delete an index"""
+        self.deleted.append(index)
+
+
+@pytest.fixture
+def fake_conn(mocker):
+    """Mock the OpenSearch connection"""
+    conn = mocker.Mock()
+    mocker.patch("search.cutover.get_conn", return_value=conn)
+    return conn
+
+
+def test_record_query_sample(mocker, settings):
+    """One in OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE queries should be kept for each object type"""
+    settings.OPENSEARCH_CUTOVER_QUERY_SAMPLE_RATE = 3
+    settings.OPENSEARCH_CUTOVER_QUERY_SAMPLE_SIZE = 10
+    mock_redis = mocker.patch("search.cutover.get_samples_connection").return_value
+    mocker.patch("search.cutover.random.randrange", side_effect=[1, 0])
+    search = mocker.Mock()
+    search.to_dict.return_value = {"query": {"match_all": {}}}
+
+    record_query_sample([COURSE_TYPE], search)
+    mock_redis.pipeline.assert_not_called()
+    record_query_sample([COURSE_TYPE], search)
+    pipe = mock_redis.pipeline.return_value
+    pipe.lpush.assert_called_once_with(
+        "search:cutover:queries:course", '{"query": {"match_all": {}}}'
+    )
+    pipe.ltrim.assert_called_once_with("search:cutover:queries:course", 0, 9)
+
+
+def test_get_query_samples_error(mocker):
+    """Sampled queries shouldn't be required to switch indexes"""
+    mocker.patch("search.cutover.get_samples_connection", side_effect=ConnectionError)
+    assert get_query_samples(COURSE_TYPE) == []
+
+
+@pytest.mark.parametrize(
+    "new_count, new_hits, new_error, expected_problems",
+    [
+        (100, ["a", "b"], False, []),
+        (90, ["a", "b"], False, ["90 documents is more than 5% fewer than 100"]),
+        (100, ["c", "d"], False, ["overlap 0%, less than 50%"]),
+        (100, ["a", "b"], True, ["1 sampled queries failed"]),
+    ],
+)
+def test_validate_cutover(
+    mocker, settings, fake_conn, new_count, new_hits, new_error, expected_problems
+):  # pylint: disable=too-many-arguments
+    """validate_cutover should replay sampled queries and compare counts and top hits"""
+    settings.OPENSEARCH_CUTOVER_MAX_COUNT_DROP_PERCENT = 5
+    settings.OPENSEARCH_CUTOVER_MIN_OVERLAP_PERCENT = 50
+    settings.OPENSEARCH_CUTOVER_WARMUP_QUERIES = 2
+    queries = [{"query": {"match": {"title": "a"}}}, {"query": {"broken": {}}}, {}]
+    mocker.patch("search.cutover.get_query_samples", return_value=queries)
+    hits = {"new": new_hits, "old": ["a", "b"]}
+
+    def search(index, body):
+        """Fail the broken query everywhere, and the other one on the new index if requested"""
+        assert body["_source"] is False
+        if "broken" in body["query"] or (index == "new" and new_error):
+            raise RequestError(400, "parsing_exception", {})
+        return {"hits": {"hits": [{"_id": _id} for _id in hits[index]]}}
+
+    fake_conn.search.side_effect = search
+    fake_conn.count.side_effect = lambda index: {
+        "count": new_count if index == "new" else 100
+    }
+
+    report = validate_cutover(COURSE_TYPE, "new", "old")
+    assert report.queries == 2
+    assert fake_conn.search.call_count == 4
+    assert len(report.problems) == len(expected_problems)
+    for problem, expected in zip(report.problems, expected_problems):
+        assert expected in problem
+
+
+def test_validate_cutover_no_old_index(mocker, fake_conn):
+    """Without an index to compare with, the new index should only be warmed up"""
+    mocker.patch("search.cutover.get_query_samples", return_value=[{}])
+    fake_conn.search.side_effect = RequestError(400, "error", {})
+    fake_conn.count.return_value = {"count": 0}
+    report = validate_cutover(COURSE_TYPE, "new", None)
+    assert report.problems == []
+    assert report.old_count is None
+
+
+def test_retired_indexes(mocker, settings, fake_conn):
+    """Retired indexes should be kept for the retention period, then deleted"""
+    settings.OPENSEARCH_CUTOVER_RETENTION_SECONDS = 60
+    retired_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_retired"
+    fake_conn.indices = FakeIndices({retired_alias: ["old", "older"]})
+    mark_retired(["older"])
+    mocker.patch(
+        "search.cutover.now_in_utc", return_value=now_in_utc() + timedelta(seconds=30)
+    )
+    mark_retired(["old"])
+    assert [index for index, _ in get_retired_indexes(COURSE_TYPE)] == [
+        "old",
+        "older",
+    ]
+
+    mocker.patch(
+        "search.cutover.now_in_utc", return_value=now_in_utc() + timedelta(seconds=70)
+    )
+    assert delete_expired_retired_indexes(COURSE_TYPE) == ["older"]
+    assert fake_conn.indices.deleted == ["older"]
+
+
+def test_rollback_cutover_fingerprints(mocker, settings, fake_conn):
+    """Documents should be written again after a rollback, since the retired index lacks recent changes"""
+    settings.OPENSEARCH_FINGERPRINTS_ENABLED = True
+    mocker.patch("search.cutover.bump_index_generation")
+    prefix = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}"
+    fake_conn.indices = FakeIndices(
+        {
+            f"{prefix}_default": ["new"],
+            f"{settings.OPENSEARCH_INDEX}_all_default": ["new"],
+            f"{prefix}_retired": ["old"],
+        }
+    )
+    documents = [{"_id": "course_1", "title": "Course"}]
+    fingerprints = DocumentFingerprints(COURSE_TYPE)
+    assert list(fingerprints.filter_changed(documents)) == documents
+    fingerprints.save()
+    assert list(DocumentFingerprints(COURSE_TYPE).filter_changed(documents)) == []
+
+    rollback_cutover(COURSE_TYPE)
+    assert (
+        list(DocumentFingerprints(COURSE_TYPE).filter_changed(documents)) == documents
+    )
+
+
+def test_rollback_cutover(mocker, settings, fake_conn):
+    """rollback_cutover should point the default alias at the latest retired index"""
+    mock_bump = mocker.patch("search.cutover.bump_index_generation")
+    prefix = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}"
+    global_alias = f"{settings.OPENSEARCH_INDEX}_all_default"
+    fake_conn.indices = FakeIndices(
+        {
+            f"{prefix}_default": ["new"],
+            global_alias: ["new"],
+            f"{prefix}_retired": ["old"],
+        }
+    )
+
+    assert rollback_cutover(COURSE_TYPE) == "old"
+    assert fake_conn.indices.aliases == {
+        f"{prefix}_default": ["old"],
+        global_alias: ["old"],
+        f"{prefix}_retired": ["new"],
+    }
+    mock_bump.assert_called_once_with([COURSE_TYPE])
+
+    fake_conn.indices.aliases[f"{prefix}_retired"] = []
+    with pytest.raises(ReindexException):
+        rollback_cutover(COURSE_TYPE)
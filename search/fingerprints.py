@@ -0,0 +1,220 @@
+"""Fingerprints of indexed documents, used to skip writing documents which haven't changed"""
+import hashlib
+import logging
+
+from django.conf import settings
+
+from open_discussions.utils import chunks
+from search.bulk import encode_json
+from search.indexing_state import get_indexing_state_cache
+
+log = logging.getLogger(__name__)
+
+FINGERPRINT_KEY_PREFIX = "search:fingerprint"
+GENERATION_KEY_PREFIX = "search:fingerprint_generation"
+STATS_KEY_PREFIX = "search:fingerprint_stats"
+
+
+def fingerprint_document(document):
+    """Compute a hash of a serialized document
+
+    Args:
+        document (dict): A serialized document
+
+    Returns:
+        str: The hex digest of the document
+
+    """
+    return hashlib.blake2b(encode_json(document), digest_size=16).hexdigest()
+
+
+def _fingerprint_key(object_type, doc_id):
+    """Cache key for the fingerprint of a document"""
+    return f"{FINGERPRINT_KEY_PREFIX}:{object_type}:{doc_id}"
+
+
+def _generation_key(object_type):
+    """Cache key for the fingerprint generation of an object type"""
+    return f"{GENERATION_KEY_PREFIX}:{object_type}"
+
+
+def _stats_key(object_type, stat):
+    """Cache key for a fingerprint counter of an object type"""
+    return f"{STATS_KEY_PREFIX}:{object_type}:{stat}"
+
+
+class DocumentFingerprints:
+    """Filters out documents whose fingerprint matches the one last written, and records
+    the fingerprints of the documents which were written once the write succeeds
+
+    Args:
+        object_type (str): The object type of the documents
+        skip_unchanged (bool): If false, fingerprints are recorded but no documents are skipped
+
+    """
+
+    def __init__(self, object_type, *, skip_unchanged=True):
+        self.object_type = object_type
+        self.enabled = settings.OPENSEARCH_FINGERPRINTS_ENABLED
+        self.skip_unchanged = skip_unchanged
+        self.checked = 0
+        self.skipped = 0
+        self._changed = {}
+
+    def _get_fingerprints(self, doc_ids):
+        """Get the generation and stored fingerprints of some documents"""
+        generation_key = _generation_key(self.object_type)
+        keys = {
+            _fingerprint_key(self.object_type, doc_id): doc_id for doc_id in doc_ids
+        }
+        try:
+            values = get_indexing_state_cache().get_many([generation_key, *keys])
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to read fingerprints for %s", self.object_type)
+            return 0, {}
+        return values.get(generation_key, 0), {
+            keys[key]: value for key, value in values.items() if key in keys
+        }
+
+    def filter_changed(self, documents):
+        """Yield the documents which changed since they were last written
+
+        Deletions are always yielded, and the fingerprints of deleted documents are forgotten.
+
+        Args:
+            documents (iterable of dict): Serialized documents
+
+        Yields:
+            dict: Documents which need to be written
+
+        """
+        if not self.enabled:
+            yield from documents
+            return
+
+        for chunk in chunks(
+            documents, chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE
+        ):
+            deleted = [
+                document["_id"]
+                for document in chunk
+                if document.get("_op_type") == "delete"
+            ]
+            if deleted:
+                # Forget these before deleting, since failures for missing documents are ignored
+                invalidate_fingerprints(self.object_type, deleted)
+            if len(deleted) == len(chunk):
+                yield from chunk
+                continue
+
+            generation, stored = self._get_fingerprints(
+                [document["_id"] for document in chunk]
+            )
+            for document in chunk:
+                doc_id = document["_id"]
+                if document.get("_op_type") == "delete":
+                    yield document
+                    continue
+                fingerprint = f"{generation}:{fingerprint_document(document)}"
+                self.checked += 1
+                if self.skip_unchanged and stored.get(doc_id) == fingerprint:
+                    self.skipped += 1
+                    continue
+                self._changed[doc_id] = fingerprint
+                yield document
+
+    def save(self):
+        """Record the fingerprints of the documents which were written, and update the skip counters"""
+        if not self.enabled:
+            return
+        if self.checked:
+            log.info(
+                "Skipped %d of %d unchanged %s documents",
+                self.skipped,
+                self.checked,
+                self.object_type,
+            )
+        cache = get_indexing_state_cache()
+        try:
+            if self._changed:
+                cache.set_many(
+                    {
+                        _fingerprint_key(self.object_type, doc_id): fingerprint
+                        for doc_id, fingerprint in self._changed.items()
+                    },
+                    timeout=settings.OPENSEARCH_FINGERPRINT_TIMEOUT,
+                )
+            for stat, count in (("checked", self.checked), ("skipped", self.skipped)):
+                if count:
+                    key = _stats_key(self.object_type, stat)
+                    cache.add(key, 0, timeout=None)
+                    cache.incr(key, count)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to save fingerprints for %s", self.object_type)
+        self._changed = {}
+
+
+def invalidate_fingerprints(object_type, doc_ids):
+    """Forget the fingerprints of documents which were modified or deleted some other way
+
+    Args:
+        object_type (str): The object type of the documents
+        doc_ids (list of str): The document ids
+
+    """
+    if not settings.OPENSEARCH_FINGERPRINTS_ENABLED:
+        return
+    try:
+        get_indexing_state_cache().delete_many(
+            [_fingerprint_key(object_type, doc_id) for doc_id in doc_ids]
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to invalidate fingerprints for %s", object_type)
+
+
+def invalidate_all_fingerprints(object_types):
+    """Forget the fingerprints of every document of some object types, for example after
+    an update by query
+
+    Args:
+        object_types (iterable of str): The object types
+
+    """
+    if not settings.OPENSEARCH_FINGERPRINTS_ENABLED:
+        return
+    cache = get_indexing_state_cache()
+    try:
+        for object_type in set(object_types):
+            key = _generation_key(object_type)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to invalidate fingerprints for %s", object_types)
+
+
+def get_fingerprint_stats(object_types):
+    """Get how many documents were checked and skipped as unchanged
+
+    Args:
+        object_types (iterable of str): The object types
+
+    Returns:
+        dict: checked and skipped counts and the skip_ratio, keyed by object type
+
+    """
+    keys = {
+        (object_type, stat): _stats_key(object_type, stat)
+        for object_type in object_types
+        for stat in ("checked", "skipped")
+    }
+    values = get_indexing_state_cache().get_many(list(keys.values()))
+    stats = {}
+    for object_type in object_types:
+        checked = values.get(keys[(object_type, "checked")], 0)
+        skipped = values.get(keys[(object_type, "skipped")], 0)
+        stats[object_type] = {
+            "checked": checked,
+            "skipped": skipped,
+            "skip_ratio": skipped / checked if checked else 0,
+        }
+    return stats
@@ -0,0 +1,78 @@
+"""Tests for document fingerprints"""
+import pytest
+from django.core.cache import caches
+
+from search.constants import COURSE_TYPE, VIDEO_TYPE
+from search.fingerprints import (
+    DocumentFingerprints,
+    get_fingerprint_stats,
+    invalidate_all_fingerprints,
+    invalidate_fingerprints,
+)
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for fingerprints"""
+    settings.OPENSEARCH_FINGERPRINTS_ENABLED = True
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _write(documents, object_type=COURSE_TYPE, **kwargs):
+    """Filter documents, pretend they were written, and return the ones which were"""
+    fingerprints = DocumentFingerprints(object_type, **kwargs)
+    written = list(fingerprints.filter_changed(documents))
+    fingerprints.save()
+    return [document["_id"] for document in written]
+
+
+def _documents(**titles):
+    """Make documents with titles keyed by id"""
+    return [{"_id": _id, "title": title} for _id, title in titles.items()]
+
+
+def test_filter_changed():
+    """Only documents which changed since they were last written should be yielded"""
+    assert _write(_documents(a="a", b="b", c="c")) == ["a", "b", "c"]
+    assert _write(_documents(a="a", b="changed", c="c", d="d")) == ["b", "d"]
+    assert _write(_documents(a="a"), VIDEO_TYPE) == ["a"]
+    assert _write(_documents(a="a", b="changed"), skip_unchanged=False) == ["a", "b"]
+    assert get_fingerprint_stats([COURSE_TYPE, VIDEO_TYPE]) == {
+        COURSE_TYPE: {"checked": 9, "skipped": 2, "skip_ratio": 2 / 9},
+        VIDEO_TYPE: {"checked": 1, "skipped": 0, "skip_ratio": 0},
+    }
+
+
+def test_filter_changed_not_saved():
+    """Fingerprints should only be recorded once the documents are saved"""
+    fingerprints = DocumentFingerprints(COURSE_TYPE)
+    assert len(list(fingerprints.filter_changed(_documents(a="a")))) == 1
+    assert _write(_documents(a="a")) == ["a"]
+
+
+def test_filter_changed_deleted():
+    """Deletions should always be yielded and forget the fingerprint of the document"""
+    _write(_documents(a="a", b="b"))
+    assert _write([{"_id": "a", "_op_type": "delete"}]) == ["a"]
+    assert _write(_documents(a="a", b="b")) == ["a"]
+
+
+def test_invalidate_fingerprints():
+    """Invalidated documents should be written again"""
+    _write(_documents(a="a", b="b", c="c"))
+    invalidate_fingerprints(COURSE_TYPE, ["a"])
+    assert _write(_documents(a="a", b="b", c="c")) == ["a"]
+    invalidate_all_fingerprints([COURSE_TYPE])
+    assert _write(_documents(a="a", b="b", c="c")) == ["a", "b", "c"]
+
+
+def test_fingerprints_disabled(settings):
+    """Nothing should be skipped if fingerprints aren't enabled"""
+    settings.OPENSEARCH_FINGERPRINTS_ENABLED = False
+    _write(_documents(a="a"))
+    assert _write(_documents(a="a")) == ["a"]
@@ -1,25 +1,28 @@
 """Functions and constants for OpenSearch indexing
 """
-import json
 import logging
-from math import ceil
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from opensearchpy.exceptions import ConflictError, NotFoundError
-from opensearchpy.helpers import BulkIndexError, bulk
+from opensearchpy.helpers import BulkIndexError
 
 from course_catalog.models import ContentFile, Course, LearningResourceRun
-from open_discussions.utils import chunks
-from search.api import gen_course_id
+from search.api import gen_content_file_id, gen_course_id
+from search.bulk import iter_bulk_payloads, send_bulk_payloads
+from search.cache import bump_index_generation
 from search.connection import (
     get_active_aliases,
     get_conn,
     get_default_alias_name,
+    get_existing_aliases,
     get_reindexing_alias_name,
+    get_retired_alias_name,
+    invalidate_alias_registry,
     make_backing_index_name,
     refresh_index,
+    reset_alias_registry,
 )
 from search.constants import (
     ALIAS_ALL_INDICES,
@@ -37,8 +40,23 @@ from search.constants import (
     VALID_OBJECT_TYPES,
     VIDEO_TYPE,
 )
+from search.cutover import (
+    delete_expired_retired_indexes,
+    mark_retired,
+    validate_cutover,
+)
 from search.exceptions import ReindexException
+from search.fingerprints import (
+    DocumentFingerprints,
+    invalidate_all_fingerprints,
+    invalidate_fingerprints,
+)
+from search.progress import add_chunk_stats, summarize_bulk_stats
+from search.scroll import iter_scroll_pages
 from search.serializers import (
+    CONTENT_FILE_COLUMNS,
+    get_content_file_run_context,
+    serialize_bulk_content_files,
     serialize_bulk_courses,
     serialize_bulk_courses_for_deletion,
     serialize_bulk_podcast_episodes,
@@ -63,13 +81,56 @@ log = logging.getLogger(__name__)
 User = get_user_model()
 
 
-def clear_and_create_index(*, index_name=None, skip_mapping=False, object_type=None):
+def get_index_settings(*, bulk_load=False):
+    """Get the dynamic settings for a backing index
+
+    Args:
+        bulk_load (bool): If true, get settings which speed up indexing at the expense of
+            search visibility and durability, for an index that isn't being searched yet
+
+    Returns:
+        dict: The index settings
+
+    """
+    if bulk_load:
+        index_settings = {"number_of_replicas": 0, "refresh_interval": "-1"}
+        if settings.OPENSEARCH_REINDEX_ASYNC_TRANSLOG:
+            index_settings["translog.durability"] = "async"
+        return index_settings
+    return {
+        "number_of_replicas": settings.OPENSEARCH_REPLICA_COUNT,
+        "refresh_interval": "60s",
+        "translog.durability": "request",
+    }
+
+
+def is_reindexing(conn, object_type):
+    """Return True if recreate_index is building a new backing index for an object type
+
+    Unchanged documents can't be skipped while that's happening, since they're missing
+    from the new index.
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        object_type (str): The object type
+
+    Returns:
+        bool: True if the reindexing alias exists
+
+    """
+    return get_reindexing_alias_name(object_type) in get_existing_aliases(conn)
+
+
+def clear_and_create_index(
+    *, index_name=None, skip_mapping=False, object_type=None, bulk_load=False
+):
     """Wipe and recreate index and mapping. No indexing is done.
 
     Args:
         index_name (str): The name of the index to clear
         skip_mapping (bool): If true, don't set any mapping
         object_type(str): The type of document (post, comment)
+        bulk_load (bool): If true, create the index with settings for bulk loading documents
 
     """
     if object_type not in VALID_OBJECT_TYPES:
@@ -83,8 +144,7 @@ def clear_and_create_index(*, index_name=None, skip_mapping=False, object_type=N
         "settings": {
             "index": {
                 "number_of_shards": settings.OPENSEARCH_SHARD_COUNT,
-                "number_of_replicas": settings.OPENSEARCH_REPLICA_COUNT,
-                "refresh_interval": "60s",
+                **get_index_settings(bulk_load=bulk_load),
             },
             "analysis": {
                 "analyzer": {
@@ -120,6 +180,25 @@ def clear_and_create_index(*, index_name=None, skip_mapping=False, object_type=N
     conn.indices.create(index_name, body=index_create_data, include_type_name=True)
 
 
+def _is_removed_alias(conn, alias, error):
+    """Check whether a write with require_alias failed because the alias was removed after
+    the aliases were loaded, for example when a recreate_index finished
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        alias (str): The alias which was written to
+        error (opensearchpy.exceptions.NotFoundError): The error of the write
+
+    Returns:
+        bool: True if the alias doesn't exist anymore
+
+    """
+    if error.error != "index_not_found_exception":
+        return False
+    reset_alias_registry()
+    return alias not in get_existing_aliases(conn)
+
+
 def create_document(doc_id, data):
     """Makes a request to OS to create a new document
 
@@ -130,7 +209,20 @@ def create_document(doc_id, data):
     """
     conn = get_conn()
     for alias in get_active_aliases(conn, object_types=[data["object_type"]]):
-        conn.create(index=alias, doc_type=GLOBAL_DOC_TYPE, body=data, id=doc_id)
+        try:
+            conn.create(
+                index=alias,
+                doc_type=GLOBAL_DOC_TYPE,
+                body=data,
+                id=doc_id,
+                params={"require_alias": "true"},
+            )
+        except NotFoundError as ex:
+            if not _is_removed_alias(conn, alias, ex):
+                raise
+            log.info("Skipped creating %s in removed alias %s", doc_id, alias)
+    invalidate_fingerprints(data["object_type"], [doc_id])
+    bump_index_generation([data["object_type"]])
 
 
 def deindex_document(doc_id, object_type, **kwargs):
@@ -150,6 +242,8 @@ def deindex_document(doc_id, object_type, **kwargs):
             log.debug(
                 "Tried to delete an ES document that didn't exist, doc_id: '%s'", doc_id
             )
+    invalidate_fingerprints(object_type, [doc_id])
+    bump_index_generation([object_type])
 
 
 def update_field_values_by_query(query, field_dict, object_types=None):
@@ -195,6 +289,8 @@ def update_field_values_by_query(query, field_dict, object_types=None):
                 alias,
                 query,
             )
+    invalidate_all_fingerprints(object_types)
+    bump_index_generation(object_types)
 
 
 def _update_document_by_id(doc_id, body, object_type, *, retry_on_conflict=0, **kwargs):
@@ -216,7 +312,11 @@ def _update_document_by_id(doc_id, body, object_type, *, retry_on_conflict=0, **
                 doc_type=GLOBAL_DOC_TYPE,
                 body=body,
                 id=doc_id,
-                params={"retry_on_conflict": retry_on_conflict, **kwargs},
+                params={
+                    "retry_on_conflict": retry_on_conflict,
+                    "require_alias": "true",
+                    **kwargs,
+                },
             )
         # Our policy for document update-related version conflicts right now is to log them
         # and allow the app to continue as normal.
@@ -226,6 +326,11 @@ def _update_document_by_id(doc_id, body, object_type, *, retry_on_conflict=0, **
                 alias,
                 doc_id,
             )
+        except NotFoundError as ex:
+            if not _is_removed_alias(conn, alias, ex):
+                raise
+            log.info("Skipped updating %s in removed alias %s", doc_id, alias)
+    bump_index_generation([object_type])
 
 
 def update_document_with_partial(doc_id, doc, object_type, *, retry_on_conflict=0):
@@ -238,13 +343,15 @@ def update_document_with_partial(doc_id, doc, object_type, *, retry_on_conflict=
         retry_on_conflict (int): Number of times to retry if there's a conflict (default=0)
 
     """
+    invalidate_fingerprints(object_type, [doc_id])
     _update_document_by_id(
         doc_id, {"doc": doc}, object_type, retry_on_conflict=retry_on_conflict
     )
 
 
 def upsert_document(doc_id, doc, object_type, *, retry_on_conflict=0, **kwargs):
-    """Makes a request to ES to create or update a document
+    """Makes a request to ES to create or update a document, unless it hasn't changed
+    since it was last written
 
     Args:
         doc_id (str): The ES document id
@@ -254,6 +361,12 @@ def upsert_document(doc_id, doc, object_type, *, retry_on_conflict=0, **kwargs):
         kwargs (dict): Optional kwargs to be passed to opensearch
 
     """
+    fingerprints = DocumentFingerprints(
+        object_type, skip_unchanged=not is_reindexing(get_conn(), object_type)
+    )
+    if not list(fingerprints.filter_changed([{"_id": doc_id, **doc}])):
+        fingerprints.save()
+        return
     _update_document_by_id(
         doc_id,
         {"doc": doc, "doc_as_upsert": True},
@@ -261,6 +374,7 @@ def upsert_document(doc_id, doc, object_type, *, retry_on_conflict=0, **kwargs):
         retry_on_conflict=retry_on_conflict,
         **kwargs,
     )
+    fingerprints.save()
 
 
 def increment_document_integer_field(doc_id, field_name, incr_amount, object_type):
@@ -273,6 +387,7 @@ def increment_document_integer_field(doc_id, field_name, incr_amount, object_typ
         incr_amount (int): The amount to increment by
 
     """
+    invalidate_fingerprints(object_type, [doc_id])
     _update_document_by_id(  # pylint: disable=redundant-keyword-arg
         doc_id,
         {
@@ -309,56 +424,44 @@ def deindex_items(documents, object_type, update_only, **kwargs):
 
 
 def index_items(documents, object_type, update_only, **kwargs):
-    """Index items based on list of item ids
+    """Index items based on list of item ids, skipping documents which haven't changed
+    since they were last written
 
     Args:
         documents (iterable of dict): An iterable with opensearch documents to index
         object_type (str): the ES object type
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes, or None if there was no index to write to
+
     """
     conn = get_conn()
-    # bulk will also break an iterable into chunks. However we should do this here so that
-    # we can use the same documents when indexing to multiple aliases.
-    for chunk in chunks(documents, chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE):
-        documents_size = len(json.dumps(chunk, default=str))
-        # Keep chunking the chunks until either the size is acceptable or there's nothing left to chunk
-        if documents_size > settings.OPENSEARCH_MAX_REQUEST_SIZE:
-            if len(chunk) == 1:
-                log.error(
-                    "Document id %s for object_type %s exceeds max size %d: %d",
-                    chunk[0]["_id"],
-                    object_type,
-                    settings.OPENSEARCH_MAX_REQUEST_SIZE,
-                    documents_size,
-                )
-                continue
-            num_chunks = min(
-                ceil(
-                    len(chunk)
-                    / ceil(documents_size / settings.OPENSEARCH_MAX_REQUEST_SIZE)
-                ),
-                len(chunk) - 1,
-            )
-            for smaller_chunk in chunks(chunk, chunk_size=num_chunks):
-                index_items(smaller_chunk, object_type, update_only, **kwargs)
-        else:
-            for alias in get_active_aliases(
-                conn, object_types=[object_type], include_reindexing=(not update_only)
-            ):
-                _, errors = bulk(
-                    conn,
-                    chunk,
-                    index=alias,
-                    doc_type=GLOBAL_DOC_TYPE,
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                    **kwargs,
-                )
-                if len(errors) > 0:
-                    log.error(errors)
-                    raise ReindexException(
-                        f"Error during bulk {object_type} insert: {errors}"
-                    )
+    aliases = get_active_aliases(
+        conn, object_types=[object_type], include_reindexing=(not update_only)
+    )
+    if not aliases:
+        return None
+    fingerprints = DocumentFingerprints(
+        object_type, skip_unchanged=not is_reindexing(conn, object_type)
+    )
+    try:
+        # Each request writes the documents to the default and reindexing aliases at once
+        bulk_stats = send_bulk_payloads(
+            conn,
+            iter_bulk_payloads(
+                fingerprints.filter_changed(documents),
+                aliases,
+                max_size=settings.OPENSEARCH_MAX_REQUEST_SIZE,
+                max_count=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
+                object_type=object_type,
+            ),
+            **kwargs,
+        )
+        fingerprints.save()
+    finally:
+        bump_index_generation([object_type])
+    return summarize_bulk_stats(bulk_stats, len(aliases))
 
 
 def index_profiles(ids, update_only=False):
@@ -368,8 +471,11 @@ def index_profiles(ids, update_only=False):
         ids(list of int): List of Profile id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_profiles(ids), PROFILE_TYPE, update_only)
+    return index_items(serialize_bulk_profiles(ids), PROFILE_TYPE, update_only)
 
 
 def deindex_profiles(ids):
@@ -389,24 +495,121 @@ def index_courses(ids, update_only=False):
         ids(list of int): List of Course id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_courses(ids), COURSE_TYPE, update_only)
+    return index_items(serialize_bulk_courses(ids), COURSE_TYPE, update_only)
 
 
 def deindex_courses(ids):
-    """Deindex a list of courses by id
+    """Deindex a list of courses and their content files by id
 
     Args:
         ids(list of int): List of Course id's
 
+    Returns:
+        list of str: Ids of the OpenSearch tasks deleting the content files of the courses
+
     """
     deindex_items(serialize_bulk_courses_for_deletion(ids), COURSE_TYPE, True)
+    return deindex_course_content_files(ids)
 
-    course_content_type = ContentType.objects.get_for_model(Course)
-    for run_id in LearningResourceRun.objects.filter(
-        object_id__in=ids, content_type=course_content_type
-    ).values_list("id", flat=True):
-        deindex_run_content_files(run_id)
+
+def deindex_course_content_files(course_ids):
+    """Delete the content files of courses from the index and the database
+
+    The documents are deleted with one delete_by_query per alias, routed to the shards of
+    the courses, which runs in the background in OpenSearch. The rows are deleted with a
+    single statement.
+
+    Args:
+        course_ids(list of int): List of Course id's
+
+    Returns:
+        list of str: Ids of the OpenSearch delete_by_query tasks
+
+    """
+    parent_ids = [
+        gen_course_id(platform, course_id)
+        for platform, course_id in Course.objects.filter(id__in=course_ids).values_list(
+            "platform", "course_id"
+        )
+    ]
+    if not parent_ids:
+        return []
+
+    conn = get_conn()
+    task_ids = []
+    for alias in get_active_aliases(conn, object_types=[COURSE_TYPE]):
+        response = conn.delete_by_query(
+            index=alias,
+            body={
+                "query": {
+                    "bool": {
+                        "should": [
+                            {"parent_id": {"type": "resourcefile", "id": parent_id}}
+                            for parent_id in parent_ids
+                        ],
+                        "minimum_should_match": 1,
+                    }
+                }
+            },
+            routing=",".join(parent_ids),
+            conflicts="proceed",
+            slices="auto",
+            wait_for_completion=False,
+        )
+        task_ids.append(response["task"])
+    bump_index_generation([COURSE_TYPE])
+
+    content_files = ContentFile.objects.filter(
+        run__content_type=ContentType.objects.get_for_model(Course),
+        run__object_id__in=course_ids,
+    )
+    if settings.OPENSEARCH_FINGERPRINTS_ENABLED:
+        invalidate_fingerprints(
+            COURSE_TYPE,
+            [
+                gen_content_file_id(key)
+                for key in content_files.values_list("key", flat=True)
+            ],
+        )
+    content_files.delete()
+    return task_ids
+
+
+def get_incomplete_tasks(task_ids):
+    """Check on background OpenSearch tasks, logging any failures of completed tasks
+
+    Args:
+        task_ids(list of str): Ids of OpenSearch tasks
+
+    Returns:
+        tuple of (list of str, list of str): Ids of tasks which haven't completed yet, and error
+            messages for tasks which completed with failures
+
+    """
+    conn = get_conn()
+    incomplete = []
+    errors = []
+    for task_id in task_ids:
+        status = conn.tasks.get(task_id=task_id)
+        if not status.get("completed"):
+            incomplete.append(task_id)
+            continue
+        response = status.get("response", {})
+        failures = response.get("failures") or status.get("error")
+        if failures:
+            log.error("OpenSearch task %s failed: %s", task_id, failures)
+            errors.append(f"OpenSearch task {task_id} failed: {failures}")
+        else:
+            log.info(
+                "OpenSearch task %s completed, %s documents deleted",
+                task_id,
+                response.get("deleted"),
+            )
+    return incomplete, errors
 
 
 def index_course_content_files(course_ids, update_only=False):
@@ -416,47 +619,73 @@ def index_course_content_files(course_ids, update_only=False):
         course_ids(list of int): List of Course id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
     course_content_type = ContentType.objects.get_for_model(Course)
-    for run_id in LearningResourceRun.objects.filter(
-        object_id__in=course_ids, content_type=course_content_type, published=True
-    ).values_list("id", flat=True):
-        index_run_content_files(run_id, update_only=update_only)
+    return add_chunk_stats(
+        *(
+            index_run_content_files(run_id, update_only=update_only)
+            for run_id in LearningResourceRun.objects.filter(
+                object_id__in=course_ids,
+                content_type=course_content_type,
+                published=True,
+            ).values_list("id", flat=True)
+        )
+    )
+
+
+def index_content_files(ids, update_only=False):
+    """Index a list of content files by id, which may belong to different courses
+
+    Args:
+        ids(list of int): List of ContentFile id's
+        update_only (bool): Update existing index only
+
+    Returns:
+        ChunkStats: Statistics about the writes
+
+    """
+    return index_items(serialize_bulk_content_files(ids), COURSE_TYPE, update_only)
 
 
 def index_run_content_files(run_id, update_only=False):
     """Index a list of content files by run id
 
+    The run and course fields are serialized once for the run, and files are streamed
+    from the database with only the columns the serializer needs.
+
     Args:
         run_id(int): Course run id
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    run = LearningResourceRun.objects.get(pk=run_id)
-    content_file_ids = run.content_files.filter(published=True).values_list(
-        "id", flat=True
+    run = (
+        LearningResourceRun.objects.defer("raw_json")
+        .prefetch_related("content_object__topics")
+        .get(pk=run_id)
+    )
+    run_context = get_content_file_run_context(run)
+    content_files = (
+        run.content_files.filter(published=True)
+        .only(*CONTENT_FILE_COLUMNS)
+        .order_by("id")
+        .iterator(chunk_size=settings.OPENSEARCH_DOCUMENT_INDEXING_CHUNK_SIZE)
     )
 
-    for ids_chunk in chunks(
-        content_file_ids, chunk_size=settings.OPENSEARCH_DOCUMENT_INDEXING_CHUNK_SIZE
-    ):
-
-        documents = (
-            serialize_content_file_for_bulk(content_file)
-            for content_file in ContentFile.objects.filter(pk__in=ids_chunk)
-            .select_related("run")
-            .prefetch_related("run__content_object")
-            .defer("run__raw_json")
-        )
-
-        index_items(
-            documents,
-            COURSE_TYPE,
-            update_only,
-            routing=gen_course_id(
-                run.content_object.platform, run.content_object.course_id
-            ),
-        )
+    return index_items(
+        (
+            serialize_content_file_for_bulk(content_file, run_context=run_context)
+            for content_file in content_files
+        ),
+        COURSE_TYPE,
+        update_only,
+        routing=run_context.fields["resource_relations"]["parent"],
+    )
 
 
 def deindex_run_content_files(run_id, unpublished_only=False):
@@ -499,8 +728,11 @@ def index_programs(ids, update_only=False):
         ids(list of int): List of Program id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_programs(ids), PROGRAM_TYPE, update_only)
+    return index_items(serialize_bulk_programs(ids), PROGRAM_TYPE, update_only)
 
 
 def deindex_programs(ids):
@@ -520,8 +752,11 @@ def index_user_lists(ids, update_only=False):
         ids(list of int): List of UserList id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_user_lists(ids), USER_LIST_TYPE, update_only)
+    return index_items(serialize_bulk_user_lists(ids), USER_LIST_TYPE, update_only)
 
 
 def deindex_user_lists(ids):
@@ -541,8 +776,11 @@ def index_staff_lists(ids, update_only=False):
         ids(list of int): List of StaffList id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_staff_lists(ids), STAFF_LIST_TYPE, update_only)
+    return index_items(serialize_bulk_staff_lists(ids), STAFF_LIST_TYPE, update_only)
 
 
 def deindex_staff_lists(ids):
@@ -562,8 +800,11 @@ def index_videos(ids, update_only=False):
         ids(list of int): List of Video id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_videos(ids), VIDEO_TYPE, update_only)
+    return index_items(serialize_bulk_videos(ids), VIDEO_TYPE, update_only)
 
 
 def deindex_videos(ids):
@@ -583,8 +824,11 @@ def index_podcasts(ids, update_only=False):
         ids(list of int): List of Podcast id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_podcasts(ids), PODCAST_TYPE, update_only)
+    return index_items(serialize_bulk_podcasts(ids), PODCAST_TYPE, update_only)
 
 
 def deindex_podcasts(ids):
@@ -604,8 +848,13 @@ def index_podcast_episodes(ids, update_only=False):
         ids(list of int): List of PodcastEpisode id's
         update_only (bool): Update existing index only
 
+    Returns:
+        ChunkStats: Statistics about the writes
+
     """
-    index_items(serialize_bulk_podcast_episodes(ids), PODCAST_EPISODE_TYPE, update_only)
+    return index_items(
+        serialize_bulk_podcast_episodes(ids), PODCAST_EPISODE_TYPE, update_only
+    )
 
 
 def deindex_podcast_episodes(ids):
@@ -636,7 +885,11 @@ def create_backing_index(object_type):
     new_backing_index = make_backing_index_name(object_type)
 
     # Clear away temp alias so we can reuse it, and create mappings
-    clear_and_create_index(index_name=new_backing_index, object_type=object_type)
+    clear_and_create_index(
+        index_name=new_backing_index,
+        object_type=object_type,
+        bulk_load=settings.OPENSEARCH_REINDEX_BULK_LOAD,
+    )
     temp_alias = get_reindexing_alias_name(object_type)
     if conn.indices.exists_alias(name=temp_alias):
         # Deletes both alias and backing indexes
@@ -646,12 +899,118 @@ def create_backing_index(object_type):
 
     # Point temp_alias toward new backing index
     conn.indices.put_alias(index=new_backing_index, name=temp_alias)
+    invalidate_alias_registry()
 
     return new_backing_index
 
 
-def switch_indices(backing_index, object_type):
-    """Switch the default index to point to the backing index, and delete the reindex alias
+def get_reindexing_index(object_type):
+    """Get the backing index the reindexing alias of an object type points to
+
+    Args:
+        object_type (str): The object type for the index
+
+    Returns:
+        str or None: The backing index, or None if the object type isn't being reindexed
+
+    """
+    conn = get_conn()
+    temp_alias = get_reindexing_alias_name(object_type)
+    if not conn.indices.exists_alias(name=temp_alias):
+        return None
+    return next(iter(conn.indices.get_alias(name=temp_alias)), None)
+
+
+def finish_bulk_load(backing_index):
+    """Prepare a backing index which was created for bulk loading to be searched
+
+    The index is refreshed and force-merged while it has no replicas, then the regular
+    settings are restored and we wait for the new replicas to be allocated.
+
+    Args:
+        backing_index (str): The backing index
+
+    """
+    conn = get_conn()
+    timeout = settings.OPENSEARCH_REINDEX_FINISH_TIMEOUT
+    refresh_index(backing_index)
+    if settings.OPENSEARCH_REINDEX_FORCE_MERGE_SEGMENTS:
+        conn.indices.forcemerge(
+            index=backing_index,
+            max_num_segments=settings.OPENSEARCH_REINDEX_FORCE_MERGE_SEGMENTS,
+            request_timeout=timeout,
+        )
+    conn.indices.put_settings(index=backing_index, body={"index": get_index_settings()})
+    health = conn.cluster.health(
+        index=backing_index,
+        wait_for_status="green",
+        timeout=f"{timeout}s",
+        request_timeout=timeout,
+    )
+    if health.get("timed_out"):
+        log.warning(
+            "Index %s is still %s after %ds, switching to it anyway",
+            backing_index,
+            health.get("status"),
+            timeout,
+        )
+
+
+def _get_default_backing_indexes(object_type):
+    """Get the backing indexes the default alias of an object type points to
+
+    Args:
+        object_type (str): The object type for the index (post, comment, etc)
+
+    Returns:
+        list of str: The backing indexes, normally only one
+
+    """
+    conn = get_conn()
+    default_alias = get_default_alias_name(object_type)
+    if not conn.indices.exists_alias(name=default_alias):
+        return []
+    return list(conn.indices.get_alias(name=default_alias).keys())
+
+
+def prepare_switch(backing_index, object_type, *, validate=True):
+    """Make a backing index searchable, and check that it may replace the default backing index
+
+    Unless validate is False or OPENSEARCH_CUTOVER_VALIDATION_ENABLED isn't set, sampled queries
+    are replayed against the backing index to warm it, and it has to compare well with the
+    old backing index.
+
+    Args:
+        backing_index (str): The backing index of the reindex alias
+        object_type (str): The object type for the index (post, comment, etc)
+        validate (bool): If False, don't warm up and validate the backing index
+
+    Raises:
+        ReindexException: If the backing index failed validation
+
+    """
+    finish_bulk_load(backing_index)
+    if not validate or not settings.OPENSEARCH_CUTOVER_VALIDATION_ENABLED:
+        return
+
+    old_backing_indexes = _get_default_backing_indexes(object_type)
+    report = validate_cutover(
+        object_type,
+        backing_index,
+        old_backing_indexes[0] if old_backing_indexes else None,
+    )
+    if report.problems:
+        raise ReindexException(
+            f"Not switching the {object_type} index to {backing_index}: "
+            f"{'; '.join(report.problems)}. Run cutover_index --switch --force to switch anyway."
+        )
+
+
+def switch_aliases(backing_index, object_type):
+    """Point the default aliases to a prepared backing index, and delete the reindex alias
+
+    The old backing index is kept under the retired alias for OPENSEARCH_CUTOVER_RETENTION_SECONDS,
+    so the switch can be rolled back.
 
     Args:
         backing_index (str): The backing index of the reindex alias
@@ -660,19 +1019,18 @@ def switch_indices(backing_index, object_type):
     """
     conn = get_conn()
     actions = []
-    old_backing_indexes = []
+    old_backing_indexes = _get_default_backing_indexes(object_type)
     default_alias = get_default_alias_name(object_type)
     global_alias = get_default_alias_name(ALIAS_ALL_INDICES)
-    if conn.indices.exists_alias(name=default_alias):
-        # Should only be one backing index in normal circumstances
-        old_backing_indexes = list(conn.indices.get_alias(name=default_alias).keys())
-        for index in old_backing_indexes:
-            actions.extend(
-                [
-                    {"remove": {"index": index, "alias": default_alias}},
-                    {"remove": {"index": index, "alias": global_alias}},
-                ]
-            )
+    retired_alias = get_retired_alias_name(object_type)
+    for index in old_backing_indexes:
+        actions.extend(
+            [
+                {"remove": {"index": index, "alias": default_alias}},
+                {"remove": {"index": index, "alias": global_alias}},
+                {"add": {"index": index, "alias": retired_alias}},
+            ]
+        )
     actions.extend(
         [
             {"add": {"index": backing_index, "alias": default_alias}},
@@ -681,13 +1039,32 @@ def switch_indices(backing_index, object_type):
     )
     conn.indices.update_aliases({"actions": actions})
     refresh_index(backing_index)
-    for index in old_backing_indexes:
-        conn.indices.delete(index)
+    bump_index_generation([object_type])
+    if old_backing_indexes:
+        mark_retired(old_backing_indexes)
 
     # Finally, remove the link to the reindexing alias
     conn.indices.delete_alias(
         name=get_reindexing_alias_name(object_type), index=backing_index
     )
+    invalidate_alias_registry()
+    delete_expired_retired_indexes(object_type)
+
+
+def switch_indices(backing_index, object_type, *, validate=True):
+    """Switch the default index to point to the backing index, and delete the reindex alias
+
+    Args:
+        backing_index (str): The backing index of the reindex alias
+        object_type (str): The object type for the index (post, comment, etc)
+        validate (bool): If False, switch without warming up and validating the backing index
+
+    Raises:
+        ReindexException: If the backing index failed validation
+
+    """
+    prepare_switch(backing_index, object_type, validate=validate)
+    switch_aliases(backing_index, object_type)
 
 
 def delete_orphaned_indices():
@@ -705,26 +1082,39 @@ def delete_orphaned_indices():
         if not keys:
             log.info("Deleting index %s", index)
             conn.indices.delete(index)
+    invalidate_alias_registry()
 
 
-def es_iterate_all_documents(index, query, pagesize=250):
-    """Helper to iterate all values from an index
-
-    index (str): The index
-    query (dict): opensearch query filter
-    pagesize (int): integer
+def iterate_documents(
+    index, query, *, source_fields=None, page_size=None, slices=None, sort=None
+):
+    """Stream every document matching a query with a scroll, without the max_result_window limit
 
-    """
-    conn = get_conn()
+    Args:
+        index (str): The index or alias
+        query (dict): opensearch query filter
+        source_fields (list of str): The _source fields to return. None returns the whole
+            _source and an empty list returns none of it.
+        page_size (int): The number of hits per page, defaults to OPENSEARCH_SCROLL_PAGE_SIZE
+        slices (int): The number of slices to scroll concurrently, defaults to OPENSEARCH_SCROLL_SLICES
+        sort (list): The sort order, by default index order which is the cheapest to scroll
 
-    offset = 0
-    while True:
-        result = conn.search(
-            index=index, body={"query": query, "size": pagesize, "from": offset}
-        )
-        hits = result["hits"]["hits"]
-        if not hits:
-            break
+    Yields:
+        dict: The hits, including _id and _source
 
-        yield from (hit for hit in hits)
-        offset += pagesize
+    """
+    body = {
+        "query": query,
+        "size": page_size or settings.OPENSEARCH_SCROLL_PAGE_SIZE,
+        "sort": sort or ["_doc"],
+    }
+    if source_fields is not None:
+        body["_source"] = source_fields or False
+    for page in iter_scroll_pages(
+        get_conn(),
+        index,
+        body,
+        keep_alive=settings.OPENSEARCH_SCROLL_KEEP_ALIVE,
+        slices=slices or settings.OPENSEARCH_SCROLL_SLICES,
+    ):
+        yield from page
@@ -1 +1,318 @@
-"""Tests for deprecated discussion indexing functionality - removed"""
+"""Tests for the OpenSearch indexing API"""
+import pytest
+from django.core.cache import caches
+from opensearchpy.exceptions import NotFoundError
+
+from course_catalog.factories import (
+    ContentFileFactory,
+    CourseFactory,
+    LearningResourceRunFactory,
+)
+from course_catalog.models import ContentFile
+from search import indexing_api
+from search.api import gen_course_id
+from search.constants import COURSE_TYPE
+from search.cutover import get_retired_indexes
+from search.exceptions import ReindexException
+
+
+@pytest.fixture
+def mock_conn(mocker):
+    """Mock the OpenSearch connection used by the indexing API"""
+    conn = mocker.Mock()
+    conn.indices.exists.return_value = False
+    conn.indices.exists_alias.return_value = False
+    conn.cluster.health.return_value = {"status": "green", "timed_out": False}
+    mocker.patch("search.indexing_api.get_conn", return_value=conn)
+    mocker.patch("search.connection.get_conn", return_value=conn)
+    mocker.patch("search.cutover.get_conn", return_value=conn)
+    return conn
+
+
+@pytest.mark.parametrize("bulk_load", [True, False])
+@pytest.mark.parametrize("async_translog", [True, False])
+def test_create_backing_index(settings, mock_conn, bulk_load, async_translog):
+    """create_backing_index should use bulk loading settings if configured to"""
+    settings.OPENSEARCH_REINDEX_BULK_LOAD = bulk_load
+    settings.OPENSEARCH_REINDEX_ASYNC_TRANSLOG = async_translog
+    settings.OPENSEARCH_REPLICA_COUNT = 2
+    backing_index = indexing_api.create_backing_index(COURSE_TYPE)
+
+    mock_conn.indices.create.assert_called_once()
+    assert mock_conn.indices.create.call_args[0][0] == backing_index
+    index_settings = mock_conn.indices.create.call_args[1]["body"]["settings"]["index"]
+    if bulk_load:
+        assert index_settings["number_of_replicas"] == 0
+        assert index_settings["refresh_interval"] == "-1"
+        assert ("translog.durability" in index_settings) is async_translog
+    else:
+        assert index_settings["number_of_replicas"] == 2
+        assert index_settings["refresh_interval"] == "60s"
+    mock_conn.indices.put_alias.assert_called_once_with(
+        index=backing_index,
+        name=f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_reindexing",
+    )
+
+
+@pytest.mark.parametrize("force_merge_segments", [0, 1])
+@pytest.mark.parametrize("timed_out", [True, False])
+def test_switch_indices(settings, mocker, mock_conn, force_merge_segments, timed_out):
+    """switch_indices should restore the index settings before swapping aliases"""
+    settings.OPENSEARCH_REINDEX_FORCE_MERGE_SEGMENTS = force_merge_segments
+    settings.OPENSEARCH_REINDEX_FINISH_TIMEOUT = 100
+    settings.OPENSEARCH_REPLICA_COUNT = 2
+    mock_conn.cluster.health.return_value = {"status": "yellow", "timed_out": timed_out}
+    mock_log = mocker.patch("search.indexing_api.log.warning")
+    mocker.patch("search.indexing_api.validate_cutover").return_value.problems = []
+
+    indexing_api.switch_indices("backing", COURSE_TYPE)
+
+    if force_merge_segments:
+        mock_conn.indices.forcemerge.assert_called_once_with(
+            index="backing", max_num_segments=1, request_timeout=100
+        )
+    else:
+        mock_conn.indices.forcemerge.assert_not_called()
+    mock_conn.indices.put_settings.assert_called_once_with(
+        index="backing",
+        body={
+            "index": {
+                "number_of_replicas": 2,
+                "refresh_interval": "60s",
+                "translog.durability": "request",
+            }
+        },
+    )
+    mock_conn.cluster.health.assert_called_once_with(
+        index="backing", wait_for_status="green", timeout="100s", request_timeout=100
+    )
+    assert mock_log.called is timed_out
+    mock_conn.indices.update_aliases.assert_called_once()
+    assert mock_conn.method_calls.index(
+        mocker.call.cluster.health(
+            index="backing",
+            wait_for_status="green",
+            timeout="100s",
+            request_timeout=100,
+        )
+    ) < mock_conn.method_calls.index(
+        mocker.call.indices.update_aliases(
+            mock_conn.indices.update_aliases.call_args[0][0]
+        )
+    )
+
+
+@pytest.mark.usefixtures("fingerprints_enabled")
+@pytest.mark.parametrize("problems", [[], ["too few documents"]])
+def test_switch_indices_cutover(mocker, settings, mock_conn, problems):
+    """switch_indices should only switch a validated index, and retire the old one"""
+    settings.OPENSEARCH_CUTOVER_RETENTION_SECONDS = 60
+    mocker.patch("search.indexing_api.finish_bulk_load")
+    mock_validate = mocker.patch("search.indexing_api.validate_cutover")
+    mock_validate.return_value.problems = problems
+    default_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_default"
+    retired_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_retired"
+    aliases = {default_alias: {"old": {}}, retired_alias: {"older": {}}}
+    mock_conn.indices.exists_alias.side_effect = lambda name: name in aliases
+    mock_conn.indices.get_alias.side_effect = lambda name: aliases[name]
+
+    if problems:
+        with pytest.raises(ReindexException, match="too few documents"):
+            indexing_api.switch_indices("backing", COURSE_TYPE)
+        mock_conn.indices.update_aliases.assert_not_called()
+        return
+
+    indexing_api.switch_indices("backing", COURSE_TYPE)
+    mock_validate.assert_called_once_with(COURSE_TYPE, "backing", "old")
+    assert {
+        "add": {"index": "old", "alias": retired_alias}
+    } in mock_conn.indices.update_aliases.call_args[0][0]["actions"]
+    mock_conn.indices.delete.assert_not_called()
+    assert [index for index, _ in get_retired_indexes(COURSE_TYPE)] == ["older"]
+
+
+@pytest.fixture
+def fingerprints_enabled(settings):
+    """Enable document fingerprints, stored in the local memory cache"""
+    settings.OPENSEARCH_FINGERPRINTS_ENABLED = True
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.mark.usefixtures("fingerprints_enabled")
+@pytest.mark.parametrize("reindexing", [True, False])
+def test_index_items_unchanged(mocker, settings, mock_conn, reindexing):
+    """index_items should skip documents which haven't changed unless a reindex is in progress"""
+    default_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_default"
+    reindexing_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_reindexing"
+    aliases = [default_alias, reindexing_alias] if reindexing else [default_alias]
+    mocker.patch("search.indexing_api.get_active_aliases", return_value=aliases)
+    mocker.patch("search.indexing_api.get_existing_aliases", return_value=aliases)
+    sent = []
+    mocker.patch(
+        "search.indexing_api.send_bulk_payloads",
+        side_effect=lambda conn, payloads: sent.append(list(payloads)) or [],
+    )
+    documents = [{"_id": "a", "title": "a"}, {"_id": "b", "title": "b"}]
+
+    indexing_api.index_items(documents, COURSE_TYPE, True)
+    indexing_api.index_items(
+        [*documents, {"_id": "c", "title": "c"}], COURSE_TYPE, True
+    )
+    assert [sum(len(payload.actions) for payload in payloads) for payloads in sent] == [
+        2 * len(aliases),
+        (3 if reindexing else 1) * len(aliases),
+    ]
+
+
+@pytest.mark.usefixtures("fingerprints_enabled")
+def test_upsert_document_unchanged(mocker, settings, mock_conn):
+    """upsert_document should skip documents which haven't changed"""
+    default_alias = f"{settings.OPENSEARCH_INDEX}_{COURSE_TYPE}_default"
+    mocker.patch("search.indexing_api.get_active_aliases", return_value=[default_alias])
+    mocker.patch(
+        "search.indexing_api.get_existing_aliases", return_value=[default_alias]
+    )
+    for _ in range(2):
+        indexing_api.upsert_document("doc", {"title": "a"}, COURSE_TYPE)
+    mock_conn.update.assert_called_once()
+    indexing_api.upsert_document("doc", {"title": "b"}, COURSE_TYPE)
+    assert mock_conn.update.call_count == 2
+    indexing_api.update_document_with_partial("doc", {"title": "c"}, COURSE_TYPE)
+    indexing_api.upsert_document("doc", {"title": "b"}, COURSE_TYPE)
+    assert mock_conn.update.call_count == 4
+
+
+@pytest.mark.parametrize("removed", [True, False])
+def test_update_document_removed_alias(mocker, mock_conn, removed):
+    """Writes to an alias removed since the aliases were loaded should be skipped"""
+    aliases = ["testindex_course_default", "testindex_course_reindexing"]
+    mock_conn.indices.get_alias.side_effect = [
+        {f"{alias}_backing": {"aliases": {alias: {}}} for alias in aliases},
+        {
+            f"{alias}_backing": {"aliases": {alias: {}}}
+            for alias in (aliases[:1] if removed else aliases)
+        },
+    ]
+    error = NotFoundError(404, "index_not_found_exception", {})
+    mock_conn.update.side_effect = [None, error]
+
+    if removed:
+        indexing_api.update_document_with_partial("doc", {"title": "a"}, COURSE_TYPE)
+    else:
+        with pytest.raises(NotFoundError):
+            indexing_api.update_document_with_partial(
+                "doc", {"title": "a"}, COURSE_TYPE
+            )
+    assert [call[1]["index"] for call in mock_conn.update.call_args_list] == aliases
+    assert mock_conn.indices.get_alias.call_count == 2
+
+
+def test_update_document_missing_document(mocker, mock_conn):
+    """Updates of documents which don't exist yet should still raise, so the task is retried"""
+    mocker.patch(
+        "search.indexing_api.get_active_aliases",
+        return_value=["testindex_course_default"],
+    )
+    mock_conn.update.side_effect = NotFoundError(404, "document_missing_exception", {})
+    with pytest.raises(NotFoundError):
+        indexing_api.update_document_with_partial("doc", {"title": "a"}, COURSE_TYPE)
+    mock_conn.indices.get_alias.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_index_run_content_files_query_count(mocker, django_assert_max_num_queries):
+    """index_run_content_files should not query the run or course for every file"""
+    documents = []
+    mock_index_items = mocker.patch(
+        "search.indexing_api.index_items",
+        side_effect=lambda docs, *args, **kwargs: documents.extend(docs),
+    )
+    course = CourseFactory.create(runs=[])
+    run = LearningResourceRunFactory.create(content_object=course, published=True)
+    ContentFileFactory.create_batch(10, run=run, published=True)
+    ContentFileFactory.create(run=run, published=False)
+
+    with django_assert_max_num_queries(5):
+        indexing_api.index_run_content_files(run.id)
+
+    assert len(documents) == 10
+    assert mock_index_items.call_args[1] == {
+        "routing": gen_course_id(course.platform, course.course_id)
+    }
+
+
+@pytest.mark.django_db
+def test_deindex_course_content_files(mocker, settings, mock_conn):
+    """Content files of courses should be deleted with one routed delete_by_query per alias"""
+    aliases = ["default", "reindexing"]
+    mocker.patch("search.indexing_api.get_active_aliases", return_value=aliases)
+    mock_conn.delete_by_query.side_effect = [{"task": "node:1"}, {"task": "node:2"}]
+    courses = CourseFactory.create_batch(2)
+    other_course = CourseFactory.create()
+    for course in [*courses, other_course]:
+        ContentFileFactory.create_batch(2, run=course.runs.first())
+
+    assert indexing_api.deindex_course_content_files(
+        [course.id for course in courses]
+    ) == ["node:1", "node:2"]
+
+    parent_ids = [
+        gen_course_id(course.platform, course.course_id) for course in courses
+    ]
+    assert [call[1]["index"] for call in mock_conn.delete_by_query.call_args_list] == (
+        aliases
+    )
+    kwargs = mock_conn.delete_by_query.call_args[1]
+    assert sorted(kwargs["routing"].split(",")) == sorted(parent_ids)
+    assert kwargs["wait_for_completion"] is False
+    assert sorted(
+        should["parent_id"]["id"]
+        for should in kwargs["body"]["query"]["bool"]["should"]
+    ) == sorted(parent_ids)
+    assert list(
+        ContentFile.objects.values_list("run__object_id", flat=True).distinct()
+    ) == [other_course.id]
+
+
+def test_get_incomplete_tasks(mock_conn):
+    """get_incomplete_tasks should return tasks which are still running and failures"""
+    statuses = {
+        "running": {"completed": False},
+        "done": {"completed": True, "response": {"deleted": 10, "failures": []}},
+        "failed": {"completed": True, "response": {"failures": [{"cause": "x"}]}},
+    }
+    mock_conn.tasks.get.side_effect = lambda task_id: statuses[task_id]
+    incomplete, errors = indexing_api.get_incomplete_tasks(list(statuses))
+    assert incomplete == ["running"]
+    assert len(errors) == 1
+    assert "failed" in errors[0]
+
+
+@pytest.mark.parametrize(
+    "source_fields, expected_source", [(None, None), ([], False), (["a"], ["a"])]
+)
+def test_iterate_documents(mocker, settings, mock_conn, source_fields, expected_source):
+    """iterate_documents should stream hits from a scroll with only the requested fields"""
+    settings.OPENSEARCH_SCROLL_SLICES = 3
+    settings.OPENSEARCH_SCROLL_KEEP_ALIVE = "2m"
+    mock_pages = mocker.patch(
+        "search.indexing_api.iter_scroll_pages",
+        return_value=iter([[{"_id": "a"}, {"_id": "b"}], [{"_id": "c"}]]),
+    )
+    query = {"term": {"object_type": "course"}}
+    assert [
+        hit["_id"]
+        for hit in indexing_api.iterate_documents(
+            "index", query, source_fields=source_fields, page_size=50
+        )
+    ] == ["a", "b", "c"]
+    expected_body = {"query": query, "size": 50, "sort": ["_doc"]}
+    if expected_source is not None:
+        expected_body["_source"] = expected_source
+    mock_pages.assert_called_once_with(
+        mock_conn, "index", expected_body, keep_alive="2m", slices=3
+    )
@@ -0,0 +1,288 @@
+"""Persistent state kept between indexing tasks"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+
+from open_discussions.utils import now_in_utc
+from search.constants import COURSE_TYPE, RESOURCE_FILE_TYPE
+
+log = logging.getLogger(__name__)
+
+WATERMARK_KEY_PREFIX = "search:update_watermark"
+RECREATE_MANIFEST_KEY = "search:recreate_index:manifest"
+RECREATE_CHUNK_KEY_PREFIX = "search:recreate_index:chunk"
+INDEX_JOB_KEY_PREFIX = "search:index_job"
+
+# Object types which can be updated for a single platform
+PLATFORM_OBJECT_TYPES = (COURSE_TYPE, RESOURCE_FILE_TYPE)
+
+
+def get_indexing_state_cache():
+    """Get the django cache used for indexing state
+
+    Returns:
+        django.core.cache.backends.base.BaseCache: The cache
+
+    """
+    return caches[settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS]
+
+
+def _watermark_key(object_type, platform):
+    """Cache key for the update watermark of an object type"""
+    if object_type not in PLATFORM_OBJECT_TYPES or not platform:
+        platform = "all"
+    return f"{WATERMARK_KEY_PREFIX}:{object_type}:{platform}"
+
+
+def get_update_watermark(object_type, platform=None):
+    """Get the time the last successful update_index for an object type started
+
+    Args:
+        object_type (str): The object type
+        platform (str): The platform the update was limited to, if any
+
+    Returns:
+        datetime or None: The watermark, or None if the object type was never updated
+
+    """
+    value = get_indexing_state_cache().get(_watermark_key(object_type, platform))
+    return datetime.fromisoformat(value) if value else None
+
+
+def get_updated_since(object_type, platform=None):
+    """Get the time after which modified objects need to be indexed by an incremental update
+
+    The watermark is moved back by OPENSEARCH_UPDATE_INDEX_WATERMARK_OVERLAP seconds so rows
+    written by transactions which were still open when the last update started aren't missed.
+
+    Args:
+        object_type (str): The object type
+        platform (str): The platform the update is limited to, if any
+
+    Returns:
+        datetime or None: The cutoff, or None if every object needs to be indexed
+
+    """
+    watermark = get_update_watermark(object_type, platform)
+    if watermark is None:
+        return None
+    return watermark - timedelta(
+        seconds=settings.OPENSEARCH_UPDATE_INDEX_WATERMARK_OVERLAP
+    )
+
+
+def set_update_watermarks(object_types, platform, watermark):
+    """Record the start time of a successful update_index for some object types
+
+    Args:
+        object_types (iterable of str): The object types which were updated
+        platform (str): The platform the update was limited to, if any
+        watermark (datetime): The time the update started
+
+    """
+    get_indexing_state_cache().set_many(
+        {
+            _watermark_key(object_type, platform): watermark.isoformat()
+            for object_type in object_types
+        },
+        timeout=None,
+    )
+    log.info(
+        "Set update_index watermark for %s to %s", ", ".join(object_types), watermark
+    )
+
+
+def save_recreate_manifest(backing_indices, indexes):
+    """Record the backing indices of a recreate_index, so it can be resumed if some chunks fail
+
+    Args:
+        backing_indices (dict): The new backing indices keyed by object type
+        indexes (list of str): The object types being indexed
+
+    """
+    get_indexing_state_cache().set(
+        RECREATE_MANIFEST_KEY,
+        {"backing_indices": backing_indices, "indexes": list(indexes)},
+        timeout=settings.OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT,
+    )
+
+
+def get_recreate_manifest():
+    """Get the last recreate_index which didn't finish
+
+    Returns:
+        dict or None: backing_indices keyed by object type, and the indexes being indexed
+
+    """
+    return get_indexing_state_cache().get(RECREATE_MANIFEST_KEY)
+
+
+def clear_recreate_manifest():
+    """Forget the last recreate_index once it finished
+
+    Chunk checkpoints are keyed by backing index, so the ones left behind are never read
+    again and expire after OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT.
+    """
+    get_indexing_state_cache().delete(RECREATE_MANIFEST_KEY)
+
+
+def _chunk_key(backing_index, chunk_id):
+    """Cache key for the checkpoint of a recreate_index chunk"""
+    return f"{RECREATE_CHUNK_KEY_PREFIX}:{backing_index}:{chunk_id}"
+
+
+def mark_recreate_chunk_done(backing_index, chunk_id):
+    """Record that a chunk of a recreate_index was written to its backing index
+
+    Args:
+        backing_index (str): The backing index the chunk was written to
+        chunk_id (str): Identifies the chunk by its source and range of ids
+
+    """
+    get_indexing_state_cache().set(
+        _chunk_key(backing_index, chunk_id),
+        True,
+        timeout=settings.OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT,
+    )
+
+
+def is_recreate_chunk_done(backing_index, chunk_id):
+    """Check whether a chunk of a recreate_index was already written to its backing index
+
+    Args:
+        backing_index (str): The backing index of the chunk
+        chunk_id (str): Identifies the chunk by its source and range of ids
+
+    Returns:
+        bool: True if the chunk was checkpointed
+
+    """
+    return bool(get_indexing_state_cache().get(_chunk_key(backing_index, chunk_id)))
+
+
+def _index_job_key(job_id, field):
+    """Cache key for a field of the state of an indexing job"""
+    return f"{INDEX_JOB_KEY_PREFIX}:{job_id}:{field}"
+
+
+def save_index_job(job_id, job):
+    """Store the parameters and cursor of an indexing job
+
+    Args:
+        job_id (str): The id of the job
+        job (dict): The job, which has to be picklable
+
+    """
+    get_indexing_state_cache().set(
+        _index_job_key(job_id, "job"),
+        job,
+        timeout=settings.OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT,
+    )
+
+
+def get_index_job(job_id):
+    """Get the parameters and cursor of an indexing job
+
+    Args:
+        job_id (str): The id of the job
+
+    Returns:
+        dict or None: The job, or None if it finished or expired
+
+    """
+    return get_indexing_state_cache().get(_index_job_key(job_id, "job"))
+
+
+def add_index_job_chunk(job_id):
+    """Count a chunk of an indexing job as in flight, before it's enqueued
+
+    Args:
+        job_id (str): The id of the job
+
+    """
+    cache = get_indexing_state_cache()
+    timeout = settings.OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT
+    key = _index_job_key(job_id, "in_flight")
+    cache.add(key, 0, timeout=timeout)
+    cache.incr(key)
+    cache.set(
+        _index_job_key(job_id, "active_on"), now_in_utc().isoformat(), timeout=timeout
+    )
+
+
+def remove_index_job_chunk(job_id, error=None):
+    """Record that a chunk of an indexing job finished
+
+    Args:
+        job_id (str): The id of the job
+        error (str): The error the chunk failed with, if any
+
+    """
+    cache = get_indexing_state_cache()
+    timeout = settings.OPENSEARCH_RECREATE_CHECKPOINT_TIMEOUT
+    if error:
+        count_key = _index_job_key(job_id, "errors")
+        cache.add(count_key, 0, timeout=timeout)
+        error_num = cache.incr(count_key)
+        cache.set(_index_job_key(job_id, f"error:{error_num}"), error, timeout=timeout)
+    cache.set(
+        _index_job_key(job_id, "active_on"), now_in_utc().isoformat(), timeout=timeout
+    )
+    cache.decr(_index_job_key(job_id, "in_flight"))
+
+
+def get_index_job_status(job_id):
+    """Get the chunks of an indexing job which are in flight and the errors of the finished ones
+
+    Args:
+        job_id (str): The id of the job
+
+    Returns:
+        tuple of (int, list of str, datetime): The number of chunks in flight, the errors,
+            and when a chunk was last enqueued or finished
+
+    """
+    cache = get_indexing_state_cache()
+    values = cache.get_many(
+        [
+            _index_job_key(job_id, field)
+            for field in ("in_flight", "errors", "active_on")
+        ]
+    )
+    error_count = values.get(_index_job_key(job_id, "errors"), 0)
+    error_keys = [
+        _index_job_key(job_id, f"error:{error_num}")
+        for error_num in range(1, error_count + 1)
+    ]
+    errors = cache.get_many(error_keys)
+    active_on = values.get(_index_job_key(job_id, "active_on"))
+    return (
+        values.get(_index_job_key(job_id, "in_flight"), 0),
+        [errors[key] for key in error_keys if key in errors],
+        datetime.fromisoformat(active_on) if active_on else None,
+    )
+
+
+def clear_index_job(job_id):
+    """Forget the state of an indexing job once it finished
+
+    Args:
+        job_id (str): The id of the job
+
+    """
+    cache = get_indexing_state_cache()
+    error_count = cache.get(_index_job_key(job_id, "errors"), 0)
+    cache.delete_many(
+        [
+            _index_job_key(job_id, field)
+            for field in (
+                "job",
+                "in_flight",
+                "errors",
+                "active_on",
+                *(f"error:{error_num}" for error_num in range(1, error_count + 1)),
+            )
+        ]
+    )
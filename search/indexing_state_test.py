@@ -0,0 +1,95 @@
+"""Tests for indexing state"""
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+
+from open_discussions.utils import now_in_utc
+from search.constants import COURSE_TYPE, RESOURCE_FILE_TYPE, VIDEO_TYPE
+from search.indexing_state import (
+    add_index_job_chunk,
+    clear_index_job,
+    clear_recreate_manifest,
+    get_index_job,
+    get_index_job_status,
+    get_recreate_manifest,
+    get_update_watermark,
+    get_updated_since,
+    is_recreate_chunk_done,
+    mark_recreate_chunk_done,
+    remove_index_job_chunk,
+    save_index_job,
+    save_recreate_manifest,
+    set_update_watermarks,
+)
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for indexing state"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_update_watermarks(settings):
+    """Watermarks should be stored per object type and moved back by the overlap"""
+    settings.OPENSEARCH_UPDATE_INDEX_WATERMARK_OVERLAP = 60
+    watermark = now_in_utc()
+    assert get_update_watermark(COURSE_TYPE) is None
+    assert get_updated_since(COURSE_TYPE) is None
+
+    set_update_watermarks([COURSE_TYPE], None, watermark)
+    assert get_update_watermark(COURSE_TYPE) == watermark
+    assert get_updated_since(COURSE_TYPE) == watermark - timedelta(seconds=60)
+    assert get_update_watermark(VIDEO_TYPE) is None
+
+
+@pytest.mark.parametrize("object_type", [COURSE_TYPE, RESOURCE_FILE_TYPE])
+def test_update_watermarks_platform(object_type):
+    """Course and course file watermarks should be kept separately for each platform"""
+    watermark = now_in_utc()
+    set_update_watermarks([object_type, VIDEO_TYPE], "ocw", watermark)
+    assert get_update_watermark(object_type, "ocw") == watermark
+    assert get_update_watermark(object_type, "mitx") is None
+    assert get_update_watermark(object_type) is None
+    assert get_update_watermark(VIDEO_TYPE) == watermark
+
+
+def test_recreate_manifest():
+    """A recreate_index should be kept with its checkpoints until it's cleared"""
+    backing_indices = {COURSE_TYPE: "course_1", VIDEO_TYPE: "video_1"}
+    save_recreate_manifest(backing_indices, [COURSE_TYPE, VIDEO_TYPE])
+    assert get_recreate_manifest() == {
+        "backing_indices": backing_indices,
+        "indexes": [COURSE_TYPE, VIDEO_TYPE],
+    }
+
+    mark_recreate_chunk_done("video_1", "1:3-5")
+    assert is_recreate_chunk_done("video_1", "1:3-5") is True
+    assert is_recreate_chunk_done("video_1", "1:3-6") is False
+    assert is_recreate_chunk_done("video_2", "1:3-5") is False
+
+    clear_recreate_manifest()
+    assert get_recreate_manifest() is None
+
+
+def test_index_job_status():
+    """Chunks of an indexing job should be in flight until they finish, keeping their errors"""
+    save_index_job("job", {"cursor": [0, 0]})
+    assert get_index_job("job") == {"cursor": [0, 0]}
+    assert get_index_job_status("job") == (0, [], None)
+
+    for _ in range(3):
+        add_index_job_chunk("job")
+    remove_index_job_chunk("job")
+    remove_index_job_chunk("job", "error")
+    in_flight, errors, active_on = get_index_job_status("job")
+    assert (in_flight, errors) == (1, ["error"])
+    assert active_on is not None
+
+    clear_index_job("job")
+    assert get_index_job("job") is None
+    assert get_index_job_status("job") == (0, [], None)
@@ -0,0 +1,491 @@
+"""In-process TF-IDF similarity over the titles and descriptions of indexed learning resources
+
+The text of the indexed documents is tokenized, hashed into a fixed number of features and
+weighted by TF-IDF into a sparse matrix with one normalized row per document. Finding the
+documents most similar to a batch of texts is then one sparse matrix product, instead of a
+"more like this" query per text. The matrices are rebuilt periodically by a celery task and
+saved as .npy files, which every process maps into memory instead of loading.
+
+Until the matrices are built, callers fall back to "more like this" queries.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import zlib
+from collections import Counter, namedtuple
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from open_discussions.utils import now_in_utc
+from search.constants import (
+    COURSE_TYPE,
+    LEARNING_RESOURCE_TYPES,
+    SIMILAR_RESOURCE_RELEVANT_FIELDS,
+    SIMILAR_TOPIC_RELEVANT_FIELDS,
+)
+from search.similar import fetch_similar_resources, get_similar_doc
+
+log = logging.getLogger(__name__)
+
+# The documents a similarity matrix is built from, and the fields their text is taken from
+SimilarityCorpus = namedtuple("SimilarityCorpus", ["name", "object_types", "fields"])
+
+TOPICS_CORPUS = SimilarityCorpus(
+    "topics", (COURSE_TYPE,), tuple(SIMILAR_TOPIC_RELEVANT_FIELDS)
+)
+# Every type the "more like this" query for similar resources can return
+RESOURCES_CORPUS = SimilarityCorpus(
+    "resources", LEARNING_RESOURCE_TYPES, tuple(SIMILAR_RESOURCE_RELEVANT_FIELDS)
+)
+SIMILARITY_CORPORA = (TOPICS_CORPUS, RESOURCES_CORPUS)
+
+# The _source fields kept for each row, besides the text fields
+ROW_FIELDS = ["id", "object_type", "topics"]
+
+CURRENT_VERSION_FILE = "CURRENT"
+ROWS_FILE = "rows.json"
+ARRAY_FILES = ("data", "indices", "indptr", "doc_freq")
+
+# The Lucene english stop words, which the OpenSearch english analyzer removes too
+STOP_WORDS = frozenset(
+    [
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "for",
+        "if",
+        "in",
+        "into",
+        "is",
+        "it",
+        "no",
+        "not",
+        "of",
+        "on",
+        "or",
+        "such",
+        "that",
+        "the",
+        "their",
+        "then",
+        "there",
+        "these",
+        "they",
+        "this",
+        "to",
+        "was",
+        "will",
+        "with",
+    ]
+)
+TOKEN_PATTERN = re.compile(r"\w\w+")
+
+# The defaults of a "more like this" query
+MAX_QUERY_TERMS = 25
+MAX_HITS = 10
+
+# The number of texts multiplied with the matrix at once, to bound the size of the scores
+QUERY_BATCH_SIZE = 256
+
+_loaded_indexes = {}
+
+
+def _document_text(doc, fields):
+    """Join the values of the text fields of a document"""
+    values = []
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, (list, tuple)):
+            values.extend(str(item) for item in value if item)
+        elif value:
+            values.append(str(value))
+    return " ".join(values)
+
+
+def count_features(text, n_features):
+    """Count the hashed features of the tokens of a text
+
+    Args:
+        text (str): The text
+        n_features (int): The number of features tokens are hashed into
+
+    Returns:
+        collections.Counter: The number of occurrences of each feature
+
+    """
+    return Counter(
+        zlib.crc32(token.encode("utf-8")) % n_features
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS
+    )
+
+
+def _inverse_doc_freq(doc_freq, n_docs):
+    """Smoothed inverse document frequency of each feature"""
+    return (np.log((1 + n_docs) / (1 + doc_freq)) + 1).astype(np.float32)
+
+
+def _normalize_rows(matrix):
+    """Scale the rows of a matrix to unit length, so their products are cosine similarities"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(
+        matrix.multiply(1 / norms[:, np.newaxis]), dtype=np.float32
+    )
+
+
+def _weigh(matrix, idf):
+    """Weigh a matrix of feature counts by sqrt(tf) * idf like Lucene's classic similarity"""
+    matrix = matrix.astype(np.float32)
+    matrix.data = np.sqrt(matrix.data) * idf[matrix.indices]
+    return _normalize_rows(matrix)
+
+
+def _corpus_path(corpus):
+    """The directory holding the versions of the matrix of a corpus"""
+    return os.path.join(settings.OPENSEARCH_LOCAL_SIMILARITY_PATH, corpus.name)
+
+
+def _save(corpus, matrix, doc_freq, rows):
+    """Save a matrix as a new version and make it the current one, deleting older versions
+
+    The version before the new one is kept, since another process may just be opening it.
+    """
+    path = _corpus_path(corpus)
+    version = now_in_utc().strftime("%Y%m%d%H%M%S%f")
+    version_path = os.path.join(path, version)
+    os.makedirs(version_path)
+    arrays = {
+        "data": matrix.data,
+        "indices": matrix.indices,
+        "indptr": matrix.indptr,
+        "doc_freq": doc_freq,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(version_path, f"{name}.npy"), array)
+    with open(os.path.join(version_path, ROWS_FILE), "w") as rows_file:
+        json.dump({"n_features": matrix.shape[1], "rows": rows}, rows_file)
+
+    current_path = os.path.join(path, CURRENT_VERSION_FILE)
+    with open(f"{current_path}.{version}", "w") as current_file:
+        current_file.write(version)
+    os.replace(f"{current_path}.{version}", current_path)
+
+    versions = sorted(
+        name
+        for name in os.listdir(path)
+        if os.path.isdir(os.path.join(path, name)) and name < version
+    )
+    for old_version in versions[:-1]:
+        shutil.rmtree(os.path.join(path, old_version), ignore_errors=True)
+    return version
+
+
+def build_similarity_index(corpus, hits):
+    """Build the similarity matrix of a corpus from its documents and make it the current one
+
+    Args:
+        corpus (SimilarityCorpus): The corpus
+        hits (iterable of dict): The documents, with their _id and _source
+
+    Returns:
+        int: The number of documents in the matrix
+
+    """
+    n_features = settings.OPENSEARCH_LOCAL_SIMILARITY_FEATURES
+    rows = []
+    indices = []
+    counts = []
+    indptr = [0]
+    for hit in hits:
+        source = hit["_source"]
+        feature_counts = count_features(
+            _document_text(source, corpus.fields), n_features
+        )
+        if not feature_counts:
+            continue
+        indices.extend(feature_counts.keys())
+        counts.extend(feature_counts.values())
+        indptr.append(len(indices))
+        rows.append(
+            {
+                "doc_id": hit["_id"],
+                "routing": hit.get("_routing"),
+                **{field: source.get(field) for field in ROW_FIELDS},
+            }
+        )
+
+    matrix = sparse.csr_matrix(
+        (
+            np.array(counts, dtype=np.float32),
+            np.array(indices, dtype=np.int64),
+            np.array(indptr, dtype=np.int64),
+        ),
+        shape=(len(rows), n_features),
+    )
+    doc_freq = np.bincount(matrix.indices, minlength=n_features).astype(np.int32)
+    matrix = _weigh(matrix, _inverse_doc_freq(doc_freq, len(rows)))
+    version = _save(corpus, matrix, doc_freq, rows)
+    log.info(
+        "Built the %s similarity matrix %s with %d documents",
+        corpus.name,
+        version,
+        len(rows),
+    )
+    return len(rows)
+
+
+class SimilarityIndex:
+    """A similarity matrix mapped into memory, with what is needed to vectorize queries"""
+
+    def __init__(self, version, matrix, doc_freq, rows):
+        self.version = version
+        self.matrix = matrix
+        self.doc_freq = doc_freq
+        self.rows = rows
+        self.idf = _inverse_doc_freq(doc_freq, len(rows))
+
+    @classmethod
+    def load(cls, corpus, version):
+        """Map a version of the similarity matrix of a corpus into memory
+
+        Args:
+            corpus (SimilarityCorpus): The corpus
+            version (str): The version
+
+        Returns:
+            SimilarityIndex: The similarity matrix
+
+        """
+        version_path = os.path.join(_corpus_path(corpus), version)
+        arrays = {
+            name: np.load(os.path.join(version_path, f"{name}.npy"), mmap_mode="r")
+            for name in ARRAY_FILES
+        }
+        with open(os.path.join(version_path, ROWS_FILE)) as rows_file:
+            metadata = json.load(rows_file)
+        matrix = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(len(metadata["rows"]), metadata["n_features"]),
+            copy=False,
+        )
+        return cls(version, matrix, arrays["doc_freq"], metadata["rows"])
+
+    def vectorize(self, texts, *, min_term_freq=1, min_doc_freq=1):
+        """Weigh the features of some texts like the documents of the matrix
+
+        Like a "more like this" query, terms which occur fewer than min_term_freq times in a text
+        or in fewer than min_doc_freq documents are ignored, and only the MAX_QUERY_TERMS best
+        ones are kept.
+
+        Args:
+            texts (list of str): The texts
+            min_term_freq (int): The minimum number of occurrences of a term in a text
+            min_doc_freq (int): The minimum number of documents a term occurs in
+
+        Returns:
+            scipy.sparse.csr_matrix: One normalized row per text
+
+        """
+        n_features = self.matrix.shape[1]
+        indices = []
+        data = []
+        indptr = [0]
+        for text in texts:
+            weights = {
+                feature: np.sqrt(count) * self.idf[feature]
+                for feature, count in count_features(text, n_features).items()
+                if count >= min_term_freq and self.doc_freq[feature] >= min_doc_freq
+            }
+            best = sorted(weights.items(), key=lambda item: item[1], reverse=True)[
+                :MAX_QUERY_TERMS
+            ]
+            indices.extend(feature for feature, _ in best)
+            data.extend(weight for _, weight in best)
+            indptr.append(len(indices))
+        return _normalize_rows(
+            sparse.csr_matrix(
+                (
+                    np.array(data, dtype=np.float32),
+                    np.array(indices, dtype=np.int64),
+                    np.array(indptr, dtype=np.int64),
+                ),
+                shape=(len(texts), n_features),
+            )
+        )
+
+    def top_rows(self, texts, limit, *, min_term_freq=1, min_doc_freq=1):
+        """Find the rows most similar to each of some texts
+
+        Args:
+            texts (list of str): The texts
+            limit (int): The maximum number of rows to return for each text
+            min_term_freq (int): The minimum number of occurrences of a term in a text
+            min_doc_freq (int): The minimum number of documents a term occurs in
+
+        Returns:
+            list of list of int: The rows with a positive similarity to each text, most similar first
+
+        """
+        results = []
+        for start in range(0, len(texts), QUERY_BATCH_SIZE):
+            queries = self.vectorize(
+                texts[start : start + QUERY_BATCH_SIZE],
+                min_term_freq=min_term_freq,
+                min_doc_freq=min_doc_freq,
+            )
+            # The matrix stays in row order, only the small query matrix is transposed
+            scores = sparse.csr_matrix((self.matrix @ queries.T).T)
+            for query in range(scores.shape[0]):
+                row_slice = slice(scores.indptr[query], scores.indptr[query + 1])
+                rows = scores.indices[row_slice]
+                values = scores.data[row_slice]
+                positive = values > 0
+                rows, values = rows[positive], values[positive]
+                if len(values) > limit:
+                    best = np.argpartition(-values, limit)[:limit]
+                    rows, values = rows[best], values[best]
+                results.append(rows[np.argsort(-values, kind="stable")].tolist())
+        return results
+
+    def similar_topics(self, value_docs, num_topics, *, min_term_freq, min_doc_freq):
+        """Vote for the topics of some documents with the topics of their most similar courses
+
+        Args:
+            value_docs (list of dict): The documents
+            num_topics (int): The number of topics to return for each document
+            min_term_freq (int): The minimum number of occurrences of a term in a document
+            min_doc_freq (int): The minimum number of courses a term occurs in
+
+        Returns:
+            list of list of str: The topics of each document
+
+        """
+        texts = [
+            _document_text(value_doc, TOPICS_CORPUS.fields) for value_doc in value_docs
+        ]
+        return [
+            list(
+                dict(
+                    Counter(
+                        topic
+                        for row in rows
+                        for topic in self.rows[row]["topics"] or []
+                    ).most_common(num_topics)
+                ).keys()
+            )
+            for rows in self.top_rows(
+                texts,
+                MAX_HITS,
+                min_term_freq=min_term_freq,
+                min_doc_freq=min_doc_freq,
+            )
+        ]
+
+    def similar_resources(self, value_docs, count, *, min_term_freq, min_doc_freq):
+        """Find the learning resources most similar to some documents
+
+        Args:
+            value_docs (list of dict): The documents
+            count (int): The number of similar resources to return for each document
+            min_term_freq (int): The minimum number of occurrences of a term in a document
+            min_doc_freq (int): The minimum number of learning resources a term occurs in
+
+        Returns:
+            list of list of dict:
+                The doc_id, routing, id and object_type of the resources similar to each document
+        """
+        texts = [
+            _document_text(value_doc, RESOURCES_CORPUS.fields)
+            for value_doc in value_docs
+        ]
+        results = []
+        for value_doc, rows in zip(
+            value_docs,
+            self.top_rows(
+                texts,
+                count + 1,
+                min_term_freq=min_term_freq,
+                min_doc_freq=min_doc_freq,
+            ),
+        ):
+            results.append(
+                [
+                    self.rows[row]
+                    for row in rows
+                    if self.rows[row]["id"] != value_doc.get("id")
+                    or self.rows[row]["object_type"] != value_doc.get("object_type")
+                ][:count]
+            )
+        return results
+
+
+def get_similarity_index(corpus):
+    """Get the current similarity matrix of a corpus, mapping it into memory if it changed
+
+    Args:
+        corpus (SimilarityCorpus): The corpus
+
+    Returns:
+        SimilarityIndex: The similarity matrix, or None if it isn't enabled, built or loadable
+
+    """
+    if not settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED:
+        return None
+    path = _corpus_path(corpus)
+    try:
+        with open(os.path.join(path, CURRENT_VERSION_FILE)) as current_file:
+            version = current_file.read().strip()
+    except FileNotFoundError:
+        return None
+
+    index = _loaded_indexes.get(path)
+    if index is None or index.version != version:
+        try:
+            index = SimilarityIndex.load(corpus, version)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to load the %s similarity matrix", corpus.name)
+            return None
+        _loaded_indexes[path] = index
+    return index
+
+
+def get_local_similar_resources(value_doc):
+    """Find the resources similar to a learning resource with the local similarity matrix
+
+    Args:
+        value_doc (dict): A document with the fields to find similar resources for
+
+    Returns:
+        list of dict:
+            The sources of the similar resources, or None if the matrix isn't available
+    """
+    index = get_similarity_index(RESOURCES_CORPUS)
+    if index is None:
+        return None
+    try:
+        (rows,) = index.similar_resources(
+            [value_doc],
+            settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT,
+            min_term_freq=settings.OPEN_RESOURCES_MIN_TERM_FREQ,
+            min_doc_freq=settings.OPEN_RESOURCES_MIN_DOC_FREQ,
+        )
+        return fetch_similar_resources(
+            [
+                get_similar_doc(row["object_type"], row["doc_id"], row["routing"])
+                for row in rows
+            ]
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to find similar resources with the similarity matrix")
+        return None
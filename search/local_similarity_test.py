@@ -0,0 +1,247 @@
+"""Tests for the in-process TF-IDF similarity matrices"""
+import os
+
+import pytest
+
+from search.constants import (
+    COURSE_TYPE,
+    LEARNING_RESOURCE_TYPES,
+    PROGRAM_TYPE,
+    RESOURCE_FILE_TYPE,
+    USER_LIST_TYPE,
+    USER_PATH_TYPE,
+    VIDEO_TYPE,
+)
+from search.local_similarity import (
+    RESOURCES_CORPUS,
+    TOPICS_CORPUS,
+    build_similarity_index,
+    get_local_similar_resources,
+    get_similarity_index,
+)
+
+COURSES = [
+    ("Quantum physics", "Waves, particles and quantum mechanics", ["Physics"]),
+    ("Classical mechanics", "Forces and motion of particles", ["Physics"]),
+    ("Organic chemistry", "Reactions of carbon molecules", ["Chemistry"]),
+    ("Molecular biology", "Molecules of living cells", ["Biology", "Chemistry"]),
+    ("Poetry", "Reading and writing poems", ["Literature"]),
+]
+
+
+def _course_hits():
+    """Hits of courses with their text and topics"""
+    return [
+        {
+            "_id": f"course_{index}",
+            "_source": {
+                "id": index,
+                "object_type": COURSE_TYPE,
+                "course_id": f"course-{index}",
+                "title": title,
+                "short_description": description,
+                "topics": topics,
+            },
+        }
+        for index, (title, description, topics) in enumerate(COURSES)
+    ]
+
+
+def _resource_hits():
+    """Hits of learning resources of different types"""
+    return [
+        {
+            "_id": "course_1",
+            "_source": {
+                "id": 1,
+                "object_type": COURSE_TYPE,
+                "title": "Quantum physics",
+                "short_description": "Quantum mechanics",
+            },
+        },
+        {
+            "_id": "video_2",
+            "_source": {
+                "id": 2,
+                "object_type": VIDEO_TYPE,
+                "title": "Quantum physics lecture",
+                "short_description": None,
+            },
+        },
+        {
+            "_id": "program_3",
+            "_source": {
+                "id": 3,
+                "object_type": PROGRAM_TYPE,
+                "title": "Physics",
+                "short_description": "Physics and quantum mechanics",
+            },
+        },
+        {
+            "_id": "video_4",
+            "_source": {
+                "id": 4,
+                "object_type": VIDEO_TYPE,
+                "title": "Poetry reading",
+                "short_description": "",
+            },
+        },
+        {"_id": "video_5", "_source": {"id": 5, "object_type": VIDEO_TYPE}},
+    ]
+
+
+@pytest.fixture(autouse=True)
+def local_similarity(settings, tmp_path):
+    """Enable the local similarity matrices in a temporary directory"""
+    settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED = True
+    settings.OPENSEARCH_LOCAL_SIMILARITY_PATH = str(tmp_path)
+    settings.OPENSEARCH_LOCAL_SIMILARITY_FEATURES = 2**12
+    return tmp_path
+
+
+def test_similar_topics():
+    """Topics should be voted for by the most similar courses"""
+    assert build_similarity_index(TOPICS_CORPUS, _course_hits()) == len(COURSES)
+    index = get_similarity_index(TOPICS_CORPUS)
+    # The matrix is mapped read-only from the saved files rather than loaded
+    assert not index.matrix.data.flags.writeable
+
+    assert index.similar_topics(
+        [
+            {"title": "Particles in quantum mechanics"},
+            {"title": "Chemistry of molecules", "short_description": "carbon"},
+            {"title": "The history of art"},
+        ],
+        2,
+        min_term_freq=1,
+        min_doc_freq=1,
+    ) == [["Physics"], ["Chemistry", "Biology"], []]
+
+
+def test_similar_topics_min_freq():
+    """Terms which are too rare in the text or the courses should be ignored"""
+    build_similarity_index(TOPICS_CORPUS, _course_hits())
+    index = get_similarity_index(TOPICS_CORPUS)
+    value_docs = [{"title": "Quantum quantum"}]
+    assert index.similar_topics(value_docs, 1, min_term_freq=2, min_doc_freq=1) == [
+        ["Physics"]
+    ]
+    assert index.similar_topics(value_docs, 1, min_term_freq=3, min_doc_freq=1) == [[]]
+    assert index.similar_topics(value_docs, 1, min_term_freq=1, min_doc_freq=2) == [[]]
+
+
+def test_similar_resources():
+    """The most similar resources should be found, without the resource itself"""
+    assert build_similarity_index(RESOURCES_CORPUS, _resource_hits()) == 4
+    index = get_similarity_index(RESOURCES_CORPUS)
+    similar = index.similar_resources(
+        [
+            {
+                "id": 1,
+                "object_type": COURSE_TYPE,
+                "title": "Quantum physics",
+                "short_description": "Quantum mechanics",
+            },
+            {"id": 4, "object_type": COURSE_TYPE, "title": "Poetry"},
+        ],
+        2,
+        min_term_freq=1,
+        min_doc_freq=1,
+    )
+    assert [[row["doc_id"] for row in rows] for rows in similar] == [
+        ["program_3", "video_2"],
+        ["video_4"],
+    ]
+    assert similar[1][0] == {
+        "doc_id": "video_4",
+        "routing": None,
+        "id": 4,
+        "object_type": VIDEO_TYPE,
+        "topics": None,
+    }
+
+
+def test_get_similarity_index_versions(local_similarity):
+    """A rebuilt matrix should be loaded, and only the previous version kept"""
+    build_similarity_index(TOPICS_CORPUS, _course_hits())
+    first = get_similarity_index(TOPICS_CORPUS)
+    assert get_similarity_index(TOPICS_CORPUS) is first
+
+    build_similarity_index(TOPICS_CORPUS, _course_hits()[:2])
+    second = get_similarity_index(TOPICS_CORPUS)
+    assert second.version > first.version
+    assert len(second.rows) == 2
+
+    build_similarity_index(TOPICS_CORPUS, _course_hits()[:1])
+    assert len(get_similarity_index(TOPICS_CORPUS).rows) == 1
+    path = local_similarity / TOPICS_CORPUS.name
+    assert sorted(
+        name for name in os.listdir(path) if (path / name).is_dir()
+    ) == sorted([second.version, get_similarity_index(TOPICS_CORPUS).version])
+
+
+def test_get_similarity_index_unavailable(mocker, settings):
+    """None should be returned if the matrices are disabled, not built or can't be loaded"""
+    assert get_similarity_index(TOPICS_CORPUS) is None
+    build_similarity_index(TOPICS_CORPUS, _course_hits())
+
+    settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED = False
+    assert get_similarity_index(TOPICS_CORPUS) is None
+    settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED = True
+
+    mocker.patch("search.local_similarity.SimilarityIndex.load", side_effect=OSError)
+    mocker.patch.dict("search.local_similarity._loaded_indexes", clear=True)
+    assert get_similarity_index(TOPICS_CORPUS) is None
+
+
+def test_get_local_similar_resources(mocker, settings):
+    """The similar resources should be fetched by their document id"""
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 1
+    mock_fetch = mocker.patch(
+        "search.local_similarity.fetch_similar_resources", return_value=[{"id": 3}]
+    )
+    value_doc = {"id": 1, "object_type": COURSE_TYPE, "title": "Quantum physics"}
+    assert get_local_similar_resources(value_doc) is None
+
+    build_similarity_index(RESOURCES_CORPUS, _resource_hits())
+    assert get_local_similar_resources(value_doc) == [{"id": 3}]
+    mock_fetch.assert_called_once_with([(PROGRAM_TYPE, "program_3", None)])
+
+    mock_fetch.side_effect = ConnectionError
+    assert get_local_similar_resources(value_doc) is None
+
+
+def test_get_local_similar_resources_all_types(mocker, settings):
+    """Every type the more like this query can return should be found, and fetched from its index"""
+    assert RESOURCES_CORPUS.object_types == LEARNING_RESOURCE_TYPES
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 2
+    mock_fetch = mocker.patch("search.local_similarity.fetch_similar_resources")
+    build_similarity_index(
+        RESOURCES_CORPUS,
+        [
+            {
+                "_id": "user_list_2",
+                "_source": {
+                    "id": 2,
+                    "object_type": USER_PATH_TYPE,
+                    "title": "Learning path of quantum physics",
+                },
+            },
+            {
+                "_id": "cf_3",
+                "_routing": "course_4",
+                "_source": {
+                    "id": 3,
+                    "object_type": RESOURCE_FILE_TYPE,
+                    "title": "Quantum physics lecture notes",
+                },
+            },
+        ],
+    )
+    get_local_similar_resources(
+        {"id": 1, "object_type": COURSE_TYPE, "title": "Quantum physics"}
+    )
+    assert sorted(mock_fetch.call_args[0][0]) == [
+        (COURSE_TYPE, "cf_3", "course_4"),
+        (USER_LIST_TYPE, "user_list_2", None),
+    ]
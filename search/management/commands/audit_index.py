@@ -0,0 +1,94 @@
+"""Management command to compare OpenSearch indexes with the database"""
+import sys
+
+from django.core.management.base import BaseCommand
+
+from search.audit import audit_indexes
+from search.bulk import encode_json
+from search.constants import VALID_OBJECT_TYPES
+
+
+class Command(BaseCommand):
+    """Compares OpenSearch indexes with the database"""
+
+    help = "Report (and optionally repair) documents which are missing from, orphaned in or stale in the opensearch indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", dest="all", action="store_true", help="Audit all indexes"
+        )
+
+        for object_type in sorted(VALID_OBJECT_TYPES):
+            parser.add_argument(
+                f"--{object_type}s",
+                dest=object_type,
+                action="store_true",
+                help=f"Audit the {object_type} index",
+            )
+
+        parser.add_argument(
+            "--hashes",
+            dest="hashes",
+            action="store_true",
+            help="Also compare the content of documents, which serializes every object.",
+        )
+        parser.add_argument(
+            "--repair",
+            dest="repair",
+            action="store_true",
+            help="Index missing and stale documents and delete orphaned documents.",
+        )
+        parser.add_argument(
+            "--report",
+            dest="report",
+            default=None,
+            help="Write each difference as a line of JSON to this file, or - for stdout.",
+        )
+
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        """Compare the indexes with the database"""
+        if options["all"]:
+            object_types = list(VALID_OBJECT_TYPES)
+        else:
+            object_types = [
+                object_type
+                for object_type in VALID_OBJECT_TYPES
+                if options[object_type]
+            ]
+            if not object_types:
+                self.stdout.write(
+                    "Must select at least one index to audit, or use --all"
+                )
+                return
+
+        report_path = options["report"]
+        report_file = None
+        if report_path == "-":
+            report_file = sys.stdout.buffer
+        elif report_path:
+            report_file = open(report_path, "wb")  # pylint: disable=consider-using-with
+
+        def report(difference):
+            """Write a difference to the report"""
+            report_file.write(encode_json(difference) + b"\n")
+
+        try:
+            results = audit_indexes(
+                object_types,
+                hashes=options["hashes"],
+                repair=options["repair"],
+                report=report if report_file else None,
+            )
+        finally:
+            if report_file and report_path != "-":
+                report_file.close()
+
+        for result in results:
+            self.stdout.write(
+                f"{result.doc_type}: {result.checked} checked, {result.missing} missing, "
+                f"{result.orphaned} orphaned, {result.stale} stale"
+            )
+        if options["repair"]:
+            self.stdout.write("Repaired the differences")
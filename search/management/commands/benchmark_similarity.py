@@ -0,0 +1,146 @@
+"""Management command to compare the local similarity matrices with more like this queries"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+
+from course_catalog.models import Video
+from search.api import query_similar_resources, query_similar_topics
+from search.constants import VIDEO_TYPE
+from search.local_similarity import (
+    RESOURCES_CORPUS,
+    TOPICS_CORPUS,
+    get_similarity_index,
+)
+from search.tasks import rebuild_similarity_indexes
+
+
+def _overlap(items, other_items):
+    """The fraction of the larger list of results which is in both"""
+    items, other_items = set(items), set(other_items)
+    if not items and not other_items:
+        return 1
+    return len(items & other_items) / max(len(items), len(other_items))
+
+
+class Command(BaseCommand):
+    """Times similar topics and resources for sampled videos with both methods"""
+
+    help = "Compare the speed and results of the local similarity matrices with more like this queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sample",
+            dest="sample",
+            type=int,
+            default=100,
+            help="The number of published videos to look up topics and similar resources for.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            dest="rebuild",
+            action="store_true",
+            help="Rebuild the similarity matrices from the index first.",
+        )
+        super().add_arguments(parser)
+
+    def write_comparison(self, name, mlt_seconds, local_seconds, overlaps):
+        """Write the timings and average overlap of a comparison"""
+        count = len(overlaps)
+        self.stdout.write(
+            f"{name}: more like this {mlt_seconds:.2f}s ({mlt_seconds / count * 1000:.1f}ms each), "
+            f"local {local_seconds:.2f}s ({local_seconds / count * 1000:.1f}ms each), "
+            f"{mlt_seconds / max(local_seconds, 1e-9):.0f}x faster, "
+            f"{sum(overlaps) / count:.0%} average overlap"
+        )
+
+    def handle(self, *args, **options):
+        """Compare both methods on sampled videos"""
+        if not settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED:
+            raise CommandError("OPENSEARCH_LOCAL_SIMILARITY_ENABLED isn't set")
+        if options["rebuild"]:
+            start = time.perf_counter()
+            counts = rebuild_similarity_indexes()
+            self.stdout.write(
+                f"Rebuilt the similarity matrices in {time.perf_counter() - start:.1f}s: {counts}"
+            )
+
+        topics_index = get_similarity_index(TOPICS_CORPUS)
+        resources_index = get_similarity_index(RESOURCES_CORPUS)
+        if topics_index is None or resources_index is None:
+            raise CommandError(
+                "The similarity matrices aren't built, run with --rebuild first"
+            )
+        videos = list(
+            Video.objects.filter(published=True)
+            .only("id", "title", "short_description")
+            .order_by("?")[: options["sample"]]
+        )
+        if not videos:
+            raise CommandError("There are no published videos to sample")
+        value_docs = [
+            {
+                "title": video.title,
+                "short_description": video.short_description,
+                "id": video.id,
+                "object_type": VIDEO_TYPE,
+            }
+            for video in videos
+        ]
+        text_docs = [
+            {"title": video.title, "short_description": video.short_description}
+            for video in videos
+        ]
+
+        topic_args = (
+            settings.OPEN_VIDEO_MAX_TOPICS,
+            settings.OPEN_VIDEO_MIN_TERM_FREQ,
+            settings.OPEN_VIDEO_MIN_DOC_FREQ,
+        )
+        start = time.perf_counter()
+        mlt_topics = [
+            query_similar_topics(text_doc, *topic_args) for text_doc in text_docs
+        ]
+        mlt_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        local_topics = topics_index.similar_topics(
+            text_docs,
+            settings.OPEN_VIDEO_MAX_TOPICS,
+            min_term_freq=settings.OPEN_VIDEO_MIN_TERM_FREQ,
+            min_doc_freq=settings.OPEN_VIDEO_MIN_DOC_FREQ,
+        )
+        local_seconds = time.perf_counter() - start
+        self.write_comparison(
+            "Topics",
+            mlt_seconds,
+            local_seconds,
+            [_overlap(*topics) for topics in zip(mlt_topics, local_topics)],
+        )
+
+        start = time.perf_counter()
+        mlt_resources = [
+            [
+                (source["object_type"], source["id"])
+                for source in query_similar_resources(AnonymousUser(), value_doc)
+            ]
+            for value_doc in value_docs
+        ]
+        mlt_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        local_resources = [
+            [(row["object_type"], row["id"]) for row in rows]
+            for rows in resources_index.similar_resources(
+                value_docs,
+                settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT,
+                min_term_freq=settings.OPEN_RESOURCES_MIN_TERM_FREQ,
+                min_doc_freq=settings.OPEN_RESOURCES_MIN_DOC_FREQ,
+            )
+        ]
+        local_seconds = time.perf_counter() - start
+        self.write_comparison(
+            "Similar resources",
+            mlt_seconds,
+            local_seconds,
+            [_overlap(*resources) for resources in zip(mlt_resources, local_resources)],
+        )
@@ -0,0 +1,127 @@
+"""Management command to validate, switch to, or roll back a recreated index"""
+from django.core.management.base import BaseCommand, CommandError
+
+from search import indexing_api as api
+from search.connection import get_conn, get_default_alias_name
+from search.constants import VALID_OBJECT_TYPES
+from search.cutover import (
+    get_retired_indexes,
+    rollback_cutover,
+    validate_cutover,
+)
+from search.exceptions import ReindexException
+
+
+class Command(BaseCommand):
+    """Validates, switches to, or rolls back the backing index of object types"""
+
+    help = "Validate or switch to the index being recreated, or roll back to the index it replaced"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", dest="all", action="store_true", help="Use every index"
+        )
+        for object_type in sorted(VALID_OBJECT_TYPES):
+            parser.add_argument(
+                f"--{object_type}s",
+                dest=object_type,
+                action="store_true",
+                help=f"Use the {object_type} index",
+            )
+
+        action = parser.add_mutually_exclusive_group(required=True)
+        action.add_argument(
+            "--validate",
+            dest="validate",
+            action="store_true",
+            help="Warm up the index being recreated with sampled queries and compare it with the current one.",
+        )
+        action.add_argument(
+            "--switch",
+            dest="switch",
+            action="store_true",
+            help="Switch to the index being recreated if it passes validation.",
+        )
+        action.add_argument(
+            "--rollback",
+            dest="rollback",
+            action="store_true",
+            help="Switch back to the latest index which was replaced.",
+        )
+        parser.add_argument(
+            "--force",
+            dest="force",
+            action="store_true",
+            help="With --switch, switch without validating the index.",
+        )
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        """Validate, switch or roll back the selected indexes"""
+        object_types = sorted(
+            VALID_OBJECT_TYPES
+            if options["all"]
+            else [
+                object_type
+                for object_type in VALID_OBJECT_TYPES
+                if options[object_type]
+            ]
+        )
+        if not object_types:
+            raise CommandError("Must select at least one index, or --all")
+
+        failed = []
+        for object_type in object_types:
+            try:
+                if options["rollback"]:
+                    self.rollback(object_type)
+                else:
+                    self.validate_or_switch(object_type, options)
+            except ReindexException as exc:
+                self.stderr.write(str(exc))
+                failed.append(object_type)
+        if failed:
+            raise CommandError(f"Cutover failed for {', '.join(failed)}")
+
+    def validate_or_switch(self, object_type, options):
+        """Validate the index being recreated for an object type, and switch to it if requested"""
+        backing_index = api.get_reindexing_index(object_type)
+        if backing_index is None:
+            self.stdout.write(f"{object_type}: no index is being recreated")
+            return
+        if options["switch"]:
+            api.switch_indices(
+                backing_index, object_type, validate=not options["force"]
+            )
+            self.stdout.write(f"{object_type}: switched to {backing_index}")
+            return
+
+        conn = get_conn()
+        default_alias = get_default_alias_name(object_type)
+        old_indexes = (
+            list(conn.indices.get_alias(name=default_alias))
+            if conn.indices.exists_alias(name=default_alias)
+            else []
+        )
+        report = validate_cutover(
+            object_type, backing_index, old_indexes[0] if old_indexes else None
+        )
+        overlap = "n/a" if report.overlap is None else f"{report.overlap:.0%}"
+        self.stdout.write(
+            f"{object_type}: {report.new_index} has {report.new_count} documents "
+            f"({report.old_index or 'no current index'}: {report.old_count}), "
+            f"{report.queries} sampled queries with {overlap} overlap and "
+            f"{report.failed_queries} failures: "
+            f"{'; '.join(report.problems) or 'passed'}"
+        )
+
+    def rollback(self, object_type):
+        """Switch an object type back to the latest index which was replaced"""
+        retired = get_retired_indexes(object_type)
+        if not retired:
+            self.stdout.write(f"{object_type}: there is no index to roll back to")
+            return
+        index = rollback_cutover(object_type)
+        self.stdout.write(
+            f"{object_type}: rolled back to {index}, run update_index to bring it up to date"
+        )
@@ -0,0 +1,57 @@
+"""Management command to show the progress of indexing jobs"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.constants import RESOURCE_FILE_TYPE, VALID_OBJECT_TYPES
+from search.progress import get_progress
+
+
+class Command(BaseCommand):
+    """Shows the progress of the last recreate_index or update_index"""
+
+    help = "Show completion, throughput and ETA of the last indexing job for each object type"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--watch",
+            dest="watch",
+            type=int,
+            default=0,
+            help="Refresh the progress every this many seconds until every object type is done.",
+        )
+        super().add_arguments(parser)
+
+    def write_progress(self, progress):
+        """Write a line of progress for each object type"""
+        for object_type, record in progress.items():
+            eta = record["eta_seconds"]
+            eta = "unknown" if eta is None else f"{eta:.0f}s"
+            chunk_seconds = (
+                record["seconds"] / record["chunks_done"]
+                if record["chunks_done"]
+                else 0
+            )
+            self.stdout.write(
+                f"{object_type}: {record['completion']:.1%} of {record['chunks_total']} chunks "
+                f"({record['chunks_done']} done, {record['chunks_failed']} failed, "
+                f"{record['chunks_retried']} retried), {record['docs']} docs, "
+                f"{record['bytes'] / 1024 / 1024:.1f} MiB, {record['docs_per_second']:.1f} docs/s, "
+                f"{record['took']:.1f}s in OpenSearch, {chunk_seconds:.2f}s per chunk, ETA {eta}"
+            )
+
+    def handle(self, *args, **options):
+        """Show the progress of indexing jobs"""
+        object_types = [*VALID_OBJECT_TYPES, RESOURCE_FILE_TYPE]
+        while True:
+            progress = get_progress(object_types)
+            if not progress:
+                self.stdout.write("No indexing job has been started")
+                return
+            self.write_progress(progress)
+            if not options["watch"] or all(
+                record["completion"] >= 1 for record in progress.values()
+            ):
+                return
+            time.sleep(options["watch"])
+            self.stdout.write("")
@@ -3,7 +3,7 @@ from django.core.management.base import BaseCommand, CommandError
 
 from open_discussions.utils import now_in_utc
 from search.constants import VALID_OBJECT_TYPES
-from search.tasks import start_recreate_index
+from search.tasks import resume_recreate_index, start_recreate_index
 
 
 class Command(BaseCommand):
@@ -23,11 +23,23 @@ class Command(BaseCommand):
                 action="store_true",
                 help=f"Recreate the {object_type} index",
             )
+
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Index only the chunks which failed in the last recreate_index, then switch indexes.",
+        )
         super().add_arguments(parser)
 
     def handle(self, *args, **options):
         """Index the comments and posts for the channels the user is subscribed to"""
-        if options["all"]:
+        if options["resume"]:
+            task = resume_recreate_index.delay()
+            self.stdout.write(
+                f"Started celery task {task} to resume the last recreate_index"
+            )
+        elif options["all"]:
             task = start_recreate_index.delay(list(VALID_OBJECT_TYPES))
             self.stdout.write(
                 f"Started celery task {task} to index content for all indexes"
@@ -4,7 +4,7 @@ from django.core.management.base import BaseCommand
 from course_catalog.models import Course
 from search.connection import get_default_alias_name
 from search.constants import COURSE_TYPE
-from search.indexing_api import es_iterate_all_documents, gen_course_id
+from search.indexing_api import gen_course_id, iterate_documents
 from search.tasks import deindex_document
 
 
@@ -21,19 +21,23 @@ class Command(BaseCommand):
         bad_courses = []
         bad_documents = []
 
-        for course_obj in Course.objects.filter(published=True):
+        for course_obj in Course.objects.filter(published=True).only(
+            "platform", "course_id"
+        ):
             es_course_ids.add(gen_course_id(course_obj.platform, course_obj.course_id))
 
         query = {"term": {"object_type": "course"}}
 
-        for listing in es_iterate_all_documents(index, query):
+        for listing in iterate_documents(index, query, source_fields=[]):
             es_id = listing["_id"]
             if es_id not in es_course_ids:
                 bad_courses.append(listing)
 
         for course in bad_courses:
             query = {"parent_id": {"type": "resourcefile", "id": course["_id"]}}
-            for document in es_iterate_all_documents(index, query):
+            for document in iterate_documents(
+                index, query, source_fields=["resource_relations"]
+            ):
                 bad_documents.append(document)
 
         self.stdout.write(f"Removing {len(bad_documents)} document records")
@@ -1,9 +1,11 @@
 """Management command to index reddit content"""
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from course_catalog.constants import PlatformType
 from open_discussions.utils import now_in_utc
 from search.constants import COURSE_TYPE, RESOURCE_FILE_TYPE, VALID_OBJECT_TYPES
+from search.fingerprints import get_fingerprint_stats
 from search.tasks import start_update_index
 
 valid_object_types = list(VALID_OBJECT_TYPES)
@@ -44,12 +46,29 @@ class Command(BaseCommand):
             help="Filter courses and course files update by platform.",
         )
 
+        parser.add_argument(
+            "--incremental",
+            dest="incremental",
+            action="store_true",
+            help=(
+                "Only update objects modified since the last successful update. "
+                "Changes to relations are only tracked if OPENSEARCH_INCREMENTAL_UPDATE_ENABLED is set."
+            ),
+        )
+
         super().add_arguments(parser)
 
     def handle(self, *args, **options):
         """Index the comments and posts for the channels the user is subscribed to"""
+        fingerprints_enabled = settings.OPENSEARCH_FINGERPRINTS_ENABLED
+        if fingerprints_enabled:
+            stats_before = get_fingerprint_stats(VALID_OBJECT_TYPES)
         if options["all"]:
-            task = start_update_index.delay(valid_object_types, options["platform"])
+            task = start_update_index.delay(
+                valid_object_types,
+                options["platform"],
+                incremental=options["incremental"],
+            )
             self.stdout.write(
                 f"Started celery task {task} to update index content for all indexes"
             )
@@ -77,7 +96,11 @@ class Command(BaseCommand):
                 self.stderr.write(
                     "WARNING: Courses will be updated but not course content files"
                 )
-            task = start_update_index.delay(indexes_to_update, options["platform"])
+            task = start_update_index.delay(
+                indexes_to_update,
+                options["platform"],
+                incremental=options["incremental"],
+            )
             self.stdout.write(
                 f"Started celery task {task} to update index content for the following indexes: {indexes_to_update}"
             )
@@ -98,3 +121,11 @@ class Command(BaseCommand):
 
         total_seconds = (now_in_utc() - start).total_seconds()
         self.stdout.write(f"Update index finished, took {total_seconds} seconds")
+        if fingerprints_enabled:
+            for object_type, stats in get_fingerprint_stats(VALID_OBJECT_TYPES).items():
+                checked = stats["checked"] - stats_before[object_type]["checked"]
+                skipped = stats["skipped"] - stats_before[object_type]["skipped"]
+                if checked:
+                    self.stdout.write(
+                        f"Skipped {skipped} of {checked} unchanged {object_type} documents ({skipped / checked:.1%})"
+                    )
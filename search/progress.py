@@ -0,0 +1,204 @@
+"""Progress and throughput of the chunks of indexing jobs, shared between workers"""
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+from open_discussions.utils import now_in_utc
+from search.exceptions import RetryException
+from search.indexing_state import get_indexing_state_cache
+
+log = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "search:progress"
+
+# Counters kept for each object type. took and seconds are stored in milliseconds.
+PROGRESS_COUNTERS = (
+    "chunks_done",
+    "chunks_failed",
+    "chunks_retried",
+    "docs",
+    "bytes",
+    "took",
+    "seconds",
+)
+
+# Totals over the bulk requests writing a chunk of documents
+ChunkStats = namedtuple("ChunkStats", ["docs", "bytes", "took", "requests"])
+
+
+def summarize_bulk_stats(bulk_stats, alias_count):
+    """Total the statistics of the bulk requests which wrote some documents
+
+    Args:
+        bulk_stats (list of search.bulk.BulkStats): Statistics about each bulk request
+        alias_count (int): The number of aliases each document was written to
+
+    Returns:
+        ChunkStats: The totals
+
+    """
+    return ChunkStats(
+        docs=sum(stats.actions for stats in bulk_stats) // max(alias_count, 1),
+        bytes=sum(stats.size for stats in bulk_stats),
+        took=sum(stats.took for stats in bulk_stats),
+        requests=len(bulk_stats),
+    )
+
+
+def add_chunk_stats(*chunk_stats):
+    """Add up ChunkStats, ignoring None for writes which were skipped
+
+    Args:
+        chunk_stats (ChunkStats): Statistics to add
+
+    Returns:
+        ChunkStats: The totals
+
+    """
+    written = [stats for stats in chunk_stats if stats]
+    if not written:
+        return ChunkStats(0, 0, 0, 0)
+    return ChunkStats(*(sum(values) for values in zip(*written)))
+
+
+def _progress_key(object_type, field):
+    """Cache key for a progress field of an object type"""
+    return f"{PROGRESS_KEY_PREFIX}:{object_type}:{field}"
+
+
+def start_progress(chunk_counts):
+    """Reset the progress of some object types for a new indexing job
+
+    Args:
+        chunk_counts (dict): The number of chunks the job will index, keyed by object type
+
+    """
+    started_on = now_in_utc().isoformat()
+    values = {}
+    for object_type, chunk_count in chunk_counts.items():
+        values[_progress_key(object_type, "chunks_total")] = chunk_count
+        values[_progress_key(object_type, "started_on")] = started_on
+        for counter in PROGRESS_COUNTERS:
+            values[_progress_key(object_type, counter)] = 0
+    try:
+        get_indexing_state_cache().set_many(values, timeout=None)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to start indexing progress for %s", list(chunk_counts))
+
+
+def _increment(object_type, counts):
+    """Increment some progress counters of an object type"""
+    cache = get_indexing_state_cache()
+    try:
+        for counter, count in counts.items():
+            if count:
+                key = _progress_key(object_type, counter)
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, count)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to record indexing progress for %s", object_type)
+
+
+class ChunkTracker:
+    """Collects the statistics of the writes made while indexing a chunk"""
+
+    def __init__(self):
+        self.stats = ChunkStats(0, 0, 0, 0)
+
+    def add(self, stats):
+        """Add the statistics returned by an indexing function
+
+        Args:
+            stats (ChunkStats or None): The statistics, or None if nothing was written
+
+        """
+        self.stats = add_chunk_stats(self.stats, stats)
+
+
+@contextmanager
+def track_chunk(object_type):
+    """Record the outcome, throughput and wall time of indexing a chunk
+
+    Args:
+        object_type (str): The object type of the chunk
+
+    Yields:
+        ChunkTracker: Collects the statistics of the writes
+
+    """
+    tracker = ChunkTracker()
+    start = time.monotonic()
+    outcome = "chunks_failed"
+    try:
+        yield tracker
+        outcome = "chunks_done"
+    except RetryException:
+        outcome = "chunks_retried"
+        raise
+    finally:
+        _increment(
+            object_type,
+            {
+                outcome: 1,
+                "docs": tracker.stats.docs,
+                "bytes": tracker.stats.bytes,
+                "took": tracker.stats.took,
+                "seconds": int((time.monotonic() - start) * 1000),
+            },
+        )
+
+
+def skip_chunk(object_type):
+    """Count a chunk which an earlier run of a resumed job already indexed as done
+
+    Args:
+        object_type (str): The object type of the chunk
+
+    """
+    _increment(object_type, {"chunks_done": 1})
+
+
+def get_progress(object_types):
+    """Get the progress of the last indexing job of some object types
+
+    Args:
+        object_types (iterable of str): The object types
+
+    Returns:
+        dict: Progress keyed by object type, for object types which were ever indexed
+
+    """
+    fields = ("chunks_total", "started_on", *PROGRESS_COUNTERS)
+    keys = {
+        (object_type, field): _progress_key(object_type, field)
+        for object_type in object_types
+        for field in fields
+    }
+    values = get_indexing_state_cache().get_many(list(keys.values()))
+    now = now_in_utc()
+    progress = {}
+    for object_type in object_types:
+        record = {field: values.get(keys[(object_type, field)]) for field in fields}
+        if record["started_on"] is None:
+            continue
+        for counter in ("chunks_total", *PROGRESS_COUNTERS):
+            record[counter] = record[counter] or 0
+        record["took"] /= 1000
+        record["seconds"] /= 1000
+        elapsed = (now - datetime.fromisoformat(record["started_on"])).total_seconds()
+        finished = record["chunks_done"] + record["chunks_failed"]
+        remaining = max(record["chunks_total"] - finished, 0)
+        record["completion"] = (
+            finished / record["chunks_total"] if record["chunks_total"] else 1
+        )
+        record["docs_per_second"] = record["docs"] / elapsed if elapsed > 0 else 0
+        if not remaining:
+            record["eta_seconds"] = 0
+        elif finished:
+            record["eta_seconds"] = elapsed / finished * remaining
+        else:
+            record["eta_seconds"] = None
+        progress[object_type] = record
+    return progress
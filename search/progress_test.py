@@ -0,0 +1,93 @@
+"""Tests for indexing progress"""
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+
+from open_discussions.utils import now_in_utc
+from search.bulk import BulkStats
+from search.constants import COURSE_TYPE, VIDEO_TYPE
+from search.exceptions import RetryException
+from search.progress import (
+    ChunkStats,
+    add_chunk_stats,
+    get_progress,
+    start_progress,
+    summarize_bulk_stats,
+    track_chunk,
+)
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for indexing state"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_summarize_bulk_stats():
+    """Documents should be counted once even if they were written to several aliases"""
+    stats = summarize_bulk_stats(
+        [
+            BulkStats(actions=4, size=100, took=5, seconds=1, retries=0),
+            BulkStats(actions=2, size=50, took=3, seconds=1, retries=1),
+        ],
+        2,
+    )
+    assert stats == ChunkStats(docs=3, bytes=150, took=8, requests=2)
+    assert add_chunk_stats(stats, None, stats) == ChunkStats(6, 300, 16, 4)
+    assert add_chunk_stats(None) == ChunkStats(0, 0, 0, 0)
+
+
+def test_progress(mocker):
+    """Chunks should be counted by outcome, with their throughput"""
+    started_on = now_in_utc() - timedelta(seconds=10)
+    mocker.patch("search.progress.now_in_utc", return_value=started_on)
+    start_progress({COURSE_TYPE: 4, VIDEO_TYPE: 1})
+    mocker.patch(
+        "search.progress.now_in_utc", return_value=started_on + timedelta(seconds=10)
+    )
+
+    for _ in range(2):
+        with track_chunk(COURSE_TYPE) as chunk:
+            chunk.add(ChunkStats(docs=10, bytes=1000, took=1500, requests=1))
+    with pytest.raises(RetryException), track_chunk(COURSE_TYPE):
+        raise RetryException("retry")
+    with pytest.raises(ValueError), track_chunk(COURSE_TYPE) as chunk:
+        chunk.add(ChunkStats(docs=5, bytes=10, took=0, requests=1))
+        raise ValueError()
+
+    progress = get_progress([COURSE_TYPE, VIDEO_TYPE, "podcast"])
+    assert list(progress) == [COURSE_TYPE, VIDEO_TYPE]
+    course_progress = progress[COURSE_TYPE]
+    assert {
+        key: course_progress[key]
+        for key in (
+            "chunks_total",
+            "chunks_done",
+            "chunks_failed",
+            "chunks_retried",
+            "docs",
+            "bytes",
+            "took",
+            "completion",
+            "docs_per_second",
+            "eta_seconds",
+        )
+    } == {
+        "chunks_total": 4,
+        "chunks_done": 2,
+        "chunks_failed": 1,
+        "chunks_retried": 1,
+        "docs": 25,
+        "bytes": 2010,
+        "took": 3,
+        "completion": 0.75,
+        "docs_per_second": 2.5,
+        "eta_seconds": pytest.approx(10 / 3),
+    }
+    assert progress[VIDEO_TYPE]["completion"] == 0
+    assert progress[VIDEO_TYPE]["eta_seconds"] is None
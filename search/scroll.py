@@ -0,0 +1,121 @@
+"""Streaming every document matching a query with (optionally sliced) scrolls"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from opensearchpy.exceptions import NotFoundError
+
+log = logging.getLogger(__name__)
+
+# How long a slice waits for the consumer to take a page before checking whether it stopped
+PUT_TIMEOUT = 1
+
+_SLICE_DONE = object()
+
+
+def iter_scroll_slice(conn, index, body, *, keep_alive, slice_id=None, slices=1):
+    """Yield pages of hits from one slice of a scroll, clearing the scroll afterwards
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        index (str): The index or alias
+        body (dict): The search request body
+        keep_alive (str): How long OpenSearch keeps the scroll context between pages
+        slice_id (int): The slice to read, if the scroll is sliced
+        slices (int): The number of slices
+
+    Yields:
+        list of dict: Pages of hits
+
+    """
+    if slices > 1:
+        body = {**body, "slice": {"id": slice_id, "max": slices}}
+    response = conn.search(index=index, body=body, scroll=keep_alive)
+    scroll_id = response.get("_scroll_id")
+    try:
+        while response["hits"]["hits"]:
+            yield response["hits"]["hits"]
+            response = conn.scroll(body={"scroll_id": scroll_id}, scroll=keep_alive)
+            scroll_id = response.get("_scroll_id", scroll_id)
+    finally:
+        if scroll_id:
+            try:
+                conn.clear_scroll(body={"scroll_id": [scroll_id]})
+            except NotFoundError:
+                pass
+
+
+def iter_scroll_pages(conn, index, body, *, keep_alive, slices=1):
+    """Yield pages of hits for every document matching a search
+
+    With more than one slice, the slices are scrolled concurrently by a thread each. Pages
+    are handed over through a queue holding one page per slice, so a slice stops fetching
+    while the consumer is behind. Pages of different slices are interleaved.
+
+    Args:
+        conn (opensearchpy.OpenSearch): An OpenSearch client
+        index (str): The index or alias
+        body (dict): The search request body
+        keep_alive (str): How long OpenSearch keeps the scroll contexts between pages
+        slices (int): The number of slices to scroll concurrently
+
+    Yields:
+        list of dict: Pages of hits
+
+    """
+    if slices <= 1:
+        yield from iter_scroll_slice(conn, index, body, keep_alive=keep_alive)
+        return
+
+    pages = queue.Queue(maxsize=slices)
+    stopped = threading.Event()
+
+    def put(item):
+        """Put an item on the queue unless the consumer stops first"""
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_slice(slice_id):
+        """Put the pages of a slice on the queue until it's exhausted or the consumer stops"""
+        try:
+            for page in iter_scroll_slice(
+                conn,
+                index,
+                body,
+                keep_alive=keep_alive,
+                slice_id=slice_id,
+                slices=slices,
+            ):
+                if not put(page):
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            put(exc)
+        finally:
+            put(_SLICE_DONE)
+
+    with ThreadPoolExecutor(max_workers=slices) as executor:
+        futures = [executor.submit(read_slice, slice_id) for slice_id in range(slices)]
+        try:
+            remaining = slices
+            while remaining:
+                page = pages.get()
+                if page is _SLICE_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stopped.set()
+            # Unblock slices which are waiting for room on the queue
+            while not all(future.done() for future in futures):
+                try:
+                    pages.get(timeout=PUT_TIMEOUT)
+                except queue.Empty:
+                    pass
@@ -0,0 +1,86 @@
+"""Tests for streaming documents with scrolls"""
+import pytest
+
+from search.scroll import iter_scroll_pages
+
+
+class FakeScrollConnection:
+    """Serve the hits of each slice in pages of two, like a scroll would"""
+
+    def __init__(self, hits_per_slice, fail_slice=None):
+        self.hits_per_slice = hits_per_slice
+        self.fail_slice = fail_slice
+        self.bodies = []
+        self.cleared = []
+        self._remaining = {}
+
+    def _page(self, scroll_id):
+        hits = self._remaining[scroll_id]
+        self._remaining[scroll_id] = hits[2:]
+        return {"_scroll_id": scroll_id, "hits": {"hits": hits[:2]}}
+
+    def search(self, index, body, scroll):  # pylint: disable=unused-argument
+        """Start a scroll"""
+        self.bodies.append(body)
+        slice_id = body.get("slice", {}).get("id", 0)
+        if slice_id == self.fail_slice:
+            raise ConnectionError("failed")
+        scroll_id = f"scroll{slice_id}"
+        self._remaining[scroll_id] = self.hits_per_slice[slice_id]
+        return self._page(scroll_id)
+
+    def scroll(self, body, scroll):  # pylint: disable=unused-argument
+        """Get the next page of a scroll"""
+        return self._page(body["scroll_id"])
+
+    def clear_scroll(self, body):
+        """Clear a scroll"""
+        self.cleared.extend(body["scroll_id"])
+
+
+def _hits(prefix, count):
+    """Make some hits"""
+    return [{"_id": f"{prefix}{num}"} for num in range(count)]
+
+
+def test_iter_scroll_pages():
+    """Every page of the scroll should be yielded and the scroll cleared"""
+    conn = FakeScrollConnection([_hits("a", 5)])
+    pages = list(iter_scroll_pages(conn, "index", {"size": 2}, keep_alive="1m"))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert conn.bodies == [{"size": 2}]
+    assert conn.cleared == ["scroll0"]
+
+
+def test_iter_scroll_pages_sliced():
+    """Every slice should be scrolled and cleared"""
+    conn = FakeScrollConnection([_hits("a", 5), _hits("b", 3), _hits("c", 0)])
+    hits = [
+        hit["_id"]
+        for page in iter_scroll_pages(
+            conn, "index", {"size": 2}, keep_alive="1m", slices=3
+        )
+        for hit in page
+    ]
+    assert sorted(hits) == sorted(
+        hit["_id"] for hits in conn.hits_per_slice for hit in hits
+    )
+    assert sorted(body["slice"]["id"] for body in conn.bodies) == [0, 1, 2]
+    assert sorted(conn.cleared) == ["scroll0", "scroll1", "scroll2"]
+
+
+def test_iter_scroll_pages_stopped():
+    """Slices should stop and clear their scrolls if the consumer stops early"""
+    conn = FakeScrollConnection([_hits("a", 20), _hits("b", 20)])
+    pages = iter_scroll_pages(conn, "index", {"size": 2}, keep_alive="1m", slices=2)
+    next(pages)
+    pages.close()
+    assert sorted(conn.cleared) == ["scroll0", "scroll1"]
+
+
+def test_iter_scroll_pages_error():
+    """An error in one slice should be raised to the consumer"""
+    conn = FakeScrollConnection([_hits("a", 20), []], fail_slice=1)
+    with pytest.raises(ConnectionError):
+        list(iter_scroll_pages(conn, "index", {"size": 2}, keep_alive="1m", slices=2))
+    assert conn.cleared == ["scroll0"]
@@ -29,6 +29,7 @@ from search.constants import (
 from search.tasks import (
     deindex_document,
 )
+from search.update_queue import enqueue_deletion, enqueue_update
 
 log = logging.getLogger()
 
@@ -41,6 +42,42 @@ def try_with_retry_as_task(function, *args):
         function.delay(*args)
 
 
+def upsert_or_enqueue(function, object_type, obj_id):
+    """Queue an object to be indexed if the update queue is enabled, otherwise run the upsert task
+
+    Args:
+        function (celery.Task): The upsert task
+        object_type (str): The object type
+        obj_id (int): The database id of the object
+
+    """
+    if settings.OPENSEARCH_UPDATE_QUEUE_ENABLED:
+        try:
+            enqueue_update(object_type, obj_id)
+            return
+        except Exception:  # pylint:disable=broad-except
+            log.exception("Unable to queue %s %s for indexing", object_type, obj_id)
+    try_with_retry_as_task(function, obj_id)
+
+
+def deindex_or_enqueue(object_type, obj_id, doc_id):
+    """Queue an object to be deindexed if the update queue is enabled, otherwise run the deindex task
+
+    Args:
+        object_type (str): The object type
+        obj_id (int): The database id of the object
+        doc_id (str): The OpenSearch document id
+
+    """
+    if settings.OPENSEARCH_UPDATE_QUEUE_ENABLED:
+        try:
+            enqueue_deletion(object_type, obj_id, doc_id)
+            return
+        except Exception:  # pylint:disable=broad-except
+            log.exception("Unable to queue %s %s for deindexing", object_type, obj_id)
+    try_with_retry_as_task(deindex_document, doc_id, object_type)
+
+
 @if_feature_enabled(INDEX_UPDATES)
 def upsert_profile(user_id):
     """Run a task to update all fields of a profile document except id (username)
@@ -74,7 +111,7 @@ def upsert_course(course_id):
         course_id (int): the primary key for the Course to update
 
     """
-    try_with_retry_as_task(tasks.upsert_course, course_id)
+    upsert_or_enqueue(tasks.upsert_course, COURSE_TYPE, course_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -85,14 +122,13 @@ def deindex_course(course_obj):
         course_obj (course_catalog.models.Course): A Course object
 
     """
-    try_with_retry_as_task(
-        deindex_document,
-        gen_course_id(course_obj.platform, course_obj.course_id),
+    deindex_or_enqueue(
         COURSE_TYPE,
+        course_obj.id,
+        gen_course_id(course_obj.platform, course_obj.course_id),
     )
 
-    for run_id in course_obj.runs.values_list("id", flat=True):
-        try_with_retry_as_task(deindex_run_content_files, run_id)
+    try_with_retry_as_task(tasks.deindex_course_content_files, [course_obj.id])
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -136,7 +172,7 @@ def upsert_program(program_id):
         program_id (int): the primary key for the Program to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_program, program_id)
+    upsert_or_enqueue(tasks.upsert_program, PROGRAM_TYPE, program_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -147,7 +183,7 @@ def deindex_program(program_obj):
         program_obj (course_catalog.models.Program): A Program object
 
     """
-    try_with_retry_as_task(deindex_document, gen_program_id(program_obj), PROGRAM_TYPE)
+    deindex_or_enqueue(PROGRAM_TYPE, program_obj.id, gen_program_id(program_obj))
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -158,7 +194,7 @@ def upsert_user_list(user_list_id):
         user_list_id (int): the primary key for the UserList to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_user_list, user_list_id)
+    upsert_or_enqueue(tasks.upsert_user_list, USER_LIST_TYPE, user_list_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -169,8 +205,8 @@ def deindex_user_list(user_list_obj):
         user_list_obj (course_catalog.models.UserList): A UserList object
 
     """
-    try_with_retry_as_task(
-        deindex_document, gen_user_list_id(user_list_obj), USER_LIST_TYPE
+    deindex_or_enqueue(
+        USER_LIST_TYPE, user_list_obj.id, gen_user_list_id(user_list_obj)
     )
 
 
@@ -182,7 +218,7 @@ def upsert_staff_list(staff_list_id):
         staff_list_id (int): the primary key for the StaffList to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_staff_list, staff_list_id)
+    upsert_or_enqueue(tasks.upsert_staff_list, STAFF_LIST_TYPE, staff_list_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -193,8 +229,8 @@ def deindex_staff_list(staff_list_obj):
         staff_list_obj (course_catalog.models.StaffList): A StaffList object
 
     """
-    try_with_retry_as_task(
-        deindex_document, gen_staff_list_id(staff_list_obj), STAFF_LIST_TYPE
+    deindex_or_enqueue(
+        STAFF_LIST_TYPE, staff_list_obj.id, gen_staff_list_id(staff_list_obj)
     )
 
 
@@ -206,7 +242,7 @@ def upsert_video(video_id):
         video_id (int): the database primary key of the Video to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_video, video_id)
+    upsert_or_enqueue(tasks.upsert_video, VIDEO_TYPE, video_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -217,7 +253,7 @@ def deindex_video(video_obj):
         video_obj (course_catalog.models.Video): A Video object
 
     """
-    try_with_retry_as_task(deindex_document, gen_video_id(video_obj), VIDEO_TYPE)
+    deindex_or_enqueue(VIDEO_TYPE, video_obj.id, gen_video_id(video_obj))
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -228,7 +264,7 @@ def upsert_podcast(podcast_id):
         podcast_id (int): the database primary key of the Podcast to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_podcast, podcast_id)
+    upsert_or_enqueue(tasks.upsert_podcast, PODCAST_TYPE, podcast_id)
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -239,7 +275,7 @@ def deindex_podcast(podcast_obj):
         podcast_obj (course_catalog.models.Podcast): A Podcast object
 
     """
-    try_with_retry_as_task(deindex_document, gen_podcast_id(podcast_obj), PODCAST_TYPE)
+    deindex_or_enqueue(PODCAST_TYPE, podcast_obj.id, gen_podcast_id(podcast_obj))
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -250,7 +286,9 @@ def upsert_podcast_episode(podcast_episode_id):
         podcast_episode_id (int): the database primary key of the PodcastEpisode to update in ES
 
     """
-    try_with_retry_as_task(tasks.upsert_podcast_episode, podcast_episode_id)
+    upsert_or_enqueue(
+        tasks.upsert_podcast_episode, PODCAST_EPISODE_TYPE, podcast_episode_id
+    )
 
 
 @if_feature_enabled(INDEX_UPDATES)
@@ -261,8 +299,8 @@ def deindex_podcast_episode(podcast_episode_obj):
         podcast_episode_obj (course_catalog.models.PodcastEpisode): A PodcastEpisode object
 
     """
-    try_with_retry_as_task(
-        deindex_document,
-        gen_podcast_episode_id(podcast_episode_obj),
+    deindex_or_enqueue(
         PODCAST_EPISODE_TYPE,
+        podcast_episode_obj.id,
+        gen_podcast_episode_id(podcast_episode_obj),
     )
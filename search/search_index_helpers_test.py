@@ -1 +1,56 @@
-"""Tests for deprecated discussion functionality - removed"""
+"""Tests for search index helpers"""
+import pytest
+
+from course_catalog.factories import CourseFactory
+from open_discussions import features
+from search import search_index_helpers
+from search.api import gen_course_id
+from search.constants import COURSE_TYPE
+
+
+@pytest.fixture(autouse=True)
+def index_updates(settings):
+    """Enable index updates"""
+    settings.FEATURES[features.INDEX_UPDATES] = True
+
+
+@pytest.mark.parametrize("queue_enabled", [True, False])
+def test_upsert_course(mocker, settings, queue_enabled):
+    """upsert_course should queue the course if the update queue is enabled"""
+    settings.OPENSEARCH_UPDATE_QUEUE_ENABLED = queue_enabled
+    mock_enqueue = mocker.patch("search.search_index_helpers.enqueue_update")
+    mock_upsert = mocker.patch("search.search_index_helpers.tasks.upsert_course")
+    search_index_helpers.upsert_course(1)
+    if queue_enabled:
+        mock_enqueue.assert_called_once_with(COURSE_TYPE, 1)
+        mock_upsert.assert_not_called()
+    else:
+        mock_enqueue.assert_not_called()
+        mock_upsert.assert_called_once_with(1)
+
+
+def test_upsert_course_queue_error(mocker, settings):
+    """upsert_course should run the upsert task if the course can't be queued"""
+    settings.OPENSEARCH_UPDATE_QUEUE_ENABLED = True
+    mocker.patch(
+        "search.search_index_helpers.enqueue_update", side_effect=ConnectionError
+    )
+    mock_upsert = mocker.patch("search.search_index_helpers.tasks.upsert_course")
+    search_index_helpers.upsert_course(1)
+    mock_upsert.assert_called_once_with(1)
+
+
+@pytest.mark.django_db
+def test_deindex_course_queued(mocker, settings):
+    """deindex_course should queue the course document id for deletion"""
+    settings.OPENSEARCH_UPDATE_QUEUE_ENABLED = True
+    mock_enqueue = mocker.patch("search.search_index_helpers.enqueue_deletion")
+    mock_deindex_files = mocker.patch(
+        "search.search_index_helpers.tasks.deindex_course_content_files"
+    )
+    course = CourseFactory.create()
+    search_index_helpers.deindex_course(course)
+    mock_enqueue.assert_called_once_with(
+        COURSE_TYPE, course.id, gen_course_id(course.platform, course.course_id)
+    )
+    mock_deindex_files.assert_called_once_with([course.id])
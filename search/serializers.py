@@ -3,7 +3,7 @@
 import json
 import logging
 import re
-from functools import reduce
+from collections import namedtuple
 
 from django.conf import settings
 from django.db.models import Prefetch
@@ -19,7 +19,9 @@ from course_catalog.models import (
     PodcastEpisode,
     Program,
     StaffList,
+    StaffListItem,
     UserList,
+    UserListItem,
     Video,
 )
 from open_discussions.utils import filter_dict_keys, filter_dict_with_renamed_keys
@@ -52,6 +54,41 @@ from search.constants import (
 log = logging.getLogger()
 
 
+def _is_prefetched(instance, relation):
+    """Return True if the relation was already loaded for the instance by prefetch_related"""
+    return relation in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def _get_first_list_item(learning_list, excluded_type):
+    """Get the first item of a list by position, ignoring items of the excluded type
+
+    Items loaded by prefetch_related are used when available.
+
+    Args:
+        learning_list (UserList or StaffList): The list
+        excluded_type (str): The content type model name of items to ignore
+
+    Returns:
+        UserListItem or StaffListItem: The first item, if any
+
+    """
+    if _is_prefetched(learning_list, "items"):
+        return min(
+            (
+                item
+                for item in learning_list.items.all()
+                if item.content_type.model != excluded_type
+            ),
+            key=lambda item: item.position,
+            default=None,
+        )
+    return (
+        learning_list.items.exclude(content_type__model=excluded_type)
+        .order_by("position")
+        .first()
+    )
+
+
 class OSModelSerializer(serializers.ModelSerializer):
     """Base opensearch serializer for model-based objects"""
 
@@ -140,7 +177,7 @@ class OSTopicsField(serializers.Field):
 
     def to_representation(self, value):
         """Serializes the topics as a list of topic names"""
-        return list(value.values_list("name", flat=True))
+        return [topic.name for topic in value.all()]
 
 
 class OSOfferedByField(serializers.Field):
@@ -148,7 +185,7 @@ class OSOfferedByField(serializers.Field):
 
     def to_representation(self, value):
         """Serializes offered_by as a list of OfferedBy names"""
-        return list(value.values_list("name", flat=True))
+        return [offeror.name for offeror in value.all()]
 
 
 class LearningResourceSerializer(serializers.ModelSerializer):
@@ -161,18 +198,14 @@ class LearningResourceSerializer(serializers.ModelSerializer):
 
     def get_minimum_price(self, instance):
         """Minimum price from all learning resource runs"""
-        if hasattr(instance, "runs") and instance.runs:
-            prices = [
-                run.prices.values_list("price", flat=True)
-                for run in instance.runs.all()
-            ]
-
-            if prices:
-                prices = reduce(lambda x, y: x | y, prices)
-
-                minimum = min(prices, default=0)
+        if hasattr(instance, "runs"):
+            runs = instance.runs.all()
+            if runs:
+                minimum = min(
+                    (price.price for run in runs for price in run.prices.all()),
+                    default=0,
+                )
                 return f"{minimum:.2f}"
-            return 0
         return 0
 
 
@@ -187,8 +220,85 @@ class OSResourceFileSerializerMixin(serializers.Serializer):
         raise NotImplementedError
 
 
+# Fields of a serialized content file which only depend on its run and course
+CONTENT_FILE_RUN_FIELDS = (
+    "run_id",
+    "run_title",
+    "run_slug",
+    "run_department_slug",
+    "semester",
+    "year",
+    "topics",
+    "course_id",
+    "coursenum",
+    "resource_relations",
+)
+
+# Content file columns used by OSContentFileSerializer
+CONTENT_FILE_COLUMNS = (
+    "id",
+    "run_id",
+    "key",
+    "uid",
+    "title",
+    "description",
+    "url",
+    "short_url",
+    "image_src",
+    "section",
+    "section_slug",
+    "file_type",
+    "content_type",
+    "content",
+    "content_title",
+    "content_author",
+    "content_language",
+    "learning_resource_types",
+)
+
+# The run and course fields shared by every content file of a run
+ContentFileRunContext = namedtuple(
+    "ContentFileRunContext", ["fields", "ocw_next_course"]
+)
+
+
+def get_content_file_run_context(run):
+    """Serialize the run and course fields of content files once for a whole run
+
+    Args:
+        run (LearningResourceRun): A course run
+
+    Returns:
+        ContentFileRunContext: The serialized fields to pass to OSContentFileSerializer as run_context
+
+    """
+    course = run.content_object
+    return ContentFileRunContext(
+        fields={
+            "run_id": run.run_id,
+            "run_title": run.title,
+            "run_slug": run.slug,
+            "run_department_slug": course.department_slug,
+            "semester": run.semester,
+            "year": run.year,
+            "topics": [topic.name for topic in course.topics.all()],
+            "course_id": course.course_id,
+            "coursenum": course.coursenum,
+            "resource_relations": {
+                "name": "resourcefile",
+                "parent": gen_course_id(course.platform, course.course_id),
+            },
+        },
+        ocw_next_course=course.ocw_next_course,
+    )
+
+
 class OSContentFileSerializer(OSResourceFileSerializerMixin, OSModelSerializer):
-    """OpenSearch serializer class for course run files"""
+    """OpenSearch serializer class for course run files
+
+    If a ContentFileRunContext is passed as run_context, its fields are used instead of
+    loading them from the run and course of every file.
+    """
 
     run_id = serializers.CharField(source="run.run_id")
     run_title = serializers.CharField(source="run.title")
@@ -212,9 +322,23 @@ class OSContentFileSerializer(OSResourceFileSerializerMixin, OSModelSerializer):
             "parent": gen_course_id(course.platform, course.course_id),
         }
 
+    def get_fields(self):
+        """Leave out the fields provided by the run context"""
+        fields = super().get_fields()
+        if "run_context" in self.context:
+            for field_name in CONTENT_FILE_RUN_FIELDS:
+                fields.pop(field_name)
+        return fields
+
     def get_resource_type(self, instance):
         """Get the resource type of the ContentFile"""
-        if instance.run.content_object.ocw_next_course:
+        run_context = self.context.get("run_context")
+        ocw_next_course = (
+            run_context.ocw_next_course
+            if run_context
+            else instance.run.content_object.ocw_next_course
+        )
+        if ocw_next_course:
             return instance.learning_resource_types
         if not instance.section:
             return None
@@ -223,20 +347,34 @@ class OSContentFileSerializer(OSResourceFileSerializerMixin, OSModelSerializer):
         return OCW_SECTION_TYPE_MAPPING.get(instance.section, None)
 
     def to_representation(self, instance):
-        """Truncate content if necessary"""
+        """Add the run context and truncate content if necessary"""
         data = super().to_representation(instance)
-        if len(json.dumps(data)) > settings.OPENSEARCH_MAX_REQUEST_SIZE:
+        run_context = self.context.get("run_context")
+        if run_context:
+            data.update(run_context.fields)
+        content = data["content"] or ""
+        len_minus_content = len(json.dumps({**data, "content": ""}))
+        # A character is at most 12 characters long once JSON-encoded, so the content
+        # only needs to be encoded to measure it when it could exceed the max size
+        if (
+            len_minus_content + 12 * len(content)
+            <= settings.OPENSEARCH_MAX_REQUEST_SIZE
+        ):
+            return data
+        encoded_content = json.dumps(content).strip('"')
+        if (
+            len_minus_content + len(encoded_content)
+            > settings.OPENSEARCH_MAX_REQUEST_SIZE
+        ):
             log.warning(
                 "Length of content file %d exceeds max size, truncating", instance.id
             )
-            content = data.pop("content")
             # Include a little extra buffer to be safe
-            len_minus_content = len(json.dumps(data)) + 100
-            max_content_size = settings.OPENSEARCH_MAX_REQUEST_SIZE - len_minus_content
+            max_content_size = (
+                settings.OPENSEARCH_MAX_REQUEST_SIZE - len_minus_content - 100
+            )
             truncated_content = re.sub(
-                r"\\([0-9A-Za-z]+)?$",
-                "",
-                json.dumps(content).strip('"')[:max_content_size],
+                r"\\([0-9A-Za-z]+)?$", "", encoded_content[:max_content_size]
             )
             data["content"] = json.loads(f'"{truncated_content}"')
         return data
@@ -363,10 +501,12 @@ class OSCourseSerializer(OSModelSerializer, LearningResourceSerializer):
 
     def get_runs(self, course):
         """Get published runs in reverse chronological order by best_start_date"""
-        return [
-            OSRunSerializer(run).data
-            for run in course.runs.exclude(published=False).order_by("-best_start_date")
-        ]
+        if _is_prefetched(course, "runs"):
+            # prefetched runs are expected to already be ordered by -best_start_date
+            runs = [run for run in course.runs.all() if run.published]
+        else:
+            runs = course.runs.exclude(published=False).order_by("-best_start_date")
+        return [OSRunSerializer(run).data for run in runs]
 
     def get_department_course_numbers(self, course):
         """Get department_course_numbers from course data"""
@@ -468,11 +608,7 @@ class OSUserListSerializer(OSModelSerializer, LearningResourceSerializer):
 
         ret["object_type"] = instance.list_type
         if not instance.image_src:
-            first_item = (
-                instance.items.exclude(content_type__model=USER_LIST_TYPE)
-                .order_by("position")
-                .first()
-            )
+            first_item = _get_first_list_item(instance, USER_LIST_TYPE)
             if first_item:
                 ret["image_src"] = first_item.item.image_src
         return ret
@@ -513,11 +649,7 @@ class OSStaffListSerializer(OSModelSerializer, LearningResourceSerializer):
 
         ret["object_type"] = STAFF_LIST_TYPE
         if not instance.image_src:
-            first_item = (
-                instance.items.exclude(content_type__model=STAFF_LIST_TYPE)
-                .order_by("position")
-                .first()
-            )
+            first_item = _get_first_list_item(instance, STAFF_LIST_TYPE)
             if first_item:
                 ret["image_src"] = first_item.item.image_src
         return ret
@@ -709,6 +841,29 @@ def serialize_for_deletion(opensearch_object_id):
     return {"_id": opensearch_object_id, "_op_type": "delete"}
 
 
+def _runs_prefetch():
+    """Prefetch runs with the relations used by OSRunSerializer
+
+    Runs are ordered by -best_start_date, which OSCourseSerializer relies on.
+    """
+    return Prefetch(
+        "runs",
+        queryset=LearningResourceRun.objects.order_by("-best_start_date")
+        .defer("raw_json")
+        .prefetch_related("prices", "instructors", "offered_by"),
+    )
+
+
+def _list_items_prefetch(item_model):
+    """Prefetch for the items of a user or staff list, including the listed resources"""
+    return Prefetch(
+        "items",
+        queryset=item_model.objects.select_related("content_type").prefetch_related(
+            "item"
+        ),
+    )
+
+
 def serialize_bulk_courses(ids):
     """Serialize courses for bulk indexing
 
@@ -717,14 +872,7 @@ def serialize_bulk_courses(ids):
 
     """
     for course in Course.objects.filter(id__in=ids).prefetch_related(
-        "topics",
-        "offered_by",
-        Prefetch(
-            "runs",
-            queryset=LearningResourceRun.objects.filter(published=True)
-            .order_by("-best_start_date")
-            .defer("raw_json"),
-        ),
+        "topics", "offered_by", _runs_prefetch()
     ):
         yield serialize_course_for_bulk(course)
 
@@ -755,19 +903,53 @@ def serialize_course_for_bulk(course_obj):
     }
 
 
-def serialize_content_file_for_bulk(content_file_obj):
+def serialize_content_file_for_bulk(content_file_obj, run_context=None):
     """Serialize a content file for bulk API request
 
     Args:
         content_file_obj (ContentFile): A content file for a course
+        run_context (ContentFileRunContext): The serialized fields of the file's run, if already computed
 
     """
+    context = {"run_context": run_context} if run_context else {}
     return {
         "_id": gen_content_file_id(content_file_obj.key),
-        **OSContentFileSerializer(content_file_obj).data,
+        **OSContentFileSerializer(content_file_obj, context=context).data,
     }
 
 
+def serialize_bulk_content_files(ids):
+    """Serialize content files for bulk indexing, with the routing of their course
+
+    The run and course fields are serialized once for each run.
+
+    Args:
+        ids(list of int): List of content file id's
+
+    """
+    content_files = (
+        ContentFile.objects.filter(id__in=ids)
+        .only(*CONTENT_FILE_COLUMNS)
+        .order_by("run_id", "id")
+    )
+    runs = (
+        LearningResourceRun.objects.defer("raw_json")
+        .prefetch_related("content_object__topics")
+        .in_bulk({content_file.run_id for content_file in content_files})
+    )
+    run_contexts = {}
+    for content_file in content_files:
+        if content_file.run_id not in run_contexts:
+            run_contexts[content_file.run_id] = get_content_file_run_context(
+                runs[content_file.run_id]
+            )
+        run_context = run_contexts[content_file.run_id]
+        yield {
+            **serialize_content_file_for_bulk(content_file, run_context=run_context),
+            "_routing": run_context.fields["resource_relations"]["parent"],
+        }
+
+
 def serialize_content_file_for_bulk_deletion(content_file_obj):
     """Serialize a content file for bulk API request
 
@@ -786,7 +968,7 @@ def serialize_bulk_programs(ids):
 
     """
     for program in Program.objects.filter(id__in=ids).prefetch_related(
-        "topics", "offered_by"
+        "topics", "offered_by", _runs_prefetch()
     ):
         yield serialize_program_for_bulk(program)
 
@@ -819,7 +1001,9 @@ def serialize_bulk_user_lists(ids):
         ids(list of int): List of user_list id's
 
     """
-    for user_list in UserList.objects.filter(id__in=ids).prefetch_related("topics"):
+    for user_list in UserList.objects.filter(id__in=ids).prefetch_related(
+        "topics", "offered_by", _list_items_prefetch(UserListItem)
+    ):
         yield serialize_user_list_for_bulk(user_list)
 
 
@@ -854,7 +1038,9 @@ def serialize_bulk_staff_lists(ids):
         ids(list of int): List of StaffList id's
 
     """
-    for staff_list in StaffList.objects.filter(id__in=ids).prefetch_related("topics"):
+    for staff_list in StaffList.objects.filter(id__in=ids).prefetch_related(
+        "topics", "offered_by", _list_items_prefetch(StaffListItem)
+    ):
         yield serialize_staff_list_for_bulk(staff_list)
 
 
@@ -957,8 +1143,10 @@ def serialize_bulk_podcast_episodes(ids):
         ids(list of int): List of PodcastEpisode id's
 
     """
-    for podcast_episode in PodcastEpisode.objects.filter(id__in=ids).prefetch_related(
-        "podcast", "topics", "offered_by"
+    for podcast_episode in (
+        PodcastEpisode.objects.filter(id__in=ids)
+        .select_related("podcast")
+        .prefetch_related("topics", "offered_by")
     ):
         yield serialize_podcast_episode_for_bulk(podcast_episode)
 
@@ -1,6 +1,10 @@
 """Tests for opensearch bulk serializers"""
 
+import json
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from course_catalog import factories
 from course_catalog.constants import PrivacyLevel
@@ -130,6 +134,56 @@ def test_serialize_content_file_for_bulk():
     }
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("ocw_next_course", [True, False])
+def test_serialize_content_file_run_context(ocw_next_course):
+    """Serializing a content file with the run context should give the same document"""
+    course = factories.CourseFactory.create(ocw_next_course=ocw_next_course)
+    content_file = factories.ContentFileFactory.create(
+        run=course.runs.first(), section="Assignments"
+    )
+    run_context = serializers.get_content_file_run_context(content_file.run)
+    assert serializers.serialize_content_file_for_bulk(
+        content_file, run_context=run_context
+    ) == serializers.serialize_content_file_for_bulk(content_file)
+
+
+@pytest.mark.django_db
+def test_serialize_bulk_content_files():
+    """serialize_bulk_content_files should serialize files of several courses with their routing"""
+    courses = factories.CourseFactory.create_batch(2)
+    content_files = [
+        factories.ContentFileFactory.create(run=course.runs.first())
+        for course in courses
+    ]
+    assert sorted(
+        serializers.serialize_bulk_content_files(
+            [content_file.id for content_file in content_files]
+        ),
+        key=lambda document: document["key"],
+    ) == [
+        {
+            **serializers.serialize_content_file_for_bulk(content_file),
+            "_routing": api.gen_course_id(course.platform, course.course_id),
+        }
+        for content_file, course in sorted(
+            zip(content_files, courses), key=lambda pair: pair[0].key
+        )
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("content_length", [100, 1000])
+def test_serialize_content_file_truncated(settings, content_length):
+    """Content should be truncated if the serialized content file would exceed the max request size"""
+    settings.OPENSEARCH_MAX_REQUEST_SIZE = 3000
+    content_file = factories.ContentFileFactory.create(content="é\\n" * content_length)
+    data = serializers.OSContentFileSerializer(content_file).data
+    assert len(json.dumps(data)) <= settings.OPENSEARCH_MAX_REQUEST_SIZE
+    assert content_file.content.startswith(data["content"])
+    assert (data["content"] == content_file.content) is (content_length == 100)
+
+
 @pytest.mark.django_db
 def test_serialize_content_file_for_bulk_deletion():
     """Test that serialize_content_file_for_bulk_deletion yields a valid OSContentFileSerializer"""
@@ -262,3 +316,46 @@ def test_serialize_bulk_podcast_episodes_for_deletion():
     assert list(
         serializers.serialize_bulk_podcast_episodes_for_deletion([podcast_episode.id])
     ) == [{"_id": api.gen_podcast_episode_id(podcast_episode), "_op_type": "delete"}]
+
+
+def _create_user_list():
+    """Create a user list without an image, so its first item is used for image_src"""
+    user_list = factories.UserListFactory.create(image_src=None)
+    factories.UserListItemFactory.create_batch(2, user_list=user_list)
+    return user_list
+
+
+def _create_staff_list():
+    """Create a staff list without an image, so its first item is used for image_src"""
+    staff_list = factories.StaffListFactory.create(image_src=None)
+    factories.StaffListItemFactory.create_batch(2, staff_list=staff_list)
+    return staff_list
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "serialize_bulk,create_object",
+    [
+        [serializers.serialize_bulk_courses, factories.CourseFactory.create],
+        [serializers.serialize_bulk_programs, factories.ProgramFactory.create],
+        [serializers.serialize_bulk_user_lists, _create_user_list],
+        [serializers.serialize_bulk_staff_lists, _create_staff_list],
+        [serializers.serialize_bulk_videos, factories.VideoFactory.create],
+        [serializers.serialize_bulk_podcasts, factories.PodcastFactory.create],
+        [
+            serializers.serialize_bulk_podcast_episodes,
+            factories.PodcastEpisodeFactory.create,
+        ],
+    ],
+)
+def test_serialize_bulk_query_count(serialize_bulk, create_object):
+    """The number of queries to serialize objects in bulk should not depend on the number of objects"""
+    ids = [create_object().id]
+    with CaptureQueriesContext(connection) as single_queries:
+        list(serialize_bulk(ids))
+
+    ids += [create_object().id for _ in range(3)]
+    with CaptureQueriesContext(connection) as bulk_queries:
+        list(serialize_bulk(ids))
+
+    assert len(bulk_queries) == len(single_queries)
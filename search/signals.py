@@ -0,0 +1,106 @@
+"""Signal receivers which keep updated_on current for changes incremental indexing can't see"""
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete
+
+from course_catalog.models import (
+    Course,
+    LearningResourceRun,
+    Podcast,
+    PodcastEpisode,
+    Program,
+    StaffList,
+    StaffListItem,
+    UserList,
+    UserListItem,
+    Video,
+)
+from open_discussions.utils import now_in_utc
+
+# Indexed models whose many-to-many relations are serialized into their documents
+INDEXED_MODELS = (
+    Course,
+    LearningResourceRun,
+    Podcast,
+    PodcastEpisode,
+    Program,
+    StaffList,
+    UserList,
+    Video,
+)
+
+# The list model and foreign key of list item models
+_list_item_fields = {
+    UserListItem: (UserList, "user_list_id"),
+    StaffListItem: (StaffList, "staff_list_id"),
+}
+
+# many-to-many fields keyed by their through model
+_m2m_fields = {}
+
+
+def touch_m2m_owners(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):  # pylint: disable=unused-argument,too-many-arguments
+    """Update updated_on for indexed objects whose many-to-many relations changed
+
+    Saving a relation like course.topics.set(...) only writes to the through table, so
+    without this the course would be skipped by an incremental update_index.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            type(instance).objects.filter(pk=instance.pk).update(
+                updated_on=now_in_utc()
+            )
+    elif action in ("post_add", "post_remove") and pk_set:
+        model.objects.filter(pk__in=pk_set).update(updated_on=now_in_utc())
+    elif action == "pre_clear":
+        field = _m2m_fields[sender]
+        model.objects.filter(**{field.name: instance}).update(updated_on=now_in_utc())
+
+
+def touch_list(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Update updated_on for a user or staff list when one of its items is deleted"""
+    list_model, list_id_field = _list_item_fields[sender]
+    list_model.objects.filter(pk=getattr(instance, list_id_field)).update(
+        updated_on=now_in_utc()
+    )
+
+
+def _dispatch_uid(sender):
+    """Identifier of the connection of a receiver to a model"""
+    return f"search_touch_{sender._meta.label_lower}"
+
+
+def connect_signals():
+    """Connect the receivers for indexed models, if the indexes are updated incrementally
+
+    Only the incremental update_index reads updated_on to decide what to index, so the receivers
+    aren't connected unless OPENSEARCH_INCREMENTAL_UPDATE_ENABLED is set.
+    """
+    if not settings.OPENSEARCH_INCREMENTAL_UPDATE_ENABLED:
+        return
+    for indexed_model in INDEXED_MODELS:
+        for field in indexed_model._meta.many_to_many:
+            through = field.remote_field.through
+            _m2m_fields[through] = field
+            m2m_changed.connect(
+                touch_m2m_owners,
+                sender=through,
+                dispatch_uid=_dispatch_uid(through),
+            )
+    for item_model in _list_item_fields:
+        post_delete.connect(
+            touch_list,
+            sender=item_model,
+            dispatch_uid=_dispatch_uid(item_model),
+        )
+
+
+def disconnect_signals():
+    """Disconnect the receivers connected by connect_signals"""
+    for through in _m2m_fields:
+        m2m_changed.disconnect(sender=through, dispatch_uid=_dispatch_uid(through))
+    for item_model in _list_item_fields:
+        post_delete.disconnect(
+            sender=item_model, dispatch_uid=_dispatch_uid(item_model)
+        )
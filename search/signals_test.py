@@ -0,0 +1,102 @@
+"""Tests for search signal receivers"""
+from datetime import timedelta
+
+import pytest
+
+from course_catalog.factories import (
+    CourseFactory,
+    CourseTopicFactory,
+    UserListFactory,
+    UserListItemFactory,
+)
+from course_catalog.models import Course, UserList
+from open_discussions.utils import now_in_utc
+from search.signals import connect_signals, disconnect_signals
+
+pytestmark = pytest.mark.django_db
+
+PAST = now_in_utc() - timedelta(days=7)
+
+
+@pytest.fixture(autouse=True)
+def receivers(settings):
+    """Connect the receivers for the incremental update_index"""
+    settings.OPENSEARCH_INCREMENTAL_UPDATE_ENABLED = True
+    connect_signals()
+    yield
+    disconnect_signals()
+
+
+def _make_old(obj):
+    """Set updated_on of an object to a week ago"""
+    type(obj).objects.filter(pk=obj.pk).update(updated_on=PAST)
+
+
+@pytest.mark.parametrize("action", ["add", "remove", "clear", "set"])
+def test_touch_m2m_owners(action):
+    """Changing the topics of a course should update its updated_on"""
+    course = CourseFactory.create()
+    topic = CourseTopicFactory.create()
+    course.topics.add(topic)
+    _make_old(course)
+
+    if action == "add":
+        course.topics.add(CourseTopicFactory.create())
+    elif action == "remove":
+        course.topics.remove(topic)
+    elif action == "clear":
+        course.topics.clear()
+    else:
+        course.topics.set([CourseTopicFactory.create()])
+
+    course.refresh_from_db()
+    assert course.updated_on > PAST
+
+
+@pytest.mark.parametrize("action", ["add", "remove", "clear"])
+def test_touch_m2m_owners_reverse(action):
+    """Changing the courses of a topic should update updated_on of those courses"""
+    courses = CourseFactory.create_batch(2)
+    other_course = CourseFactory.create()
+    topic = CourseTopicFactory.create()
+    if action != "add":
+        topic.course_set.add(*courses)
+    for course in [*courses, other_course]:
+        _make_old(course)
+
+    if action == "add":
+        topic.course_set.add(*courses)
+    elif action == "remove":
+        topic.course_set.remove(*courses)
+    else:
+        topic.course_set.clear()
+
+    assert all(
+        updated_on > PAST
+        for updated_on in Course.objects.filter(
+            id__in=[course.id for course in courses]
+        ).values_list("updated_on", flat=True)
+    )
+    other_course.refresh_from_db()
+    assert other_course.updated_on == PAST
+
+
+def test_touch_list():
+    """Deleting an item of a user list should update the list's updated_on"""
+    user_list = UserListFactory.create()
+    item = UserListItemFactory.create(user_list=user_list)
+    _make_old(user_list)
+    item.delete()
+    assert UserList.objects.get(id=user_list.id).updated_on > PAST
+
+
+def test_connect_signals_disabled(settings):
+    """The receivers shouldn't be connected unless the indexes are updated incrementally"""
+    disconnect_signals()
+    settings.OPENSEARCH_INCREMENTAL_UPDATE_ENABLED = False
+    connect_signals()
+    course = CourseFactory.create()
+    _make_old(course)
+    course.topics.add(CourseTopicFactory.create())
+    course.refresh_from_db()
+    assert course.updated_on == PAST
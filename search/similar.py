@@ -0,0 +1,128 @@
+"""Similar learning resources computed ahead of time, so looking them up doesn't need a more_like_this query"""
+import logging
+
+from django.conf import settings
+
+from search.connection import get_conn, get_default_alias_name
+from search.constants import (
+    COURSE_TYPE,
+    PODCAST_TYPE,
+    PROGRAM_TYPE,
+    RESOURCE_FILE_TYPE,
+    USER_LIST_TYPE,
+    USER_PATH_TYPE,
+    VIDEO_TYPE,
+)
+from search.indexing_state import get_indexing_state_cache
+
+log = logging.getLogger(__name__)
+
+SIMILAR_KEY_PREFIX = "search:similar"
+
+# The object types whose similar resources are computed ahead of time
+SIMILAR_RESOURCE_TYPES = (COURSE_TYPE, PROGRAM_TYPE, VIDEO_TYPE, PODCAST_TYPE)
+# Object types whose documents are indexed in the index of another object type
+INDEX_OBJECT_TYPES = {USER_PATH_TYPE: USER_LIST_TYPE, RESOURCE_FILE_TYPE: COURSE_TYPE}
+
+
+def _similar_key(object_type, resource_id):
+    """Cache key for the similar resources of a learning resource"""
+    return f"{SIMILAR_KEY_PREFIX}:{object_type}:{resource_id}"
+
+
+def get_similar_doc(object_type, doc_id, routing=None):
+    """Get what is needed to fetch a similar resource by id
+
+    Args:
+        object_type (str): The object type of the similar resource
+        doc_id (str): The document id of the similar resource
+        routing (str): The routing of the document, if it has one
+
+    Returns:
+        tuple of (str, str, str): The object type of the index of the document, its id and its routing
+
+    """
+    return INDEX_OBJECT_TYPES.get(object_type, object_type), doc_id, routing
+
+
+def save_similar_resources(similar):
+    """Store the similar resources computed for some learning resources
+
+    Args:
+        similar (dict):
+            The similar resources of each learning resource as returned by get_similar_doc,
+            keyed by the object type and id of the learning resource
+
+    """
+    get_indexing_state_cache().set_many(
+        {
+            _similar_key(object_type, resource_id): [
+                list(similar_doc) for similar_doc in similar_docs
+            ]
+            for (object_type, resource_id), similar_docs in similar.items()
+        },
+        timeout=None,
+    )
+
+
+def fetch_similar_resources(similar_docs):
+    """Get the indexed documents of similar resources
+
+    The documents are fetched by id, so they are as up to date as the index.
+
+    Args:
+        similar_docs (list of (str, str, str)): The similar resources as returned by get_similar_doc
+
+    Returns:
+        list of dict: The sources of the similar resources which are still indexed
+
+    """
+    if not similar_docs:
+        return []
+    response = get_conn().mget(
+        body={
+            "docs": [
+                {
+                    "_index": get_default_alias_name(index_type),
+                    "_id": doc_id,
+                    **({"routing": routing} if routing else {}),
+                }
+                for index_type, doc_id, routing in similar_docs
+            ]
+        }
+    )
+    return [doc["_source"] for doc in response["docs"] if doc.get("found")]
+
+
+def get_precomputed_similar_resources(value_doc):
+    """Get the similar resources computed for a learning resource
+
+    Args:
+        value_doc (dict): A document with the object_type and id of the learning resource
+
+    Returns:
+        list of dict:
+            The sources of the similar resources, or None if they weren't computed for this resource
+
+    """
+    if not settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED:
+        return None
+    object_type = value_doc.get("object_type")
+    resource_id = value_doc.get("id")
+    if object_type not in SIMILAR_RESOURCE_TYPES or resource_id is None:
+        return None
+
+    try:
+        similar_docs = get_indexing_state_cache().get(
+            _similar_key(object_type, resource_id)
+        )
+        if similar_docs is None:
+            return None
+        return fetch_similar_resources(
+            similar_docs[: settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT]
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception(
+            "Unable to get the similar resources of %s %s", object_type, resource_id
+        )
+        return None
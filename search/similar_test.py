@@ -0,0 +1,141 @@
+"""Tests for similar learning resources computed ahead of time"""
+import pytest
+from django.core.cache import caches
+
+from search.connection import get_default_alias_name
+from search.constants import (
+    COURSE_TYPE,
+    PROGRAM_TYPE,
+    RESOURCE_FILE_TYPE,
+    USER_LIST_TYPE,
+    USER_PATH_TYPE,
+    VIDEO_TYPE,
+)
+from search.similar import (
+    get_precomputed_similar_resources,
+    get_similar_doc,
+    save_similar_resources,
+)
+
+VALUE_DOC = {"object_type": COURSE_TYPE, "id": 1, "title": "Course"}
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for indexing state, and enable precomputed similar resources"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = True
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 2
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def mock_conn(mocker):
+    """Mock the OpenSearch connection"""
+    return mocker.patch("search.similar.get_conn").return_value
+
+
+def test_get_precomputed_similar_resources(mock_conn):
+    """The stored similar resources should be fetched by id, skipping missing documents"""
+    save_similar_resources(
+        {
+            (COURSE_TYPE, 1): [
+                (VIDEO_TYPE, "video_2", None),
+                (PROGRAM_TYPE, "program_3", None),
+                (COURSE_TYPE, "course_4", None),
+            ]
+        }
+    )
+    mock_conn.mget.return_value = {
+        "docs": [
+            {"_id": "video_2", "found": True, "_source": {"id": 2}},
+            {"_id": "program_3", "found": False},
+        ]
+    }
+    assert get_precomputed_similar_resources(VALUE_DOC) == [{"id": 2}]
+    mock_conn.mget.assert_called_once_with(
+        body={
+            "docs": [
+                {"_index": get_default_alias_name(VIDEO_TYPE), "_id": "video_2"},
+                {"_index": get_default_alias_name(PROGRAM_TYPE), "_id": "program_3"},
+            ]
+        }
+    )
+
+
+def test_get_precomputed_similar_resources_index_type(settings, mock_conn):
+    """Learning paths and content files should be fetched from the index they're in, with their routing"""
+    settings.OPEN_DISCUSSIONS_SIMILAR_RESOURCES_COUNT = 3
+    save_similar_resources(
+        {
+            (COURSE_TYPE, 1): [
+                get_similar_doc(USER_PATH_TYPE, "user_list_2"),
+                get_similar_doc(RESOURCE_FILE_TYPE, "cf_3", "course_4"),
+                get_similar_doc(VIDEO_TYPE, "video_5", None),
+            ]
+        }
+    )
+    mock_conn.mget.return_value = {
+        "docs": [
+            {"_id": "user_list_2", "found": True, "_source": {"id": 2}},
+            {"_id": "cf_3", "found": True, "_source": {"id": 3}},
+            {"_id": "video_5", "found": True, "_source": {"id": 5}},
+        ]
+    }
+    assert get_precomputed_similar_resources(VALUE_DOC) == [
+        {"id": 2},
+        {"id": 3},
+        {"id": 5},
+    ]
+    mock_conn.mget.assert_called_once_with(
+        body={
+            "docs": [
+                {
+                    "_index": get_default_alias_name(USER_LIST_TYPE),
+                    "_id": "user_list_2",
+                },
+                {
+                    "_index": get_default_alias_name(COURSE_TYPE),
+                    "_id": "cf_3",
+                    "routing": "course_4",
+                },
+                {"_index": get_default_alias_name(VIDEO_TYPE), "_id": "video_5"},
+            ]
+        }
+    )
+
+
+def test_get_precomputed_similar_resources_none_similar(mock_conn):
+    """A resource without similar resources shouldn't need a request"""
+    save_similar_resources({(COURSE_TYPE, 1): []})
+    assert get_precomputed_similar_resources(VALUE_DOC) == []
+    mock_conn.mget.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "enabled, value_doc",
+    [
+        [False, VALUE_DOC],
+        [True, {**VALUE_DOC, "id": 2}],
+        [True, {**VALUE_DOC, "object_type": USER_LIST_TYPE}],
+        [True, {"title": "Not indexed"}],
+    ],
+)
+def test_get_precomputed_similar_resources_missing(
+    settings, mock_conn, enabled, value_doc
+):
+    """None should be returned if the similar resources weren't computed"""
+    settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = enabled
+    save_similar_resources({(COURSE_TYPE, 1): [(VIDEO_TYPE, "video_2", None)]})
+    assert get_precomputed_similar_resources(value_doc) is None
+    mock_conn.mget.assert_not_called()
+
+
+def test_get_precomputed_similar_resources_error(mock_conn):
+    """None should be returned if the similar resources can't be fetched"""
+    save_similar_resources({(COURSE_TYPE, 1): [(VIDEO_TYPE, "video_2", None)]})
+    mock_conn.mget.side_effect = ConnectionError
+    assert get_precomputed_similar_resources(VALUE_DOC) is None
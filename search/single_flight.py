@@ -0,0 +1,228 @@
+"""Coalescing of identical concurrent searches into a single OpenSearch request, across processes
+
+The first process to take a short redis lock for a search runs it and puts the response in a
+result slot. Processes running the same search meanwhile poll the slot instead of sending their
+own request. The lock and slot are keyed by the whole search body, which includes the filters
+enforcing permissions, so only users who are allowed to see the same results share a response.
+
+The lock holds a random token, which is only released by the process that took it, and the slot
+is keyed by that token. Only processes which saw the lock while the search was running read the
+slot, so a later search never gets a response from before an index was updated.
+
+A waiting WSGI worker is blocked in time.sleep, polling redis every OPENSEARCH_SINGLE_FLIGHT_POLL_MS,
+until the running search is done or for at most OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT seconds.
+That is about as long as it would be blocked running the search itself, but every worker waiting
+for a slow search is unavailable until it finishes. Async views wait with asyncio.sleep instead.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django_redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "search:single_flight:lock"
+RESULT_KEY_PREFIX = "search:single_flight:result"
+
+# Delete a lock only if it still holds the token of the process releasing it
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def get_single_flight_connection():
+    """Get the redis client used for the locks and result slots
+
+    Returns:
+        redis.Redis: The redis client
+
+    """
+    return get_redis_connection(settings.OPENSEARCH_RESPONSE_CACHE_ALIAS)
+
+
+def _lock_key(key):
+    """Redis key for the lock taken by the process running a search"""
+    return f"{LOCK_KEY_PREFIX}:{key}"
+
+
+def _result_key(key, token):
+    """Redis key for the slot holding the response of the run of a search holding a lock token"""
+    return f"{RESULT_KEY_PREFIX}:{key}:{token}"
+
+
+def _poll(conn, key, token):
+    """Check for the response of a search, and which process is running it now
+
+    Args:
+        conn (redis.Redis): The redis client
+        key (str): The key identifying the search
+        token (str): The lock token of the run being waited for, if any
+
+    Returns:
+        tuple(dict, str): The response if there is one, and the token of the lock if it is taken
+
+    """
+    pipe = conn.pipeline()
+    pipe.get(_lock_key(key))
+    if token is not None:
+        pipe.get(_result_key(key, token))
+    holder, *encoded = pipe.execute()
+    response = json.loads(encoded[0]) if encoded and encoded[0] is not None else None
+    if isinstance(holder, bytes):
+        holder = holder.decode()
+    return response, holder
+
+
+def _try_lock(conn, key):
+    """Take the lock for running a search, if no other process has it
+
+    Returns:
+        str: The token of the lock if it was taken, otherwise None
+
+    """
+    token = uuid.uuid4().hex
+    taken = conn.set(
+        _lock_key(key),
+        token,
+        nx=True,
+        px=settings.OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT * 1000,
+    )
+    return token if taken else None
+
+
+def _publish(conn, key, token, response):
+    """Put the response of a search in the slot for its waiting processes and release the lock"""
+    try:
+        pipe = conn.pipeline()
+        pipe.set(
+            _result_key(key, token),
+            json.dumps(response),
+            px=settings.OPENSEARCH_SINGLE_FLIGHT_RESULT_MS,
+        )
+        pipe.eval(RELEASE_SCRIPT, 1, _lock_key(key), token)
+        pipe.execute()
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to share a search response")
+
+
+def _release(conn, key, token):
+    """Release the lock of a search which failed, so a waiting process can run it"""
+    try:
+        conn.eval(RELEASE_SCRIPT, 1, _lock_key(key), token)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to release a search lock")
+
+
+def _next_step(conn, key, token, deadline):
+    """Decide what a process running a search should do next
+
+    Args:
+        conn (redis.Redis): The redis client
+        key (str): The key identifying the search
+        token (str): The lock token of the run being waited for, if any
+        deadline (float): The time.monotonic() value after which to stop waiting
+
+    Returns:
+        tuple(str, object): "response" with the shared response, "lead" with the token of the
+            lock this process took, "wait" with the token of the run to poll again for, or
+            "timeout" if it waited too long
+
+    """
+    response, holder = _poll(conn, key, token)
+    if response is not None:
+        return "response", response
+    if holder is None:
+        token = _try_lock(conn, key)
+        if token is not None:
+            return "lead", token
+    if time.monotonic() >= deadline:
+        return "timeout", None
+    return "wait", holder
+
+
+def single_flight(key, execute):
+    """Run a search, sharing the response with identical searches running at the same time
+
+    Redis errors fall back to running the search directly. A process waits at most
+    OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT seconds for another one before running it itself.
+
+    Args:
+        key (str): A key identifying the search, including everything that affects its response
+        execute (callable): Function which runs the search and returns the response
+
+    Returns:
+        dict: The search response
+
+    """
+    if not settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED:
+        return execute()
+
+    deadline = time.monotonic() + settings.OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT
+    try:
+        conn = get_single_flight_connection()
+        step, value = _next_step(conn, key, None, deadline)
+        while step == "wait":
+            time.sleep(settings.OPENSEARCH_SINGLE_FLIGHT_POLL_MS / 1000)
+            step, value = _next_step(conn, key, value, deadline)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to coalesce a search")
+        return execute()
+
+    if step == "response":
+        return value
+    if step == "timeout":
+        return execute()
+    try:
+        response = execute()
+    except BaseException:
+        _release(conn, key, value)
+        raise
+    _publish(conn, key, value, response)
+    return response
+
+
+async def async_single_flight(key, execute):
+    """Like single_flight, for a search run by a coroutine function
+
+    Args:
+        key (str): A key identifying the search, including everything that affects its response
+        execute (callable): Coroutine function which runs the search and returns the response
+
+    Returns:
+        dict: The search response
+
+    """
+    if not settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED:
+        return await execute()
+
+    deadline = time.monotonic() + settings.OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT
+    next_step = sync_to_async(_next_step, thread_sensitive=False)
+    try:
+        conn = get_single_flight_connection()
+        step, value = await next_step(conn, key, None, deadline)
+        while step == "wait":
+            await asyncio.sleep(settings.OPENSEARCH_SINGLE_FLIGHT_POLL_MS / 1000)
+            step, value = await next_step(conn, key, value, deadline)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to coalesce a search")
+        return await execute()
+
+    if step == "response":
+        return value
+    if step == "timeout":
+        return await execute()
+    try:
+        response = await execute()
+    except BaseException:
+        await sync_to_async(_release, thread_sensitive=False)(conn, key, value)
+        raise
+    await sync_to_async(_publish, thread_sensitive=False)(conn, key, value, response)
+    return response
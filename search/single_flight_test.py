@@ -0,0 +1,184 @@
+"""Tests for coalescing identical concurrent searches"""
+import pytest
+from asgiref.sync import async_to_sync
+
+from search.single_flight import async_single_flight, single_flight
+
+
+class FakeRedis:
+    """Just enough of a redis client for the locks and result slots, without expiry"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        """Get a value"""
+        return self.values.get(key)
+
+    def exists(self, key):
+        """Return 1 if a key exists"""
+        return int(key in self.values)
+
+    def set(self, key, value, nx=False, px=None):  # pylint: disable=unused-argument
+        """Set a value, unless nx is set and it exists"""
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode()
+        return True
+
+    def delete(self, key):
+        """Delete a key"""
+        self.values.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):  # pylint: disable=unused-argument
+        """Run the release script, deleting a lock only if it holds the token"""
+        if self.values.get(key) != token.encode():
+            return 0
+        del self.values[key]
+        return 1
+
+    def pipeline(self):
+        """Run commands immediately and collect their results"""
+        fake = self
+
+        class Pipeline:  # pylint: disable=too-few-public-methods
+            """Fake pipeline"""
+
+            def __init__(self):
+                self.results = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.results.append(
+                    getattr(fake, name)(*args, **kwargs)
+                )
+
+            def execute(self):
+                """Return the results"""
+                return self.results
+
+        return Pipeline()
+
+
+LOCK_KEY = "search:single_flight:lock:key"
+RESULT_KEY = "search:single_flight:result:key:other"
+
+
+@pytest.fixture
+def fake_redis(mocker, settings):
+    """Enable single flight with a fake redis client"""
+    settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED = True
+    settings.OPENSEARCH_SINGLE_FLIGHT_LOCK_TIMEOUT = 1
+    fake = FakeRedis()
+    mocker.patch("search.single_flight.get_single_flight_connection", return_value=fake)
+    return fake
+
+
+def test_single_flight_disabled(mocker, settings):
+    """The search should run directly if single flight is disabled"""
+    settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED = False
+    mock_conn = mocker.patch("search.single_flight.get_single_flight_connection")
+    assert single_flight("key", lambda: {"hits": 1}) == {"hits": 1}
+    mock_conn.assert_not_called()
+
+
+def test_single_flight_lead(mocker, fake_redis):
+    """The first search should run, share its response and release the lock"""
+    mocker.patch("search.single_flight.uuid.uuid4").return_value.hex = "token"
+    execute = mocker.Mock(return_value={"hits": 1})
+    assert single_flight("key", execute) == {"hits": 1}
+    assert fake_redis.values == {
+        "search:single_flight:result:key:token": b'{"hits": 1}'
+    }
+
+
+def test_single_flight_later_search(mocker, fake_redis):
+    """A search starting after an identical one finished should run again, not reuse its response"""
+    execute = mocker.Mock(side_effect=[{"hits": 1}, {"hits": 2}])
+    assert single_flight("key", execute) == {"hits": 1}
+    assert single_flight("key", execute) == {"hits": 2}
+
+
+def test_single_flight_wait(mocker, fake_redis):
+    """A search should wait for an identical one which is running"""
+    fake_redis.values[LOCK_KEY] = b"other"
+
+    def _finish(_):
+        """Finish the other search while this one waits"""
+        fake_redis.values[RESULT_KEY] = b'{"hits": 2}'
+        del fake_redis.values[LOCK_KEY]
+
+    mock_sleep = mocker.patch("search.single_flight.time.sleep", side_effect=_finish)
+    execute = mocker.Mock()
+    assert single_flight("key", execute) == {"hits": 2}
+    mock_sleep.assert_called_once()
+    execute.assert_not_called()
+
+
+def test_single_flight_other_failed(mocker, fake_redis):
+    """If the running search fails, a waiting one should take over"""
+    fake_redis.values[LOCK_KEY] = b"other"
+    mocker.patch(
+        "search.single_flight.time.sleep",
+        side_effect=lambda _: fake_redis.values.pop(LOCK_KEY),
+    )
+    assert single_flight("key", lambda: {"hits": 3}) == {"hits": 3}
+    assert LOCK_KEY not in fake_redis.values
+    assert RESULT_KEY not in fake_redis.values
+
+
+def test_single_flight_timeout(mocker, fake_redis):
+    """A search shouldn't wait longer than the lock timeout"""
+    fake_redis.values[LOCK_KEY] = b"other"
+    mocker.patch("search.single_flight.time.sleep")
+    mocker.patch("search.single_flight.time.monotonic", side_effect=[0, 0.5, 1.5])
+    assert single_flight("key", lambda: {"hits": 4}) == {"hits": 4}
+    assert fake_redis.values == {LOCK_KEY: b"other"}
+
+
+def test_single_flight_error(mocker, fake_redis):
+    """The lock should be released if the search fails"""
+    with pytest.raises(ValueError):
+        single_flight("key", mocker.Mock(side_effect=ValueError))
+    assert fake_redis.values == {}
+
+
+def test_single_flight_lock_expired(mocker, fake_redis):
+    """A lock which expired and was taken by another process shouldn't be released"""
+
+    def _execute():
+        """Take so long that another process takes the lock"""
+        fake_redis.values[LOCK_KEY] = b"other"
+        return {"hits": 8}
+
+    assert single_flight("key", _execute) == {"hits": 8}
+    assert fake_redis.values[LOCK_KEY] == b"other"
+    with pytest.raises(ValueError):
+        single_flight("key", mocker.Mock(side_effect=ValueError))
+    assert fake_redis.values[LOCK_KEY] == b"other"
+
+
+def test_single_flight_redis_error(mocker, settings):
+    """The search should run directly if redis is unavailable"""
+    settings.OPENSEARCH_SINGLE_FLIGHT_ENABLED = True
+    mocker.patch(
+        "search.single_flight.get_single_flight_connection",
+        side_effect=ConnectionError,
+    )
+    assert single_flight("key", lambda: {"hits": 5}) == {"hits": 5}
+
+
+def test_async_single_flight(mocker, fake_redis):
+    """Async searches should share responses like the others"""
+    execute = mocker.AsyncMock(return_value={"hits": 6})
+    assert async_to_sync(async_single_flight)("key", execute) == {"hits": 6}
+    assert LOCK_KEY not in fake_redis.values
+
+    fake_redis.values = {LOCK_KEY: b"other"}
+
+    async def _finish(_):
+        """Finish the other search while this one waits"""
+        fake_redis.values[RESULT_KEY] = b'{"hits": 7}'
+
+    mocker.patch("search.single_flight.asyncio.sleep", side_effect=_finish)
+    assert async_to_sync(async_single_flight)("key", execute) == {"hits": 7}
+    execute.assert_awaited_once()
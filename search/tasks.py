@@ -2,7 +2,13 @@
 # pylint: disable=too-many-lines
 
 import logging
+import math
+import uuid
+from collections import Counter, namedtuple
 from contextlib import contextmanager
+from datetime import datetime
+from functools import reduce
+from operator import or_
 
 import celery
 from celery.exceptions import Ignore
@@ -24,11 +30,13 @@ from course_catalog.models import (
 )
 from course_catalog.utils import load_course_blocklist
 from open_discussions.celery import app
-from open_discussions.utils import chunks, merge_strings
+from open_discussions.utils import merge_strings, now_in_utc
 from profiles.models import Profile
 from search import indexing_api as api
-from search.api import gen_content_file_id, gen_course_id
+from search.api import compute_similar_resources, gen_content_file_id, gen_course_id
+from search.connection import get_default_alias_name
 from search.constants import (
+    ALIAS_ALL_INDICES,
     COURSE_TYPE,
     PODCAST_EPISODE_TYPE,
     PODCAST_TYPE,
@@ -38,9 +46,34 @@ from search.constants import (
     SEARCH_CONN_EXCEPTIONS,
     STAFF_LIST_TYPE,
     USER_LIST_TYPE,
+    VALID_OBJECT_TYPES,
     VIDEO_TYPE,
 )
+from search.cutover import delete_expired_retired_indexes
 from search.exceptions import ReindexException, RetryException
+from search.indexing_state import (
+    add_index_job_chunk,
+    clear_index_job,
+    clear_recreate_manifest,
+    get_index_job,
+    get_index_job_status,
+    get_recreate_manifest,
+    get_updated_since,
+    is_recreate_chunk_done,
+    mark_recreate_chunk_done,
+    remove_index_job_chunk,
+    save_index_job,
+    save_recreate_manifest,
+    set_update_watermarks,
+)
+from search.local_similarity import (
+    ROW_FIELDS,
+    SIMILARITY_CORPORA,
+    build_similarity_index,
+)
+from search.progress import skip_chunk, start_progress, track_chunk
+from search.similar import SIMILAR_RESOURCE_TYPES
+from search.update_queue import flush_update_queue
 from search.serializers import (
     OSContentFileSerializer,
     OSCourseSerializer,
@@ -293,7 +326,8 @@ def index_profiles(ids, update_only=False):
 
     """
     try:
-        api.index_profiles(ids, update_only)
+        with track_chunk(PROFILE_TYPE) as chunk:
+            chunk.add(api.index_profiles(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -332,8 +366,10 @@ def index_courses(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_courses(ids, update_only)
+        with track_chunk(COURSE_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_courses(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -352,13 +388,58 @@ def bulk_deindex_courses(ids):
     """
     try:
         with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.deindex_courses(ids)
+            task_ids = api.deindex_courses(ids)
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
         error = "bulk_deindex_courses threw an error"
         log.exception(error)
         return error
+    if task_ids:
+        track_opensearch_tasks.delay(task_ids)
+
+
+@app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
+def deindex_course_content_files(course_ids):
+    """Deindex and delete the content files of a list of courses
+
+    Args:
+        course_ids(list of int): List of course id's
+
+    """
+    try:
+        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
+            task_ids = api.deindex_course_content_files(course_ids)
+    except (RetryException, Ignore):
+        raise
+    except:  # pylint: disable=bare-except
+        error = "deindex_course_content_files threw an error"
+        log.exception(error)
+        return error
+    if task_ids:
+        track_opensearch_tasks.delay(task_ids)
+
+
+@app.task(bind=True, autoretry_for=(RetryException,), retry_backoff=True)
+def track_opensearch_tasks(self, task_ids):
+    """Poll background OpenSearch tasks like delete_by_query until they complete
+
+    Args:
+        task_ids(list of str): Ids of OpenSearch tasks
+
+    Returns:
+        list of str: Error messages for tasks which failed
+
+    """
+    with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
+        incomplete, errors = api.get_incomplete_tasks(task_ids)
+    if incomplete:
+        raise self.retry(
+            args=(incomplete,),
+            countdown=settings.OPENSEARCH_TASK_POLL_SECONDS,
+            max_retries=settings.OPENSEARCH_TASK_POLL_MAX_RETRIES,
+        )
+    return errors
 
 
 @app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
@@ -372,8 +453,10 @@ def index_course_content_files(course_ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_course_content_files(course_ids, update_only)
+        with track_chunk(RESOURCE_FILE_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_course_content_files(course_ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -392,8 +475,10 @@ def index_run_content_files(run_id, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_run_content_files(run_id, update_only=update_only)
+        with track_chunk(RESOURCE_FILE_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_run_content_files(run_id, update_only=update_only))
             api.deindex_run_content_files(run_id, unpublished_only=True)
     except (RetryException, Ignore):
         raise
@@ -432,8 +517,10 @@ def index_programs(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_programs(ids, update_only)
+        with track_chunk(PROGRAM_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_programs(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -471,8 +558,10 @@ def index_user_lists(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_user_lists(ids, update_only)
+        with track_chunk(USER_LIST_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_user_lists(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -510,8 +599,10 @@ def index_staff_lists(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_staff_lists(ids, update_only)
+        with track_chunk(STAFF_LIST_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_staff_lists(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -549,8 +640,10 @@ def index_videos(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_videos(ids, update_only)
+        with track_chunk(VIDEO_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_videos(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -588,8 +681,10 @@ def index_podcasts(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_podcasts(ids, update_only)
+        with track_chunk(PODCAST_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_podcasts(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -627,8 +722,10 @@ def index_podcast_episodes(ids, update_only=False):
 
     """
     try:
-        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
-            api.index_podcast_episodes(ids, update_only)
+        with track_chunk(PODCAST_EPISODE_TYPE) as chunk, wrap_retry_exception(
+            *SEARCH_CONN_EXCEPTIONS
+        ):
+            chunk.add(api.index_podcast_episodes(ids, update_only))
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -656,6 +753,432 @@ def bulk_deindex_podcast_episodes(ids):
         return error
 
 
+# A queryset of objects whose ids are passed in chunks to a task, followed by extra args
+IndexSource = namedtuple("IndexSource", ["object_type", "task", "queryset", "args"])
+
+RECREATE_JOB = "recreate"
+UPDATE_JOB = "update"
+SIMILAR_JOB = "similar"
+
+
+def get_source_chunk(source, after_id):
+    """Get the next chunk of ids of a source, paginating by id rather than by offset
+
+    Args:
+        source (IndexSource): The source
+        after_id (int): The last id of the previous chunk, or 0 for the first chunk
+
+    Returns:
+        list of int: Up to OPENSEARCH_INDEXING_CHUNK_SIZE ids in ascending order
+
+    """
+    return list(
+        source.queryset.filter(id__gt=after_id)
+        .order_by("id")
+        .values_list("id", flat=True)[: settings.OPENSEARCH_INDEXING_CHUNK_SIZE]
+    )
+
+
+def get_recreate_index_sources(indexes, blocklisted_ids):
+    """Get the objects to index for a recreate_index
+
+    Args:
+        indexes (list of str): The object types to index
+        blocklisted_ids (list of str): Course ids which aren't indexed
+
+    Returns:
+        list of IndexSource: The objects to index, with the object type of their backing index
+
+    """
+    sources = []
+    if PROFILE_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                PROFILE_TYPE,
+                index_profiles,
+                Profile.objects.exclude(
+                    user__username=settings.INDEXING_API_USERNAME
+                ).filter(user__is_active=True),
+                (),
+            )
+        )
+
+    if COURSE_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                COURSE_TYPE,
+                index_courses,
+                Course.objects.filter(published=True).exclude(
+                    course_id__in=blocklisted_ids
+                ),
+                (),
+            )
+        )
+        sources.append(
+            IndexSource(
+                COURSE_TYPE,
+                index_course_content_files,
+                Course.objects.filter(published=True)
+                .filter(platform__in=RESOURCE_FILE_PLATFORMS)
+                .exclude(course_id__in=blocklisted_ids),
+                (),
+            )
+        )
+
+    if PROGRAM_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                PROGRAM_TYPE, index_programs, Program.objects.filter(published=True), ()
+            )
+        )
+
+    if USER_LIST_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                USER_LIST_TYPE,
+                index_user_lists,
+                UserList.objects.exclude(items=None),
+                (),
+            )
+        )
+
+    if STAFF_LIST_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                STAFF_LIST_TYPE,
+                index_staff_lists,
+                StaffList.objects.filter(
+                    privacy_level=PrivacyLevel.public.value
+                ).exclude(items=None),
+                (),
+            )
+        )
+
+    if VIDEO_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                VIDEO_TYPE, index_videos, Video.objects.filter(published=True), ()
+            )
+        )
+
+    if PODCAST_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                PODCAST_TYPE, index_podcasts, Podcast.objects.filter(published=True), ()
+            )
+        )
+
+    if PODCAST_EPISODE_TYPE in indexes:
+        sources.append(
+            IndexSource(
+                PODCAST_EPISODE_TYPE,
+                index_podcast_episodes,
+                PodcastEpisode.objects.filter(published=True),
+                (),
+            )
+        )
+
+    return sources
+
+
+def get_update_index_sources(indexes, platform, since, blocklisted_ids):
+    """Get the objects to index and deindex for an update_index
+
+    Args:
+        indexes (list of str): The object types to update
+        platform (str): Platform filter for courses and course files
+        since (dict): For each object type, the time after which modified objects are updated,
+            or None to update every object
+        blocklisted_ids (list of str): Course ids which are deindexed
+
+    Returns:
+        list of IndexSource: The objects to index or deindex
+
+    """
+    sources = []
+
+    if PROFILE_TYPE in indexes:
+        # Profiles don't track when they were modified, so they're always fully updated
+        sources = sources + get_update_profiles_sources()
+
+    if COURSE_TYPE in indexes:
+        sources = sources + get_update_courses_sources(
+            blocklisted_ids, platform, since=since.get(COURSE_TYPE)
+        )
+
+    if RESOURCE_FILE_TYPE in indexes:
+        sources = sources + get_update_resource_files_sources(
+            blocklisted_ids, platform, since=since.get(RESOURCE_FILE_TYPE)
+        )
+
+    if PROGRAM_TYPE in indexes:
+        sources = sources + get_update_programs_sources(since=since.get(PROGRAM_TYPE))
+
+    if USER_LIST_TYPE in indexes:
+        sources = sources + get_update_user_lists_sources(
+            since=since.get(USER_LIST_TYPE)
+        )
+
+    if STAFF_LIST_TYPE in indexes:
+        sources = sources + get_update_staff_lists_sources(
+            since=since.get(STAFF_LIST_TYPE)
+        )
+
+    if VIDEO_TYPE in indexes:
+        sources = sources + get_update_videos_sources(since=since.get(VIDEO_TYPE))
+
+    if PODCAST_TYPE in indexes:
+        sources = sources + get_update_podcasts_sources(since=since.get(PODCAST_TYPE))
+
+    if PODCAST_EPISODE_TYPE in indexes:
+        sources = sources + get_update_podcast_episodes_sources(
+            since=since.get(PODCAST_EPISODE_TYPE)
+        )
+
+    return sources
+
+
+def get_similar_resources_sources(object_types, blocklisted_ids):
+    """Get the learning resources whose similar resources are computed
+
+    Args:
+        object_types (list of str): The object types to compute
+        blocklisted_ids (list of str): Course ids which aren't indexed
+
+    Returns:
+        list of IndexSource: The learning resources, passed to update_similar_resources
+
+    """
+    return [
+        IndexSource(
+            source.object_type,
+            update_similar_resources,
+            source.queryset,
+            (source.object_type,),
+        )
+        for source in get_recreate_index_sources(object_types, blocklisted_ids)
+        # Content files are indexed with courses but don't have similar resources
+        if source.task is not index_course_content_files
+    ]
+
+
+def _progress_object_type(task_name):
+    """Get the object type whose progress a task counts towards, if it indexes objects"""
+    return {
+        index_profiles.name: PROFILE_TYPE,
+        index_courses.name: COURSE_TYPE,
+        index_course_content_files.name: RESOURCE_FILE_TYPE,
+        index_run_content_files.name: RESOURCE_FILE_TYPE,
+        index_programs.name: PROGRAM_TYPE,
+        index_user_lists.name: USER_LIST_TYPE,
+        index_staff_lists.name: STAFF_LIST_TYPE,
+        index_videos.name: VIDEO_TYPE,
+        index_podcasts.name: PODCAST_TYPE,
+        index_podcast_episodes.name: PODCAST_EPISODE_TYPE,
+    }.get(task_name)
+
+
+def count_index_chunks(sources):
+    """Count the chunks an indexing job will index for each object type
+
+    Args:
+        sources (list of IndexSource): The objects the job will index or deindex
+
+    Returns:
+        dict: The number of index tasks keyed by object type
+
+    """
+    counts = Counter()
+    for source in sources:
+        object_type = _progress_object_type(source.task.name)
+        if object_type:
+            counts[object_type] += math.ceil(
+                source.queryset.count() / settings.OPENSEARCH_INDEXING_CHUNK_SIZE
+            )
+    return dict(counts)
+
+
+def get_index_job_sources(job):
+    """Get the objects an indexing job indexes, in the order it walks them
+
+    Args:
+        job (dict): The indexing job
+
+    Returns:
+        list of IndexSource: The objects to index or deindex
+
+    """
+    if job["kind"] == RECREATE_JOB:
+        return get_recreate_index_sources(job["indexes"], job["blocklisted_ids"])
+    if job["kind"] == SIMILAR_JOB:
+        return get_similar_resources_sources(job["indexes"], job["blocklisted_ids"])
+    since = {
+        object_type: datetime.fromisoformat(value) if value else None
+        for object_type, value in job["since"].items()
+    }
+    return get_update_index_sources(
+        job["indexes"], job["platform"], since, job["blocklisted_ids"]
+    )
+
+
+def get_index_job_finish(job, errors):
+    """Get the task which finishes an indexing job once every chunk is done
+
+    Args:
+        job (dict): The indexing job
+        errors (list of str): The errors of the chunks which failed
+
+    Returns:
+        celery.Signature: The task
+
+    """
+    if job["kind"] == RECREATE_JOB:
+        return finish_recreate_index.si(errors, job["backing_indices"])
+    if job["kind"] == SIMILAR_JOB:
+        return finish_update_similar_resources.si(errors)
+    return finish_update_index.si(
+        errors, job["indexes"], job["platform"], job["started_on"]
+    )
+
+
+def start_index_job(job):
+    """Store a new indexing job and reset the progress of its object types
+
+    Args:
+        job (dict): The parameters of the job
+
+    Returns:
+        celery.Signature: The task coordinating the job
+
+    """
+    job_id = uuid.uuid4().hex
+    save_index_job(job_id, {**job, "cursor": [0, 0]})
+    start_progress(count_index_chunks(get_index_job_sources(job)))
+    return advance_index_job.si(job_id)
+
+
+def enqueue_index_job_chunk(job_id, source, ids, backing_index, chunk_id):
+    """Count a chunk of an indexing job as in flight and enqueue its tasks
+
+    Args:
+        job_id (str): The id of the job
+        source (IndexSource): The objects the chunk belongs to
+        ids (list of int): The ids of the chunk
+        backing_index (str): The backing index to checkpoint the chunk against, if any
+        chunk_id (str): Identifies the chunk by its source and range of ids
+
+    """
+    index_task = source.task.si(ids, *source.args)
+    index_task.link_error(fail_index_job_chunk.s(job_id))
+    add_index_job_chunk(job_id)
+    celery.chain(
+        index_task, finish_index_job_chunk.s(job_id, backing_index, chunk_id)
+    ).apply_async()
+
+
+@app.task
+def finish_index_job_chunk(result, job_id, backing_index, chunk_id):
+    """Record the result of a chunk of an indexing job, and checkpoint it if it succeeded
+
+    Args:
+        result (str or list or None): The errors returned by the index task, if any
+        job_id (str): The id of the job
+        backing_index (str): The backing index to checkpoint the chunk against, if any
+        chunk_id (str): Identifies the chunk by its source and range of ids
+
+    Returns:
+        str or list or None: The result of the index task
+
+    """
+    errors = merge_strings(result)
+    if not errors and backing_index:
+        mark_recreate_chunk_done(backing_index, chunk_id)
+    remove_index_job_chunk(job_id, ", ".join(errors) if errors else None)
+    return result
+
+
+@app.task
+def fail_index_job_chunk(request, exc, traceback, job_id):
+    """Record a chunk of an indexing job whose index task raised an exception
+
+    Args:
+        request (celery.app.task.Context): The request of the failed task
+        exc (Exception): The exception
+        traceback (str): The traceback
+        job_id (str): The id of the job
+
+    """
+    log.error("%s failed: %s\n%s", request.task, exc, traceback)
+    remove_index_job_chunk(job_id, f"{request.task} threw an error: {exc}")
+
+
+@app.task(bind=True)
+def advance_index_job(self, job_id):
+    """
+    Enqueue chunks of an indexing job while fewer than OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT are
+    in flight, then check again later. Once every chunk is done this task is replaced by the
+    task finishing the job, so code waiting on the task starting the job waits on all of it.
+
+    Args:
+        job_id (str): The id of the job
+    """
+    try:
+        job = get_index_job(job_id)
+        if job is None:
+            return [f"Index job {job_id} doesn't exist anymore"]
+        sources = get_index_job_sources(job)
+        source_num, after_id = job["cursor"]
+        in_flight, errors, active_on = get_index_job_status(job_id)
+
+        while (
+            source_num < len(sources)
+            and in_flight < settings.OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT
+        ):
+            source = sources[source_num]
+            ids = get_source_chunk(source, after_id)
+            if not ids:
+                source_num, after_id = source_num + 1, 0
+                continue
+            after_id = ids[-1]
+            job["cursor"] = [source_num, after_id]
+            save_index_job(job_id, job)
+
+            chunk_id = f"{source_num}:{ids[0]}-{ids[-1]}"
+            backing_index = job.get("backing_indices", {}).get(source.object_type)
+            if backing_index and is_recreate_chunk_done(backing_index, chunk_id):
+                skip_chunk(_progress_object_type(source.task.name))
+                continue
+            enqueue_index_job_chunk(job_id, source, ids, backing_index, chunk_id)
+            # Chunks can finish while more are enqueued, and do right away when tasks run eagerly
+            in_flight, errors, active_on = get_index_job_status(job_id)
+
+        job["cursor"] = [source_num, after_id]
+        save_index_job(job_id, job)
+        stalled = (
+            in_flight
+            and active_on is not None
+            and (now_in_utc() - active_on).total_seconds()
+            > settings.OPENSEARCH_INDEX_JOB_STALL_TIMEOUT
+        )
+        if stalled:
+            errors = errors + [
+                f"{in_flight} chunks didn't finish within {settings.OPENSEARCH_INDEX_JOB_STALL_TIMEOUT} seconds"
+            ]
+        if (source_num < len(sources) or in_flight) and not stalled:
+            next_task = advance_index_job.si(job_id).set(
+                countdown=settings.OPENSEARCH_INDEX_JOB_POLL_SECONDS
+            )
+        else:
+            clear_index_job(job_id)
+            next_task = get_index_job_finish(job, errors)
+    except:  # pylint: disable=bare-except
+        error = "advance_index_job threw an error"
+        log.exception(error)
+        return [error]
+
+    return self.replace(next_task)
+
+
 @app.task(bind=True)
 def start_recreate_index(self, indexes):
     """Wipe and recreate index and mapping, and index all items."""
@@ -667,258 +1190,352 @@ def start_recreate_index(self, indexes):
         # Do the indexing on the temp index
         log.info("starting to index %s objects...", ", ".join(indexes))
 
-        index_tasks = []
-
-        if PROFILE_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_profiles.si(ids)
-                for ids in chunks(
-                    User.objects.exclude(username=settings.INDEXING_API_USERNAME)
-                    .exclude(profile__isnull=True)
-                    .filter(is_active=True)
-                    .order_by("id")
-                    .values_list("profile__id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-
-        if COURSE_TYPE in indexes:
-            blocklisted_ids = load_course_blocklist()
-            index_tasks = (
-                index_tasks
-                + [
-                    index_courses.si(ids)
-                    for ids in chunks(
-                        Course.objects.filter(published=True)
-                        .exclude(course_id__in=blocklisted_ids)
-                        .order_by("id")
-                        .values_list("id", flat=True),
-                        chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                    )
-                ]
-                + [
-                    index_course_content_files.si(ids)
-                    for ids in chunks(
-                        Course.objects.filter(published=True)
-                        .filter(platform__in=RESOURCE_FILE_PLATFORMS)
-                        .exclude(course_id__in=blocklisted_ids)
-                        .order_by("id")
-                        .values_list("id", flat=True),
-                        chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                    )
-                ]
-            )
-
-        if PROGRAM_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_programs.si(ids)
-                for ids in chunks(
-                    Program.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-
-        if USER_LIST_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_user_lists.si(ids)
-                for ids in chunks(
-                    UserList.objects.order_by("id")
-                    .exclude(items=None)
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-
-        if STAFF_LIST_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_staff_lists.si(ids)
-                for ids in chunks(
-                    StaffList.objects.order_by("id")
-                    .filter(privacy_level=PrivacyLevel.public.value)
-                    .exclude(items=None)
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
+        save_recreate_manifest(new_backing_indices, indexes)
+        index_job = start_index_job(
+            {
+                "kind": RECREATE_JOB,
+                "indexes": indexes,
+                "blocklisted_ids": load_course_blocklist()
+                if COURSE_TYPE in indexes
+                else [],
+                "backing_indices": new_backing_indices,
+            }
+        )
 
-        if VIDEO_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_videos.si(ids)
-                for ids in chunks(
-                    Video.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
+    except:  # pylint: disable=bare-except
+        error = "start_recreate_index threw an error"
+        log.exception(error)
+        return error
 
-        if PODCAST_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_podcasts.si(ids)
-                for ids in chunks(
-                    Podcast.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
+    # Use self.replace so that code waiting on this task will also wait on the indexing and finish tasks
+    return self.replace(index_job)
 
-        if PODCAST_EPISODE_TYPE in indexes:
-            index_tasks = index_tasks + [
-                index_podcast_episodes.si(ids)
-                for ids in chunks(
-                    PodcastEpisode.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
 
-        index_tasks = celery.group(index_tasks)
+@app.task(bind=True)
+def resume_recreate_index(self):
+    """Index only the chunks of the last recreate_index which failed or never ran, then switch indices"""
+    try:
+        manifest = get_recreate_manifest()
+        if manifest is None:
+            return "There is no recreate_index to resume"
+        backing_indices = manifest["backing_indices"]
+        for obj_type, backing_index in backing_indices.items():
+            if api.get_reindexing_index(obj_type) != backing_index:
+                return f"The {obj_type} backing index {backing_index} isn't being reindexed anymore"
+
+        log.info(
+            "resuming recreate_index of %s, skipping the chunks which are done...",
+            ", ".join(backing_indices),
+        )
+        index_job = start_index_job(
+            {
+                "kind": RECREATE_JOB,
+                "indexes": manifest["indexes"],
+                "blocklisted_ids": load_course_blocklist()
+                if COURSE_TYPE in manifest["indexes"]
+                else [],
+                "backing_indices": backing_indices,
+            }
+        )
 
     except:  # pylint: disable=bare-except
-        error = "start_recreate_index threw an error"
+        error = "resume_recreate_index threw an error"
         log.exception(error)
         return error
 
-    # Use self.replace so that code waiting on this task will also wait on the indexing and finish tasks
-    raise self.replace(
-        celery.chain(index_tasks, finish_recreate_index.s(new_backing_indices))
-    )
+    return self.replace(index_job)
 
 
 @app.task(bind=True)
-def start_update_index(self, indexes, platform):
-    # pylint: disable=too-many-branches
-    """Wipe and recreate index and mapping, and index all items."""
+def start_update_index(self, indexes, platform, incremental=False):
+    """
+    Index all items, or with incremental=True only the items modified since the last successful update.
+
+    Args:
+        indexes (list of str): The object types to update
+        platform (str): Platform filter for courses and course files
+        incremental (bool): If True, only update objects modified since the watermark of their object type
+    """
     try:
         log.info("starting to index %s objects...", ", ".join(indexes))
+        started_on = now_in_utc()
+        since = {
+            object_type: get_updated_since(object_type, platform)
+            if incremental
+            else None
+            for object_type in indexes
+        }
+        log.info(
+            "update_index for %s",
+            ", ".join(
+                f"{object_type} (since {since[object_type] or 'the beginning'})"
+                for object_type in indexes
+            ),
+        )
+        index_job = start_index_job(
+            {
+                "kind": UPDATE_JOB,
+                "indexes": indexes,
+                "platform": platform,
+                "since": {
+                    object_type: value.isoformat() if value else None
+                    for object_type, value in since.items()
+                },
+                "blocklisted_ids": load_course_blocklist()
+                if COURSE_TYPE in indexes or RESOURCE_FILE_TYPE in indexes
+                else [],
+                "started_on": started_on.isoformat(),
+            }
+        )
+    except:  # pylint: disable=bare-except
+        error = "start_update_index threw an error"
+        log.exception(error)
+        return [error]
 
-        index_tasks = []
-
-        if COURSE_TYPE in indexes or RESOURCE_FILE_TYPE in indexes:
-            blocklisted_ids = load_course_blocklist()
+    return self.replace(index_job)
 
-        if PROFILE_TYPE in indexes:
-            index_tasks = index_tasks + get_update_profiles_tasks()
 
-        if COURSE_TYPE in indexes:
-            index_tasks = index_tasks + get_update_courses_tasks(
-                blocklisted_ids, platform
-            )
+@app.task
+def finish_update_index(results, indexes, platform, started_on):
+    """
+    Move the update watermarks forward if every update task succeeded
 
-        if RESOURCE_FILE_TYPE in indexes:
-            index_tasks = index_tasks + get_update_resource_files_tasks(
-                blocklisted_ids, platform
-            )
+    Args:
+        results (list): Results of the update tasks, which are error messages or None
+        indexes (list of str): The object types which were updated
+        platform (str): The platform the update was limited to, if any
+        started_on (str): ISO 8601 time the update started
 
-        if PROGRAM_TYPE in indexes:
-            index_tasks = index_tasks + get_update_programs_tasks()
+    Returns:
+        list: The results of the update tasks
+    """
+    if merge_strings(results):
+        log.error("update_index had errors, not moving the watermarks forward")
+    else:
+        set_update_watermarks(indexes, platform, datetime.fromisoformat(started_on))
+    return results
 
-        if USER_LIST_TYPE in indexes:
-            index_tasks = index_tasks + get_update_user_lists_tasks()
 
-        if STAFF_LIST_TYPE in indexes:
-            index_tasks = index_tasks + get_update_staff_lists_tasks()
+@app.task
+def flush_index_update_queue():
+    """Apply the index updates queued by search_index_helpers, run periodically by celery beat"""
+    return flush_update_queue()
 
-        if VIDEO_TYPE in indexes:
-            index_tasks = index_tasks + get_update_videos_tasks()
 
-        if PODCAST_TYPE in indexes:
-            index_tasks = index_tasks + get_update_podcasts_tasks()
+@app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
+def update_similar_resources(ids, object_type):
+    """Compute and store the similar resources of some learning resources
 
-        if PODCAST_EPISODE_TYPE in indexes:
-            index_tasks = index_tasks + get_update_podcast_episodes_tasks()
+    Args:
+        ids (list of int): The ids of the learning resources
+        object_type (str): The object type of the learning resources
 
-        index_tasks = celery.group(index_tasks)
+    """
+    try:
+        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
+            compute_similar_resources(object_type, ids)
+    except (RetryException, Ignore):
+        raise
     except:  # pylint: disable=bare-except
-        error = "start_update_index threw an error"
+        error = "update_similar_resources threw an error"
         log.exception(error)
-        return [error]
+        return error
 
-    raise self.replace(index_tasks)
 
+@app.task(bind=True)
+def start_update_similar_resources(self, object_types=None):
+    """
+    Compute the similar resources of every indexed learning resource, run after recreate_index
+    and periodically by celery beat. The chunks are enqueued by advance_index_job, so no more
+    than OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT are in flight at once.
 
-def get_update_profiles_tasks():
-    """Get list of tasks to update profiles"""
-    index_tasks = [
-        index_profiles.si(ids, True)
-        for ids in chunks(
-            User.objects.exclude(username=settings.INDEXING_API_USERNAME)
-            .exclude(profile__isnull=True)
-            .filter(is_active=True)
-            .order_by("id")
-            .values_list("profile__id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
+    Args:
+        object_types (list of str): The object types to compute, or None for all of them
+    """
+    if not settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED:
+        return None
+    object_types = [
+        object_type
+        for object_type in object_types or SIMILAR_RESOURCE_TYPES
+        if object_type in SIMILAR_RESOURCE_TYPES
     ]
+    if not object_types:
+        return None
+    similar_job = start_index_job(
+        {
+            "kind": SIMILAR_JOB,
+            "indexes": object_types,
+            "blocklisted_ids": load_course_blocklist()
+            if COURSE_TYPE in object_types
+            else [],
+        }
+    )
+    return self.replace(similar_job)
 
-    index_tasks = index_tasks + [
-        bulk_deindex_profiles.si(ids)
-        for ids in chunks(
-            User.objects.exclude(profile__isnull=True)
-            .filter(is_active=False)
-            .order_by("id")
-            .values_list("profile__id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
+
+@app.task
+def finish_update_similar_resources(results):
+    """
+    Log the errors of start_update_similar_resources once every chunk is done
+
+    Args:
+        results (list): Results of the update_similar_resources tasks, which are error messages or None
+
+    Returns:
+        list: The results of the update_similar_resources tasks
+    """
+    errors = merge_strings(results)
+    if errors:
+        log.error("update_similar_resources had errors: %s", errors)
+    return results
+
+
+@app.task(autoretry_for=(RetryException,), retry_backoff=True)
+def rebuild_similarity_indexes():
+    """Rebuild the local similarity matrices from the indexed documents, run periodically by celery beat"""
+    if not settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED:
+        return None
+    counts = {}
+    for corpus in SIMILARITY_CORPORA:
+        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
+            counts[corpus.name] = build_similarity_index(
+                corpus,
+                api.iterate_documents(
+                    get_default_alias_name(ALIAS_ALL_INDICES),
+                    {"terms": {"object_type": list(corpus.object_types)}},
+                    source_fields=[*corpus.fields, *ROW_FIELDS],
+                ),
+            )
+    return counts
+
+
+@app.task
+def start_incremental_update_index():
+    """Update every index with the objects modified since the last update, run periodically by celery beat"""
+    start_update_index.delay(
+        [*VALID_OBJECT_TYPES, RESOURCE_FILE_TYPE], None, incremental=True
+    )
+
+
+@app.task(autoretry_for=(RetryException,), retry_backoff=True)
+def delete_retired_indexes():
+    """Delete the indexes replaced by recreate_index once they are past retention, run periodically by celery beat"""
+    deleted = []
+    for object_type in VALID_OBJECT_TYPES:
+        with wrap_retry_exception(*SEARCH_CONN_EXCEPTIONS):
+            deleted.extend(delete_expired_retired_indexes(object_type))
+    return deleted
+
+
+def get_update_profiles_sources():
+    """Get the profiles to index and deindex"""
+    return [
+        IndexSource(
+            PROFILE_TYPE,
+            index_profiles,
+            Profile.objects.exclude(
+                user__username=settings.INDEXING_API_USERNAME
+            ).filter(user__is_active=True),
+            (True,),
+        ),
+        IndexSource(
+            PROFILE_TYPE,
+            bulk_deindex_profiles,
+            Profile.objects.filter(user__is_active=False),
+            (),
+        ),
     ]
 
-    return index_tasks
 
+def _modified_since(since, *lookups):
+    """
+    Get a filter for objects where updated_on, or updated_on of a related object, is at least since
 
-def get_update_courses_tasks(blocklisted_ids, platform):
-    """Get list of tasks to update courses
+    Args:
+        since (datetime): The cutoff
+        lookups (list of str): Lookups for related objects whose modification also modifies the object
+
+    Returns:
+        Q: The filter
+    """
+    return reduce(
+        or_,
+        [Q(updated_on__gte=since)]
+        + [Q(**{f"{lookup}__updated_on__gte": since}) for lookup in lookups],
+    )
+
+
+def _get_update_sources(
+    object_type, index_task, deindex_task, update_query, deletion_query, since, *lookups
+):  # pylint: disable=too-many-arguments
+    """
+    Get the sources indexing and deindexing the ids of two querysets
+
+    Args:
+        object_type (str): The object type
+        index_task (celery.Task): The task indexing a list of ids
+        deindex_task (celery.Task): The task deindexing a list of ids
+        update_query (QuerySet): Objects to index
+        deletion_query (QuerySet): Objects to deindex
+        since (datetime): If set, only objects modified since this time are included
+        lookups (list of str): Lookups for related objects whose modification also modifies the object
+
+    Returns:
+        list of IndexSource: The sources
+    """
+    if since:
+        update_query = update_query.filter(_modified_since(since, *lookups)).distinct()
+        deletion_query = deletion_query.filter(updated_on__gte=since)
+
+    return [
+        IndexSource(object_type, index_task, update_query, (True,)),
+        IndexSource(object_type, deindex_task, deletion_query, ()),
+    ]
+
+
+def get_update_courses_sources(blocklisted_ids, platform, since=None):
+    """Get the courses to index and deindex
     Args:
         blocklisted_ids(list of int): List of course id's to exclude
         platform(str): Platform filter for the task
+        since(datetime): If set, only courses modified since this time are updated
     """
-    course_update_query = (
-        Course.objects.filter(published=True)
-        .exclude(course_id__in=blocklisted_ids)
-        .order_by("id")
+    course_update_query = Course.objects.filter(published=True).exclude(
+        course_id__in=blocklisted_ids
     )
 
+    # The blocklist isn't timestamped, so blocklisted courses are always deindexed
+    unpublished = Q(published=False)
+    if since:
+        course_update_query = course_update_query.filter(
+            _modified_since(since, "runs")
+        ).distinct()
+        unpublished = Q(published=False, updated_on__gte=since)
+
     course_deletion_query = Course.objects.filter(
-        Q(published=False) | Q(course_id__in=blocklisted_ids)
-    ).order_by("id")
+        unpublished | Q(course_id__in=blocklisted_ids)
+    )
 
     if platform:
         course_update_query = course_update_query.filter(platform=platform)
         course_deletion_query = course_deletion_query.filter(platform=platform)
 
-    index_tasks = [
-        index_courses.si(ids, True)
-        for ids in chunks(
-            course_update_query.values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
+    return [
+        IndexSource(COURSE_TYPE, index_courses, course_update_query, (True,)),
+        IndexSource(COURSE_TYPE, bulk_deindex_courses, course_deletion_query, ()),
     ]
 
-    index_tasks = index_tasks + [
-        bulk_deindex_courses.si(ids)
-        for ids in chunks(
-            course_deletion_query.values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    return index_tasks
 
-
-def get_update_resource_files_tasks(blocklisted_ids, platform):
-    """Get list of tasks to update course files
+def get_update_resource_files_sources(blocklisted_ids, platform, since=None):
+    """Get the courses whose files to index
     Args:
         blocklisted_ids(list of int): List of course id's to exclude
         platform(str): Platform filter for the task
+        since(datetime): If set, only files of courses modified since this time are updated
     """
     if platform is None or platform in RESOURCE_FILE_PLATFORMS:
-        course_update_query = (
-            Course.objects.filter(published=True)
-            .exclude(course_id__in=blocklisted_ids)
-            .order_by("id")
+        course_update_query = Course.objects.filter(published=True).exclude(
+            course_id__in=blocklisted_ids
         )
 
         if platform:
@@ -928,165 +1545,118 @@ def get_update_resource_files_tasks(blocklisted_ids, platform):
                 platform__in=RESOURCE_FILE_PLATFORMS
             )
 
+        if since:
+            course_update_query = course_update_query.filter(
+                _modified_since(since, "runs", "runs__content_files")
+            ).distinct()
+
         return [
-            index_course_content_files.si(ids, True)
-            for ids in chunks(
-                course_update_query.values_list("id", flat=True),
-                chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
+            IndexSource(
+                RESOURCE_FILE_TYPE,
+                index_course_content_files,
+                course_update_query,
+                (True,),
             )
         ]
     return []
 
 
-def get_update_programs_tasks():
-    """Get list of tasks to update programs"""
-    index_tasks = [
-        index_programs.si(ids, True)
-        for ids in chunks(
-            Program.objects.filter(published=True)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    index_tasks = index_tasks + [
-        bulk_deindex_programs.si(ids)
-        for ids in chunks(
-            Program.objects.filter(published=False)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    return index_tasks
-
-
-def get_update_user_lists_tasks():
-    """Get list of tasks to update user lists"""
-    index_tasks = [
-        index_user_lists.si(ids, True)
-        for ids in chunks(
-            UserList.objects.order_by("id")
-            .exclude(items=None)
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    index_tasks = index_tasks + [
-        bulk_deindex_user_lists.si(ids)
-        for ids in chunks(
-            UserList.objects.order_by("id")
-            .filter(items=None)
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    return index_tasks
-
-
-def get_update_staff_lists_tasks():
-    """Get list of tasks to update staff lists"""
-    index_tasks = [
-        index_staff_lists.si(ids, True)
-        for ids in chunks(
-            StaffList.objects.order_by("id")
-            .filter(privacy_level=PrivacyLevel.public.value)
-            .exclude(items=None)
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    index_tasks = index_tasks + [
-        bulk_deindex_user_lists.si(ids)
-        for ids in chunks(
-            StaffList.objects.order_by("id")
-            .filter(Q(items=None) | Q(privacy_level=PrivacyLevel.private.value))
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
-
-    return index_tasks
-
-
-def get_update_videos_tasks():
-    """Get list of tasks to update videos"""
-    index_tasks = [
-        index_videos.si(ids, True)
-        for ids in chunks(
-            Video.objects.filter(published=True)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
+def get_update_programs_sources(since=None):
+    """Get the programs to index and deindex
+    Args:
+        since(datetime): If set, only programs modified since this time are updated
+    """
+    return _get_update_sources(
+        PROGRAM_TYPE,
+        index_programs,
+        bulk_deindex_programs,
+        Program.objects.filter(published=True),
+        Program.objects.filter(published=False),
+        since,
+        "runs",
+    )
 
-    index_tasks = index_tasks + [
-        bulk_deindex_videos.si(ids)
-        for ids in chunks(
-            Video.objects.filter(published=False)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
 
-    return index_tasks
+def get_update_user_lists_sources(since=None):
+    """Get the user lists to index and deindex
+    Args:
+        since(datetime): If set, only user lists modified since this time are updated
+    """
+    return _get_update_sources(
+        USER_LIST_TYPE,
+        index_user_lists,
+        bulk_deindex_user_lists,
+        UserList.objects.exclude(items=None),
+        UserList.objects.filter(items=None),
+        since,
+        "items",
+    )
 
 
-def get_update_podcasts_tasks():
-    """Get list of tasks to update podcasts"""
-    index_tasks = [
-        index_podcasts.si(ids, True)
-        for ids in chunks(
-            Podcast.objects.filter(published=True)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
+def get_update_staff_lists_sources(since=None):
+    """Get the staff lists to index and deindex
+    Args:
+        since(datetime): If set, only staff lists modified since this time are updated
+    """
+    return _get_update_sources(
+        STAFF_LIST_TYPE,
+        index_staff_lists,
+        bulk_deindex_user_lists,
+        StaffList.objects.filter(privacy_level=PrivacyLevel.public.value).exclude(
+            items=None
+        ),
+        StaffList.objects.filter(
+            Q(items=None) | Q(privacy_level=PrivacyLevel.private.value)
+        ),
+        since,
+        "items",
+    )
 
-    index_tasks = index_tasks + [
-        bulk_deindex_podcasts.si(ids)
-        for ids in chunks(
-            Podcast.objects.filter(published=False)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
 
-    return index_tasks
+def get_update_videos_sources(since=None):
+    """Get the videos to index and deindex
+    Args:
+        since(datetime): If set, only videos modified since this time are updated
+    """
+    return _get_update_sources(
+        VIDEO_TYPE,
+        index_videos,
+        bulk_deindex_videos,
+        Video.objects.filter(published=True),
+        Video.objects.filter(published=False),
+        since,
+    )
 
 
-def get_update_podcast_episodes_tasks():
-    """Get list of tasks to update podcast episodes"""
-    index_tasks = [
-        index_podcast_episodes.si(ids, True)
-        for ids in chunks(
-            PodcastEpisode.objects.filter(published=True)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
+def get_update_podcasts_sources(since=None):
+    """Get the podcasts to index and deindex
+    Args:
+        since(datetime): If set, only podcasts modified since this time are updated
+    """
+    return _get_update_sources(
+        PODCAST_TYPE,
+        index_podcasts,
+        bulk_deindex_podcasts,
+        Podcast.objects.filter(published=True),
+        Podcast.objects.filter(published=False),
+        since,
+    )
 
-    index_tasks = index_tasks + [
-        bulk_deindex_podcast_episodes.si(ids)
-        for ids in chunks(
-            PodcastEpisode.objects.filter(published=False)
-            .order_by("id")
-            .values_list("id", flat=True),
-            chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE,
-        )
-    ]
 
-    return index_tasks
+def get_update_podcast_episodes_sources(since=None):
+    """Get the podcast episodes to index and deindex
+    Args:
+        since(datetime): If set, only podcast episodes modified since this time are updated
+    """
+    return _get_update_sources(
+        PODCAST_EPISODE_TYPE,
+        index_podcast_episodes,
+        bulk_deindex_podcast_episodes,
+        PodcastEpisode.objects.filter(published=True),
+        PodcastEpisode.objects.filter(published=False),
+        since,
+        "podcast",
+    )
 
 
 @app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
@@ -1099,7 +1669,15 @@ def finish_recreate_index(results, backing_indices):
 
     """
     errors = merge_strings(results)
+    manifest = get_recreate_manifest()
+    resumable = manifest is not None and manifest["backing_indices"] == backing_indices
     if errors:
+        if resumable:
+            # Keep the backing indices so the failed chunks can be indexed again
+            raise ReindexException(
+                f"{len(errors)} chunks failed during recreate_index, "
+                f"run recreate_index --resume to retry them: {errors}"
+            )
         try:
             api.delete_orphaned_indices()
         except RequestError as ex:
@@ -1109,9 +1687,25 @@ def finish_recreate_index(results, backing_indices):
     log.info(
         "Done with temporary index. Pointing default aliases to newly created backing indexes..."
     )
+    try:
+        # Validate every backing index before switching any, so the switch is all or nothing
+        for obj_type, backing_index in backing_indices.items():
+            api.prepare_switch(backing_index, obj_type)
+    except RequestError as ex:
+        raise RetryException(str(ex))
+    except ReindexException:
+        if not resumable:
+            try:
+                api.delete_orphaned_indices()
+            except RequestError as ex:
+                raise RetryException(str(ex))
+        raise
     for obj_type, backing_index in backing_indices.items():
         try:
-            api.switch_indices(backing_index, obj_type)
+            api.switch_aliases(backing_index, obj_type)
         except RequestError as ex:
             raise RetryException(str(ex))
+    if resumable:
+        clear_recreate_manifest()
+    start_update_similar_resources.delay(list(backing_indices))
     log.info("recreate_index has finished successfully!")
@@ -1 +1,507 @@
-"""Tests for deprecated discussion functionality - removed"""
+"""Tests for search tasks"""
+from datetime import timedelta
+
+import pytest
+from celery.exceptions import Retry
+from django.core.cache import caches
+
+from course_catalog.factories import (
+    ContentFileFactory,
+    CourseFactory,
+    LearningResourceRunFactory,
+    VideoFactory,
+)
+from course_catalog.models import Course
+from open_discussions.utils import now_in_utc
+from search.constants import (
+    COURSE_TYPE,
+    LEARNING_RESOURCE_TYPES,
+    USER_LIST_TYPE,
+    VALID_OBJECT_TYPES,
+    VIDEO_TYPE,
+)
+from search.exceptions import ReindexException
+from search.indexing_state import (
+    add_index_job_chunk,
+    get_index_job,
+    get_index_job_status,
+    get_recreate_manifest,
+    get_update_watermark,
+    is_recreate_chunk_done,
+    mark_recreate_chunk_done,
+    remove_index_job_chunk,
+    save_recreate_manifest,
+)
+from search.progress import get_progress
+from search.tasks import (
+    RECREATE_JOB,
+    UPDATE_JOB,
+    advance_index_job,
+    delete_retired_indexes,
+    fail_index_job_chunk,
+    finish_index_job_chunk,
+    finish_recreate_index,
+    finish_update_index,
+    get_recreate_index_sources,
+    get_source_chunk,
+    get_update_courses_sources,
+    get_update_resource_files_sources,
+    rebuild_similarity_indexes,
+    resume_recreate_index,
+    start_index_job,
+    start_update_index,
+    start_update_similar_resources,
+    track_opensearch_tasks,
+    update_similar_resources,
+)
+
+PAST = now_in_utc() - timedelta(days=7)
+
+
+@pytest.fixture(autouse=True)
+def state_cache(settings):
+    """Use the local memory cache for indexing state"""
+    settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS = "default"
+    cache = caches["default"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _apply_replacement(mocker, *tasks):
+    """Run the signature a task is replaced with right away, as a worker would after the task"""
+    for task in tasks:
+        mocker.patch.object(
+            task, "replace", side_effect=lambda signature: signature.apply().result
+        )
+
+
+def _source_ids(sources, task_name):
+    """Get the ids of the sources for a task"""
+    return sorted(
+        _id
+        for source in sources
+        if source.task.name == task_name
+        for _id in source.queryset.values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("incremental", [True, False])
+def test_get_update_courses_sources(incremental):
+    """Only courses modified since the cutoff, or with modified runs, should be updated"""
+    courses = CourseFactory.create_batch(6, platform="ocw")
+    old, modified, modified_run, old_unpublished, unpublished, blocklisted = courses
+    Course.objects.filter(id__in=[old_unpublished.id, unpublished.id]).update(
+        published=False
+    )
+    for course in courses:
+        course.runs.update(updated_on=PAST)
+    Course.objects.update(updated_on=PAST)
+    Course.objects.filter(id__in=[modified.id, unpublished.id]).update(
+        updated_on=now_in_utc()
+    )
+    modified_run.runs.first().save()
+
+    sources = get_update_courses_sources(
+        [blocklisted.course_id],
+        None,
+        since=(now_in_utc() - timedelta(days=1)) if incremental else None,
+    )
+    assert _source_ids(sources, "search.tasks.index_courses") == sorted(
+        [course.id for course in [modified, modified_run]]
+        + ([] if incremental else [old.id])
+    )
+    assert _source_ids(sources, "search.tasks.bulk_deindex_courses") == sorted(
+        [course.id for course in [unpublished, blocklisted]]
+        + ([] if incremental else [old_unpublished.id])
+    )
+
+
+@pytest.mark.django_db
+def test_get_update_resource_files_sources():
+    """Courses with content files modified since the cutoff should be updated"""
+    old, modified = CourseFactory.create_batch(2, platform="ocw", runs=[])
+    LearningResourceRunFactory.create(content_object=old)
+    run = LearningResourceRunFactory.create(content_object=modified)
+    for course in [old, modified]:
+        course.runs.update(updated_on=PAST)
+    Course.objects.update(updated_on=PAST)
+    ContentFileFactory.create(run=run)
+
+    sources = get_update_resource_files_sources(
+        [], None, since=now_in_utc() - timedelta(days=1)
+    )
+    assert _source_ids(sources, "search.tasks.index_course_content_files") == [
+        modified.id
+    ]
+
+
+@pytest.mark.parametrize("errors", [[], ["error"]])
+def test_finish_update_index(errors):
+    """The watermarks should only be moved forward if there were no errors"""
+    started_on = now_in_utc()
+    results = [None, [None, *errors]]
+    assert (
+        finish_update_index(
+            results, [COURSE_TYPE, VIDEO_TYPE], "ocw", started_on.isoformat()
+        )
+        == results
+    )
+    expected = None if errors else started_on
+    assert get_update_watermark(COURSE_TYPE, "ocw") == expected
+    assert get_update_watermark(VIDEO_TYPE) == expected
+
+
+@pytest.mark.parametrize("incomplete", [[], ["node:2"]])
+def test_track_opensearch_tasks(mocker, settings, incomplete):
+    """track_opensearch_tasks should retry until every OpenSearch task completed"""
+    settings.OPENSEARCH_TASK_POLL_SECONDS = 5
+    mocker.patch(
+        "search.tasks.api.get_incomplete_tasks", return_value=(incomplete, ["error"])
+    )
+    mock_retry = mocker.patch(
+        "search.tasks.track_opensearch_tasks.retry", side_effect=Retry
+    )
+    if incomplete:
+        with pytest.raises(Retry):
+            track_opensearch_tasks.delay(["node:1", "node:2"])
+        mock_retry.assert_called_once_with(
+            args=(incomplete,),
+            countdown=5,
+            max_retries=settings.OPENSEARCH_TASK_POLL_MAX_RETRIES,
+        )
+    else:
+        assert track_opensearch_tasks.delay(["node:1"]).get() == ["error"]
+        mock_retry.assert_not_called()
+
+
+BACKING_INDICES = {COURSE_TYPE: "course_backing", VIDEO_TYPE: "video_backing"}
+
+
+@pytest.mark.parametrize("error", [None, "error"])
+def test_finish_index_job_chunk(error):
+    """A chunk should be checkpointed if it was indexed without errors, and its errors kept"""
+    add_index_job_chunk("job")
+    assert finish_index_job_chunk(error, "job", "video_backing", "2:3-3") == error
+    assert is_recreate_chunk_done("video_backing", "2:3-3") is not error
+    assert get_index_job_status("job")[:2] == (0, [error] if error else [])
+
+
+def test_fail_index_job_chunk(mocker):
+    """A chunk whose index task raised an exception should count as failed"""
+    add_index_job_chunk("job")
+    fail_index_job_chunk(
+        mocker.Mock(task="search.tasks.index_videos"), ValueError("x"), "", "job"
+    )
+    assert get_index_job_status("job")[:2] == (
+        0,
+        ["search.tasks.index_videos threw an error: x"],
+    )
+
+
+@pytest.mark.django_db
+def test_advance_index_job(mocker, settings):
+    """advance_index_job should keep a bounded number of chunks in flight, then finish the job"""
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    settings.OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT = 2
+    settings.OPENSEARCH_INDEX_JOB_POLL_SECONDS = 7
+    video_ids = sorted(video.id for video in VideoFactory.create_batch(5))
+    enqueued = []
+
+    def enqueue(job_id, source, ids, backing_index, chunk_id):
+        """Keep the chunk in flight until the test finishes it"""
+        add_index_job_chunk(job_id)
+        enqueued.append((source.task.name, ids))
+
+    mocker.patch("search.tasks.enqueue_index_job_chunk", side_effect=enqueue)
+    mock_replace = mocker.patch.object(advance_index_job, "replace")
+    job_id = start_index_job(
+        {
+            "kind": UPDATE_JOB,
+            "indexes": [VIDEO_TYPE],
+            "platform": None,
+            "since": {VIDEO_TYPE: None},
+            "blocklisted_ids": [],
+            "started_on": now_in_utc().isoformat(),
+        }
+    ).args[0]
+
+    advance_index_job.run(job_id)
+    assert enqueued == [
+        ("search.tasks.index_videos", video_ids[:2]),
+        ("search.tasks.index_videos", video_ids[2:4]),
+    ]
+    poll = mock_replace.call_args[0][0]
+    assert (poll.task, poll.args, poll.options["countdown"]) == (
+        "search.tasks.advance_index_job",
+        (job_id,),
+        7,
+    )
+
+    remove_index_job_chunk(job_id)
+    remove_index_job_chunk(job_id, "error")
+    advance_index_job.run(job_id)
+    assert enqueued[2:] == [("search.tasks.index_videos", video_ids[4:])]
+    assert mock_replace.call_args[0][0].task == "search.tasks.advance_index_job"
+
+    remove_index_job_chunk(job_id)
+    advance_index_job.run(job_id)
+    finish = mock_replace.call_args[0][0]
+    assert (finish.task, finish.args[0]) == (
+        "search.tasks.finish_update_index",
+        ["error"],
+    )
+    assert get_index_job(job_id) is None
+    assert get_progress([VIDEO_TYPE])[VIDEO_TYPE]["chunks_total"] == 3
+
+
+@pytest.mark.django_db
+def test_advance_index_job_stalled(mocker, settings):
+    """advance_index_job should give up on chunks which don't finish"""
+    settings.OPENSEARCH_INDEX_JOB_STALL_TIMEOUT = 60
+    mock_replace = mocker.patch.object(advance_index_job, "replace")
+    job_id = start_index_job(
+        {
+            "kind": RECREATE_JOB,
+            "indexes": [VIDEO_TYPE],
+            "blocklisted_ids": [],
+            "backing_indices": BACKING_INDICES,
+        }
+    ).args[0]
+    add_index_job_chunk(job_id)
+    mocker.patch(
+        "search.tasks.now_in_utc", return_value=now_in_utc() + timedelta(seconds=61)
+    )
+
+    advance_index_job.run(job_id)
+    finish = mock_replace.call_args[0][0]
+    assert finish.task == "search.tasks.finish_recreate_index"
+    assert finish.args == (
+        ["1 chunks didn't finish within 60 seconds"],
+        BACKING_INDICES,
+    )
+
+
+@pytest.mark.django_db
+def test_start_update_index(mocker, settings):
+    """start_update_index should index and deindex every chunk and then move the watermarks"""
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    mock_api = mocker.patch("search.tasks.api")
+    mock_api.index_videos.return_value = None
+    published = sorted(video.id for video in VideoFactory.create_batch(3))
+    unpublished = VideoFactory.create(published=False)
+    _apply_replacement(mocker, start_update_index, advance_index_job)
+
+    assert start_update_index.run([VIDEO_TYPE], None) == []
+    assert [call[0][0] for call in mock_api.index_videos.call_args_list] == [
+        published[:2],
+        published[2:],
+    ]
+    mock_api.deindex_videos.assert_called_once_with([unpublished.id])
+    assert get_update_watermark(VIDEO_TYPE) is not None
+
+
+def test_finish_recreate_index_resumable(mocker):
+    """Backing indices should be kept if a chunk failed, and switched once every chunk is done"""
+    mock_api = mocker.patch("search.tasks.api")
+    save_recreate_manifest(BACKING_INDICES, [COURSE_TYPE, VIDEO_TYPE])
+
+    with pytest.raises(ReindexException, match="1 chunks failed.*--resume"):
+        finish_recreate_index([None, "error", None], BACKING_INDICES)
+    mock_api.delete_orphaned_indices.assert_not_called()
+    mock_api.switch_indices.assert_not_called()
+    assert get_recreate_manifest() is not None
+
+    finish_recreate_index([], BACKING_INDICES)
+    assert mock_api.switch_aliases.call_count == 2
+    assert get_recreate_manifest() is None
+
+
+def test_finish_recreate_index_not_resumable(mocker):
+    """Backing indices should be deleted if a recreate_index failed and can't be resumed"""
+    mock_api = mocker.patch("search.tasks.api")
+    with pytest.raises(ReindexException):
+        finish_recreate_index(["error"], BACKING_INDICES)
+    mock_api.delete_orphaned_indices.assert_called_once_with()
+
+
+@pytest.mark.parametrize("resumable", [True, False])
+def test_finish_recreate_index_validation_failed(mocker, resumable):
+    """No index should be switched if any backing index fails validation"""
+    mock_api = mocker.patch("search.tasks.api")
+    mock_api.prepare_switch.side_effect = [None, ReindexException("too few documents")]
+    if resumable:
+        save_recreate_manifest(BACKING_INDICES, [COURSE_TYPE, VIDEO_TYPE])
+
+    with pytest.raises(ReindexException, match="too few documents"):
+        finish_recreate_index([], BACKING_INDICES)
+    assert mock_api.prepare_switch.call_count == 2
+    mock_api.switch_aliases.assert_not_called()
+    assert (get_recreate_manifest() is not None) is resumable
+    assert mock_api.delete_orphaned_indices.called is not resumable
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("reindexing", [True, False])
+def test_resume_recreate_index(mocker, settings, reindexing):
+    """resume_recreate_index should only index the chunks which aren't done"""
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    backing_indices = {VIDEO_TYPE: "video_backing"}
+    mock_api = mocker.patch("search.tasks.api")
+    mock_api.index_videos.return_value = None
+    mock_api.get_reindexing_index.side_effect = lambda object_type: (
+        backing_indices[object_type] if reindexing else None
+    )
+    video_ids = sorted(video.id for video in VideoFactory.create_batch(3))
+    save_recreate_manifest(backing_indices, [VIDEO_TYPE])
+    mark_recreate_chunk_done("video_backing", f"0:{video_ids[0]}-{video_ids[1]}")
+    _apply_replacement(mocker, resume_recreate_index, advance_index_job)
+
+    if not reindexing:
+        assert "isn't being reindexed" in resume_recreate_index.run()
+        mock_api.index_videos.assert_not_called()
+        return
+
+    resume_recreate_index.run()
+    mock_api.index_videos.assert_called_once_with(video_ids[2:], False)
+    mock_api.switch_aliases.assert_called_once_with("video_backing", VIDEO_TYPE)
+    assert get_recreate_manifest() is None
+    assert get_progress([VIDEO_TYPE])[VIDEO_TYPE]["chunks_done"] == 2
+
+
+@pytest.mark.django_db
+def test_get_recreate_index_sources(settings):
+    """Published courses and their content files should be paginated by id"""
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    courses = CourseFactory.create_batch(3, platform="ocw")
+    blocklisted = CourseFactory.create(platform="ocw")
+    CourseFactory.create(published=False)
+    course_ids = sorted(course.id for course in courses)
+
+    sources = get_recreate_index_sources([COURSE_TYPE], [blocklisted.course_id])
+    assert [(source.object_type, source.task.name) for source in sources] == [
+        (COURSE_TYPE, "search.tasks.index_courses"),
+        (COURSE_TYPE, "search.tasks.index_course_content_files"),
+    ]
+    for source in sources:
+        assert get_source_chunk(source, 0) == course_ids[:2]
+        assert get_source_chunk(source, course_ids[1]) == course_ids[2:]
+        assert get_source_chunk(source, course_ids[2]) == []
+
+
+@pytest.mark.django_db
+def test_start_update_similar_resources(mocker, settings):
+    """start_update_similar_resources should compute the similar resources of every chunk"""
+    settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = True
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 2
+    mock_compute = mocker.patch("search.tasks.compute_similar_resources")
+    video_ids = sorted(video.id for video in VideoFactory.create_batch(3))
+    _apply_replacement(mocker, start_update_similar_resources, advance_index_job)
+
+    assert start_update_similar_resources.run([VIDEO_TYPE, USER_LIST_TYPE]) == []
+    assert [call.args for call in mock_compute.call_args_list] == [
+        (VIDEO_TYPE, video_ids[:2]),
+        (VIDEO_TYPE, video_ids[2:]),
+    ]
+
+
+@pytest.mark.django_db
+def test_start_update_similar_resources_in_flight(mocker, settings):
+    """start_update_similar_resources shouldn't enqueue more than OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT chunks"""
+    settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = True
+    settings.OPENSEARCH_INDEXING_CHUNK_SIZE = 1
+    settings.OPENSEARCH_INDEX_JOB_MAX_IN_FLIGHT = 2
+    video_ids = sorted(video.id for video in VideoFactory.create_batch(5))
+    enqueued = []
+
+    def enqueue(job_id, source, ids, backing_index, chunk_id):
+        """Keep the chunk in flight until the test finishes it"""
+        add_index_job_chunk(job_id)
+        enqueued.append((source.task.name, ids, source.args))
+
+    mocker.patch("search.tasks.enqueue_index_job_chunk", side_effect=enqueue)
+    mocker.patch.object(
+        start_update_similar_resources,
+        "replace",
+        side_effect=lambda signature: signature,
+    )
+    mock_replace = mocker.patch.object(advance_index_job, "replace")
+    job_id = start_update_similar_resources.run([VIDEO_TYPE]).args[0]
+
+    advance_index_job.run(job_id)
+    assert enqueued == [
+        ("search.tasks.update_similar_resources", [video_id], (VIDEO_TYPE,))
+        for video_id in video_ids[:2]
+    ]
+    assert get_index_job_status(job_id)[0] == 2
+    assert mock_replace.call_args[0][0].task == "search.tasks.advance_index_job"
+
+    remove_index_job_chunk(job_id)
+    advance_index_job.run(job_id)
+    assert len(enqueued) == 3
+    assert get_index_job_status(job_id)[0] == 2
+
+
+@pytest.mark.parametrize(
+    "enabled, object_types", [[False, None], [True, [USER_LIST_TYPE]]]
+)
+def test_start_update_similar_resources_skipped(
+    mocker, settings, enabled, object_types
+):
+    """start_update_similar_resources should do nothing if disabled or for other object types"""
+    settings.OPENSEARCH_SIMILAR_RESOURCES_PRECOMPUTED = enabled
+    mock_get_sources = mocker.patch("search.tasks.get_recreate_index_sources")
+    assert start_update_similar_resources.run(object_types) is None
+    mock_get_sources.assert_not_called()
+
+
+def test_update_similar_resources_error(mocker):
+    """update_similar_resources should return an error string if the computation fails"""
+    mocker.patch(
+        "search.tasks.compute_similar_resources", side_effect=ValueError("boom")
+    )
+    assert (
+        update_similar_resources.run([1], VIDEO_TYPE)
+        == "update_similar_resources threw an error"
+    )
+
+
+def test_rebuild_similarity_indexes(mocker, settings):
+    """rebuild_similarity_indexes should build each similarity matrix from the indexed documents"""
+    settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED = True
+    mock_api = mocker.patch("search.tasks.api")
+    mock_build = mocker.patch("search.tasks.build_similarity_index", side_effect=[3, 5])
+
+    assert rebuild_similarity_indexes() == {"topics": 3, "resources": 5}
+    assert [call.args[0].name for call in mock_build.call_args_list] == [
+        "topics",
+        "resources",
+    ]
+    topics_call, resources_call = mock_api.iterate_documents.call_args_list
+    assert topics_call.args[1] == {"terms": {"object_type": [COURSE_TYPE]}}
+    assert "topics" in topics_call.kwargs["source_fields"]
+    assert "full_description" in topics_call.kwargs["source_fields"]
+    assert resources_call.args[1] == {
+        "terms": {"object_type": list(LEARNING_RESOURCE_TYPES)}
+    }
+
+
+def test_rebuild_similarity_indexes_disabled(mocker, settings):
+    """rebuild_similarity_indexes should do nothing if the local similarity matrices are disabled"""
+    settings.OPENSEARCH_LOCAL_SIMILARITY_ENABLED = False
+    mock_build = mocker.patch("search.tasks.build_similarity_index")
+    assert rebuild_similarity_indexes() is None
+    mock_build.assert_not_called()
+
+
+def test_delete_retired_indexes(mocker):
+    """delete_retired_indexes should delete the expired retired indexes of every object type"""
+    mock_delete = mocker.patch(
+        "search.tasks.delete_expired_retired_indexes",
+        side_effect=lambda object_type: ["old"] if object_type == COURSE_TYPE else [],
+    )
+    assert delete_retired_indexes() == ["old"]
+    assert [call[0][0] for call in mock_delete.call_args_list] == list(
+        VALID_OBJECT_TYPES
+    )
@@ -0,0 +1,143 @@
+"""A queue of pending search index updates which coalesces repeated updates to an object"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from open_discussions.utils import chunks
+from search import indexing_api as api
+from search.constants import (
+    COURSE_TYPE,
+    PODCAST_EPISODE_TYPE,
+    PODCAST_TYPE,
+    PROGRAM_TYPE,
+    STAFF_LIST_TYPE,
+    USER_LIST_TYPE,
+    VIDEO_TYPE,
+)
+from search.serializers import serialize_for_deletion
+
+log = logging.getLogger(__name__)
+
+# A redis hash of the latest pending operation keyed by "{object_type}:{id}"
+QUEUE_KEY = "search:update_queue"
+
+INDEX_OP = "index"
+DELETE_OP = "delete"
+
+INDEX_FUNCTIONS = {
+    COURSE_TYPE: api.index_courses,
+    PROGRAM_TYPE: api.index_programs,
+    USER_LIST_TYPE: api.index_user_lists,
+    STAFF_LIST_TYPE: api.index_staff_lists,
+    VIDEO_TYPE: api.index_videos,
+    PODCAST_TYPE: api.index_podcasts,
+    PODCAST_EPISODE_TYPE: api.index_podcast_episodes,
+}
+
+
+def get_queue_connection():
+    """Get the redis client used for the update queue
+
+    Returns:
+        redis.Redis: The redis client
+
+    """
+    return get_redis_connection(settings.OPENSEARCH_INDEXING_STATE_CACHE_ALIAS)
+
+
+def enqueue_update(object_type, obj_id):
+    """Queue an object to be indexed by the next flush
+
+    Args:
+        object_type (str): The object type
+        obj_id (int): The database id of the object
+
+    """
+    get_queue_connection().hset(QUEUE_KEY, f"{object_type}:{obj_id}", INDEX_OP)
+
+
+def enqueue_deletion(object_type, obj_id, doc_id):
+    """Queue an object to be deindexed by the next flush
+
+    The document id is stored since the object might not exist anymore at that point.
+
+    Args:
+        object_type (str): The object type
+        obj_id (int): The database id of the object
+        doc_id (str): The OpenSearch document id
+
+    """
+    get_queue_connection().hset(
+        QUEUE_KEY, f"{object_type}:{obj_id}", f"{DELETE_OP}:{doc_id}"
+    )
+
+
+def _apply_operations(operations):
+    """Write queued operations to the index with bulk requests
+
+    Args:
+        operations (dict): Pending operations keyed by "{object_type}:{id}"
+
+    """
+    updates = defaultdict(list)
+    deletions = defaultdict(list)
+    for key, operation in operations.items():
+        object_type, obj_id = key.rsplit(":", 1)
+        if operation == INDEX_OP:
+            updates[object_type].append(int(obj_id))
+        else:
+            deletions[object_type].append(operation.split(":", 1)[1])
+
+    for object_type, doc_ids in deletions.items():
+        for chunk in chunks(
+            doc_ids, chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE
+        ):
+            api.deindex_items(
+                [serialize_for_deletion(doc_id) for doc_id in chunk],
+                object_type,
+                False,
+            )
+    for object_type, ids in updates.items():
+        for chunk in chunks(
+            sorted(ids), chunk_size=settings.OPENSEARCH_INDEXING_CHUNK_SIZE
+        ):
+            INDEX_FUNCTIONS[object_type](chunk)
+
+
+def flush_update_queue():
+    """Apply every queued operation, only the latest one for each object
+
+    Returns:
+        dict: The number of operations applied, keyed by object type
+
+    """
+    conn = get_queue_connection()
+    # Take the whole queue at once, so objects changing during the flush are queued for the next one
+    pipe = conn.pipeline()
+    pipe.hgetall(QUEUE_KEY)
+    pipe.delete(QUEUE_KEY)
+    raw_operations, _ = pipe.execute()
+    operations = {
+        key.decode("utf-8"): operation.decode("utf-8")
+        for key, operation in raw_operations.items()
+    }
+    if not operations:
+        return {}
+
+    try:
+        _apply_operations(operations)
+    except Exception:
+        # Put the operations back unless the object was queued again in the meantime
+        pipe = conn.pipeline()
+        for key, operation in operations.items():
+            pipe.hsetnx(QUEUE_KEY, key, operation)
+        pipe.execute()
+        raise
+
+    counts = defaultdict(int)
+    for key in operations:
+        counts[key.rsplit(":", 1)[0]] += 1
+    log.info("Flushed %d queued search index updates: %s", len(operations), counts)
+    return dict(counts)
@@ -0,0 +1,114 @@
+"""Tests for the search index update queue"""
+import pytest
+
+from search.constants import COURSE_TYPE, VIDEO_TYPE
+from search.update_queue import (
+    QUEUE_KEY,
+    enqueue_deletion,
+    enqueue_update,
+    flush_update_queue,
+)
+
+
+class FakeRedis:
+    """Just enough of a redis client for the update queue"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, field, value):
+        """Set a field of a hash"""
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+
+    def hsetnx(self, key, field, value):
+        """Set a field of a hash if it doesn't exist"""
+        self.hashes.setdefault(key, {}).setdefault(field.encode(), value.encode())
+
+    def hgetall(self, key):
+        """Get all fields of a hash"""
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        """Delete a key"""
+        self.hashes.pop(key, None)
+
+    def pipeline(self):
+        """Run commands immediately and collect their results"""
+        fake = self
+
+        class Pipeline:  # pylint: disable=too-few-public-methods
+            """Fake pipeline"""
+
+            def __init__(self):
+                self.results = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.results.append(getattr(fake, name)(*args))
+
+            def execute(self):
+                """Return the results"""
+                return self.results
+
+        return Pipeline()
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    """Use a fake redis client for the update queue"""
+    fake = FakeRedis()
+    mocker.patch("search.update_queue.get_queue_connection", return_value=fake)
+    return fake
+
+
+@pytest.fixture
+def mock_api(mocker):
+    """Mock the bulk indexing functions"""
+    mock_index_courses = mocker.Mock()
+    mock_index_videos = mocker.Mock()
+    mocker.patch.dict(
+        "search.update_queue.INDEX_FUNCTIONS",
+        {COURSE_TYPE: mock_index_courses, VIDEO_TYPE: mock_index_videos},
+    )
+    return mocker.Mock(
+        index_courses=mock_index_courses,
+        index_videos=mock_index_videos,
+        deindex_items=mocker.patch("search.update_queue.api.deindex_items"),
+    )
+
+
+def test_flush_update_queue(fake_redis, mock_api):
+    """Repeated operations on an object should be coalesced into the latest one"""
+    for _ in range(3):
+        enqueue_update(COURSE_TYPE, 2)
+        enqueue_update(COURSE_TYPE, 1)
+    enqueue_update(COURSE_TYPE, 3)
+    enqueue_deletion(COURSE_TYPE, 3, "course_3")
+    enqueue_deletion(VIDEO_TYPE, 4, "video_4")
+    enqueue_update(VIDEO_TYPE, 4)
+
+    assert flush_update_queue() == {COURSE_TYPE: 3, VIDEO_TYPE: 1}
+    mock_api.index_courses.assert_called_once_with([1, 2])
+    mock_api.index_videos.assert_called_once_with([4])
+    mock_api.deindex_items.assert_called_once_with(
+        [{"_id": "course_3", "_op_type": "delete"}], COURSE_TYPE, False
+    )
+    assert fake_redis.hgetall(QUEUE_KEY) == {}
+    assert flush_update_queue() == {}
+
+
+def test_flush_update_queue_error(fake_redis, mock_api):
+    """Operations should be queued again if the flush fails, unless they were replaced"""
+    enqueue_update(COURSE_TYPE, 1)
+    enqueue_update(COURSE_TYPE, 2)
+
+    def _fail(ids):  # pylint: disable=unused-argument
+        enqueue_deletion(COURSE_TYPE, 2, "course_2")
+        raise ConnectionError()
+
+    mock_api.index_courses.side_effect = _fail
+    with pytest.raises(ConnectionError):
+        flush_update_queue()
+    assert fake_redis.hgetall(QUEUE_KEY) == {
+        b"course:1": b"index",
+        b"course:2": b"delete:course_2",
+    }
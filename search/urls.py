@@ -1,11 +1,24 @@
 """URLs for search"""
 from django.urls import re_path
 
-from search.views import SearchView, SimilarResourcesView
+from search.views import (
+    AsyncSearchView,
+    AsyncSimilarResourcesView,
+    MultiSearchView,
+    SearchView,
+    SimilarResourcesView,
+)
 
 urlpatterns = [
+    re_path(r"api/v0/search/multi/$", MultiSearchView.as_view(), name="multi-search"),
     re_path(r"api/v0/search/", SearchView.as_view(), name="search"),
     re_path(
         r"api/v0/similar/$", SimilarResourcesView.as_view(), name="similar-resources"
     ),
+    re_path(r"api/v0/async/search/$", AsyncSearchView.as_view(), name="async-search"),
+    re_path(
+        r"api/v0/async/similar/$",
+        AsyncSimilarResourcesView.as_view(),
+        name="async-similar-resources",
+    ),
 ]
@@ -1,14 +1,28 @@
 """View for search"""
+import abc
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from opensearchpy.exceptions import TransportError
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
 from authentication.decorators import blocked_ip_exempt
 from search.api import (
+    async_execute_learn_search,
+    async_execute_search,
+    async_find_similar_resources,
     execute_learn_search,
+    execute_multi_search,
     execute_search,
     find_similar_resources,
     is_learning_query,
@@ -17,15 +31,21 @@ from search.api import (
 log = logging.getLogger(__name__)
 
 
+def _is_client_error(exc):
+    """Return True if OpenSearch rejected a search because of the request"""
+    return isinstance(exc.status_code, int) and 400 <= exc.status_code < 500
+
+
 class ESView(APIView):
     """Parent class for views that execute ES searches"""
 
     def handle_exception(self, exc):
         if isinstance(exc, TransportError):
-            if isinstance(exc.status_code, int) and 400 <= exc.status_code < 500:
+            if _is_client_error(exc):
                 log.exception("Received a 4xx error from OpenSearch")
                 return Response(status=exc.status_code)
-        raise exc
+            raise exc
+        return super().handle_exception(exc)
 
 
 @method_decorator(blocked_ip_exempt, name="dispatch")
@@ -44,6 +64,26 @@ class SearchView(ESView):
         return Response(response)
 
 
+@method_decorator(blocked_ip_exempt, name="dispatch")
+class MultiSearchView(ESView):
+    """View for executing a list of searches with a single request to OpenSearch"""
+
+    permission_classes = ()
+
+    def post(self, request, *args, **kwargs):
+        """Execute the searches. Despite being POST this should not modify any data."""
+        queries = request.data
+        if not isinstance(queries, list) or not all(
+            isinstance(query, dict) for query in queries
+        ):
+            raise ValidationError("Expected a list of queries")
+        if len(queries) > settings.OPENSEARCH_MAX_MULTI_SEARCH_QUERIES:
+            raise ValidationError(
+                f"At most {settings.OPENSEARCH_MAX_MULTI_SEARCH_QUERIES} queries can be sent at once"
+            )
+        return Response(execute_multi_search(user=request.user, queries=queries))
+
+
 @method_decorator(blocked_ip_exempt, name="dispatch")
 class SimilarResourcesView(ESView):
     """View for retrieving similar learning resources"""
@@ -54,3 +94,80 @@ class SimilarResourcesView(ESView):
         """Execute a similar resources search"""
         response = find_similar_resources(user=request.user, value_doc=request.data)
         return Response(response)
+
+
+def _authenticate_request(request):
+    """Authenticate a request and parse its JSON body like the DRF views do
+
+    Args:
+        request (django.http.HttpRequest): The request
+
+    Returns:
+        tuple(User, dict): The user making the request and the request data
+
+    """
+    drf_request = Request(
+        request,
+        parsers=[JSONParser()],
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    return drf_request.user, drf_request.data
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncESView(abc.ABC, View):
+    """Parent class for async views that execute ES searches with the async client
+
+    These hold no worker while waiting for OpenSearch when served by ASGI. Authentication
+    and CSRF checks are done by the same DRF authentication classes as the other views.
+    """
+
+    http_method_names = ["post"]
+
+    @abc.abstractmethod
+    async def execute(self, user, data):
+        """Execute the search
+
+        Args:
+            user (User): The user executing the search
+            data (dict): The request data
+
+        Returns:
+            dict or list: The response data
+
+        """
+
+    async def post(self, request, *args, **kwargs):
+        """Execute a search. Despite being POST this should not modify any data."""
+        try:
+            user, data = await sync_to_async(_authenticate_request)(request)
+            response = await self.execute(user, data)
+        except APIException as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        except TransportError as exc:
+            if not _is_client_error(exc):
+                raise
+            log.exception("Received a 4xx error from OpenSearch")
+            return HttpResponse(status=exc.status_code)
+        return JsonResponse(response, safe=False)
+
+
+@method_decorator(blocked_ip_exempt, name="dispatch")
+class AsyncSearchView(AsyncESView):
+    """Async view for executing searches of posts, comments, profiles, learning resources"""
+
+    async def execute(self, user, data):
+        if is_learning_query(data):
+            return await async_execute_learn_search(user=user, query=data)
+        return await async_execute_search(user=user, query=data)
+
+
+@method_decorator(blocked_ip_exempt, name="dispatch")
+class AsyncSimilarResourcesView(AsyncESView):
+    """Async view for retrieving similar learning resources"""
+
+    async def execute(self, user, data):
+        return await async_find_similar_resources(user=user, value_doc=data)
@@ -148,3 +148,104 @@ def test_find_similar_resources(mocker, client):
     similar_resources_mock.assert_called_once_with(
         user=AnonymousUser(), value_doc=doc_vals
     )
+
+
+@pytest.mark.parametrize(
+    "query, search_func",
+    [
+        ({"query": {"match": {"title": "Search"}}}, "async_execute_search"),
+        (
+            {"query": {"match": {"object_type": COURSE_TYPE}}},
+            "async_execute_learn_search",
+        ),
+    ],
+)
+def test_async_search(mocker, client, query, search_func):
+    """The async view should run the search with the async API"""
+    search_mock = mocker.patch(
+        f"search.views.{search_func}",
+        autospec=True,
+        return_value=FAKE_SEARCH_RESPONSE,
+    )
+    resp = client.post(reverse("async-search"), query, content_type="application/json")
+    assert resp.json() == FAKE_SEARCH_RESPONSE
+    search_mock.assert_called_once_with(user=AnonymousUser(), query=query)
+
+
+@pytest.mark.parametrize("status_code, raise_error", [[418, False], [503, True]])
+def test_async_search_es_exception(mocker, client, status_code, raise_error):
+    """If a 4xx status is returned from OpenSearch it should be returned from the async view"""
+    mocker.patch(
+        "search.views.async_execute_search",
+        autospec=True,
+        side_effect=TransportError(status_code, "error", {}),
+    )
+    query = {"query": {"match": {"title": "Search"}}}
+    if raise_error:
+        with pytest.raises(TransportError):
+            client.post(reverse("async-search"), query, content_type="application/json")
+    else:
+        resp = client.post(
+            reverse("async-search"), query, content_type="application/json"
+        )
+        assert resp.status_code == status_code
+
+
+def test_async_search_authenticated(mocker, user_client, user):
+    """The async view should authenticate the user like the DRF views"""
+    search_mock = mocker.patch(
+        "search.views.async_execute_search",
+        autospec=True,
+        return_value=FAKE_SEARCH_RESPONSE,
+    )
+    query = {"query": {"match": {"title": "Search"}}}
+    resp = user_client.post(
+        reverse("async-search"), query, content_type="application/json"
+    )
+    assert resp.status_code == 200
+    search_mock.assert_called_once_with(user=user, query=query)
+
+
+def test_async_find_similar_resources(mocker, client):
+    """The async view should return the results of the async API method for finding similar resources"""
+    doc_vals = {"id": 1, "object_type": COURSE_TYPE, "title": "title"}
+    similar_resources_mock = mocker.patch(
+        "search.views.async_find_similar_resources",
+        autospec=True,
+        return_value=[doc_vals],
+    )
+    resp = client.post(
+        reverse("async-similar-resources"), doc_vals, content_type="application/json"
+    )
+    assert resp.json() == [doc_vals]
+    similar_resources_mock.assert_called_once_with(
+        user=AnonymousUser(), value_doc=doc_vals
+    )
+
+
+def test_multi_search(mocker, client):
+    """The queries should be passed from the front end to execute_multi_search"""
+    search_mock = mocker.patch(
+        "search.views.execute_multi_search",
+        autospec=True,
+        return_value=[FAKE_SEARCH_RESPONSE, FAKE_SEARCH_RESPONSE],
+    )
+    queries = [
+        {"query": {"match": {"title": "Search"}}},
+        {"query": {"match": {"object_type": COURSE_TYPE}}},
+    ]
+    resp = client.post(
+        reverse("multi-search"), queries, content_type="application/json"
+    )
+    assert resp.json() == [FAKE_SEARCH_RESPONSE, FAKE_SEARCH_RESPONSE]
+    search_mock.assert_called_once_with(user=AnonymousUser(), queries=queries)
+
+
+@pytest.mark.parametrize("data", [{"query": {}}, ["query"], [{}, {}, {}]])
+def test_multi_search_invalid(mocker, settings, client, data):
+    """The multi-search view should reject anything but a short list of queries"""
+    settings.OPENSEARCH_MAX_MULTI_SEARCH_QUERIES = 2
+    search_mock = mocker.patch("search.views.execute_multi_search", autospec=True)
+    resp = client.post(reverse("multi-search"), data, content_type="application/json")
+    assert resp.status_code == 400
+    search_mock.assert_not_called()